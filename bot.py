@@ -27,12 +27,27 @@ bot = commands.Bot(command_prefix=";", intents=intents)
 # ---- Load Cogs ----
 initial_extensions = [
     # "commands.assign",
+    "commands.admin",
     "commands.docket_entry",
     "commands.ping",
     "commands.update",
     
 ]
 
+@bot.event
+async def setup_hook():
+    # Runs once at login, after main() loaded the extensions (on_ready fires again on every reconnect)
+
+    # Tab ids and grid sizes, so the first write doesn't wait on a metadata fetch
+    from services.async_google_requests import async_load_sheet_metadata
+    result = await async_load_sheet_metadata()
+    print(result["message"])
+
+    # First real classification shouldn't pay for model and connection setup
+    from services.ai_requests import warm_up_model
+    result = await warm_up_model()
+    print(result["message"])
+
 @bot.event
 async def on_ready():
     print("=" * 40)
@@ -41,9 +56,6 @@ async def on_ready():
     print(f"Connected to {len(bot.guilds)} guild(s):")
     for guild in bot.guilds:
         print(f" - {guild.name} (ID: {guild.id})")
-
-    from commands.docket_entry import DocketEntry
-    await bot.add_cog(DocketEntry(bot))
     print("=" * 40)
 
 async def main():
@@ -54,7 +66,17 @@ async def main():
         except Exception as e:
             print(f"Skipped {ext}: {e}")
 
-    await bot.start(TOKEN)
+    try:
+        await bot.start(TOKEN)
+    finally:
+        # Close the pooled Google API session used by the cogs
+        from services.async_google_requests import google_api, case_numbers
+        await case_numbers.flush()
+        await google_api.close()
+        # Persist last-used times so eviction order survives the restart
+        from services.ai_requests import classification_cache, close_ai_session
+        classification_cache.flush()
+        await close_ai_session()
     print("=" * 40)
 
 if __name__ == "__main__":
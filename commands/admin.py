@@ -0,0 +1,57 @@
+"""
+Admin-only maintenance commands.
+
+commands:
+;purgecache   - deletes every cached AI case classification
+
+only users in admin_id in config.yaml can use these.
+"""
+
+import discord
+from discord.ext import commands
+import yaml
+
+from services.ai_requests import classification_cache
+from utils.logger import log
+
+
+# ------------------------ CONFIG ------------------------
+with open("./config.yaml", "r") as f:
+    config = yaml.safe_load(f)
+
+ADMIN_IDS = set(config.get("admin_id") or [])
+
+
+# ------------------------ COG ------------------------
+class Admin(commands.Cog):
+    """Maintenance commands for bot admins."""
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="purgecache")
+    async def purge_cache(self, ctx: commands.Context):
+        """Deletes every cached AI classification, e.g. after editing the prompt file."""
+        if ctx.author.id not in ADMIN_IDS:
+            await ctx.send("You are not authorized to use this command.", delete_after=10)
+            return
+
+        stats = classification_cache.stats()
+        removed = classification_cache.purge()
+        log(f"{ctx.author} purged {removed} cached classifications")
+
+        embed = discord.Embed(
+            title="🧹 Classification cache purged",
+            description=f"Removed `{removed}` cached classifications.",
+            color=discord.Color.orange()
+        )
+        embed.add_field(
+            name="Since startup",
+            value=f"Hits `{stats['hits']}` · misses `{stats['misses']}` · evictions `{stats['evictions']}`",
+            inline=False
+        )
+        await ctx.send(embed=embed)
+
+
+# ------------------------ SETUP ------------------------
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
@@ -2,7 +2,10 @@
 Docket Entry Cog
 ----------------
 Listens for Google Docs submissions in a submission channel.
-Processes the first link from each message and sends an internal review embed.
+Processes every distinct link in each message (up to a per-message cap) in parallel and sends
+one internal review embed per message; several links are reviewed together as a group.
+A doc submitted again within the duplicate window, or already on the docket, is not reprocessed:
+the internal channel is pointed at the existing review or docket entry instead.
 If submission is unknown or sc petition it just notes it in the internal channel
 with buttons: Accept / Deny / Edit.
 
@@ -23,21 +26,34 @@ import yaml
 import sys
 import os
 import asyncio
+import collections
+import time
 import uuid
 from utils.logger import log
 
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from services.google_requests import (
-    extract_google_docs_links,
-    add_to_docket,
-    get_gdoccase_info,
-    edit_docket,
-    get_case_info_from_number,
-    increment_available_case_number,
-    get_available_case_number,
+from services.google_requests import extract_google_docs_links
+from services.async_google_requests import (
+    async_add_to_docket,
+    async_get_gdoccase_info,
+    async_fetch_case_text,
+    async_classify_case_text,
+    async_number_case,
+    async_confirm_case_number,
+    async_release_case_number,
+    async_edit_docket,
+    async_get_case_info_from_number,
+    async_find_case_by_document,
+    async_get_all_cases,
+    async_get_judges,
 )
+from services.docket_index import document_id
+from services.judge_scheduler import JudgeScheduler
+from services.review_store import ReviewStore
+from services.submission_pipeline import SubmissionPipeline, DEFERRED, REJECTED
+from services.submission_registry import SubmissionRegistry
 
 from typing import Optional
 
@@ -52,6 +68,43 @@ internal_review_channel_id = config["channels"]["internal_review_channel_id"]
 # Normalize to an empty set when not configured to avoid TypeError on "in" checks
 REVIEWER_IDS = set(config.get("reviewer_ids") or [])
 
+PIPELINE_CONFIG = config.get("submission_pipeline") or {}
+# Links taken from one message; an embed holds 25 fields, so a grouped review can't list more than 20
+MAX_LINKS_PER_MESSAGE = max(1, min(int(PIPELINE_CONFIG.get("max_links_per_message", 5)), 20))
+
+# Docs submitted recently, so a re-post links to its existing review instead of being reprocessed
+submission_registry = SubmissionRegistry(
+    window_seconds=PIPELINE_CONFIG.get("duplicate_window_hours", 24) * 3600,
+    max_entries=PIPELINE_CONFIG.get("duplicate_registry_size", 2000),
+)
+
+# State behind each open review message, so its buttons still work after a restart
+REVIEW_STORE_CONFIG = config.get("review_store") or {}
+review_store = ReviewStore(
+    REVIEW_STORE_CONFIG.get("path") or os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "review_store.sqlite3"),
+    cache_size=REVIEW_STORE_CONFIG.get("cache_size", 256),
+)
+
+# Judge roster and per-judge case loads, re-read from the sheet after the TTL
+judge_scheduler = JudgeScheduler(ttl_seconds=config['google'].get('judge_roster_ttl_seconds', 300))
+
+# ------------------------ METRICS ------------------------
+# Milliseconds from a submission arriving to its review embed being posted (recent submissions)
+review_embed_latencies = collections.deque(maxlen=200)
+
+
+def review_embed_stats() -> dict:
+    """count, p50_ms, p95_ms and last_ms of time-to-review-embed over recent submissions."""
+    if not review_embed_latencies:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "last_ms": None}
+    ordered = sorted(review_embed_latencies)
+    return {
+        "count": len(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "last_ms": review_embed_latencies[-1],
+    }
+
 # ------------------------ EMBED CREATOR ------------------------
 def create_review_embed(case_info, gdoc_link, filing_date, message_url, edited=False):
     """
@@ -68,13 +121,42 @@ def create_review_embed(case_info, gdoc_link, filing_date, message_url, edited=F
         embed.add_field(name="Original Message", value=message_url, inline=False)
     else:
         embed.add_field(name="**Case Name:**", value=case_info.get("case_name", "N/A"), inline=True)
-        embed.add_field(name="Case Number", value=case_info.get("case_number", "N/A"), inline=False)
+        number_label = "Case Number (provisional, assigned on accept)" if case_info.get("provisional_number") else "Case Number"
+        embed.add_field(name=number_label, value=case_info.get("case_number", "N/A"), inline=False)
         embed.add_field(name="Filing Date", value=filing_date, inline=False)
         embed.add_field(name="Filing Link", value=f"[View Google Doc]({gdoc_link})", inline=False)
         embed.add_field(name="Original Message", value=f"[Jump to Original Message]({message_url})", inline=False)
 
     return embed
 
+def create_group_review_embed(filings, filing_date, message_url, edited=False):
+    """
+    Builds the internal review embed for a message with several filings, one field per filing.
+    Each filing is {"gdoc_link", "case_info"} and may carry an "outcome" line once reviewed.
+    """
+    title = f"Docket Entry Review ({len(filings)} filings)"
+    color = 0xFFFFFF if not edited else 0x000080
+
+    embed = discord.Embed(title=title, color=color)
+
+    for number, filing in enumerate(filings, start=1):
+        case_info = filing.get("case_info") or {}
+        link = f"[View Google Doc]({filing['gdoc_link']})"
+        if case_info.get("success", False):
+            name = f"{number}. {case_info.get('case_name', 'N/A')}"
+            value = f"{case_info.get('case_number', 'N/A')}{' (provisional)' if case_info.get('provisional_number') else ''} · {link}"
+        else:
+            name = f"{number}. Unknown filing"
+            value = f"Could not extract case details. · {link}"
+        if filing.get("outcome"):
+            value += f"\n{filing['outcome']}"
+        embed.add_field(name=name, value=value, inline=False)
+
+    embed.add_field(name="Filing Date", value=filing_date, inline=False)
+    embed.add_field(name="Original Message", value=f"[Jump to Original Message]({message_url})", inline=False)
+
+    return embed
+
 # ------------------------ EDIT MODAL CLASS ------------------------
 class EditCaseModal(Modal, title="Edit Case Information"):
     def __init__(self, case_info: dict, gdoc_link: str, filing_date: str, message_url: str, view: View):
@@ -107,7 +189,11 @@ class EditCaseModal(Modal, title="Edit Case Information"):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             self.case_info['case_name'] = self.case_name_input.value.strip()
-            self.case_info['case_number'] = self.case_number_input.value.strip()
+            case_number = self.case_number_input.value.strip()
+            if case_number != self.case_info.get('case_number'):
+                # A number typed in by the reviewer is kept; accepting moves the counter past it
+                self.case_info['provisional_number'] = False
+            self.case_info['case_number'] = case_number
 
             updated_embed = create_review_embed(
                 self.case_info,
@@ -119,6 +205,7 @@ class EditCaseModal(Modal, title="Edit Case Information"):
 
             # Edit the message that contained the persistent view
             await interaction.response.edit_message(embed=updated_embed, view=self.view)
+            review_store.put(interaction.message.id, self.view.state())
 
         except Exception as e:
             try:
@@ -130,10 +217,25 @@ class EditCaseModal(Modal, title="Edit Case Information"):
                     log(f"Could not send error response for modal submit: {e}")
 
 # ------------------------ Persistent Review View ------------------------
+async def _stored_review(interaction: discord.Interaction, kind: str) -> dict | None:
+    """
+    State of the clicked review message from the review store (after a restart the click reaches
+    a view registered without state). Tells the reviewer and returns None if it isn't there.
+    """
+    state = review_store.get(interaction.message.id) if interaction.message else None
+    if state is None or state.get("kind") != kind:
+        await interaction.response.send_message(
+            "The details of this review are no longer available. Resubmit the doc with `;add`.", ephemeral=True
+        )
+        return None
+    return state
+
+
 class ReviewView(discord.ui.View):
     """
     Persistent view for internal review messages.
-    Buttons have fixed custom_id values so callbacks survive bot restarts.
+    Buttons have fixed custom_id values so callbacks survive bot restarts; the instance registered
+    at startup has no state and loads each message's state from the review store on a click.
     """
     def __init__(self, case_info: dict, gdoc_link: str, filing_date: str, message_url: str):
         super().__init__(timeout=None)  # persistent
@@ -142,6 +244,24 @@ class ReviewView(discord.ui.View):
         self.filing_date = filing_date
         self.message_url = message_url
 
+    def state(self) -> dict:
+        return {
+            "kind": "single",
+            "case_info": self.case_info,
+            "gdoc_link": self.gdoc_link,
+            "filing_date": self.filing_date,
+            "message_url": self.message_url,
+        }
+
+    async def _review(self, interaction: discord.Interaction) -> "ReviewView | None":
+        """This view if it has state, else one built from the clicked message's stored state."""
+        if self.case_info is not None:
+            return self
+        state = await _stored_review(interaction, "single")
+        if state is None:
+            return None
+        return ReviewView(state["case_info"], state["gdoc_link"], state["filing_date"], state["message_url"])
+
     @discord.ui.button(label="Accept", style=discord.ButtonStyle.success, custom_id="docket_accept")
     async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         if REVIEWER_IDS and interaction.user.id not in REVIEWER_IDS:
@@ -150,8 +270,10 @@ class ReviewView(discord.ui.View):
             )
             return
 
-        # Call your existing handle_accept logic
-        await handle_accept(interaction, self.case_info, self.gdoc_link, self.filing_date, self.message_url)
+        review = await self._review(interaction)
+        if review is None:
+            return
+        await handle_accept(interaction, review.case_info, review.gdoc_link, review.filing_date, review.message_url)
 
     @discord.ui.button(label="Deny", style=discord.ButtonStyle.danger, custom_id="docket_deny")
     async def deny_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -161,8 +283,10 @@ class ReviewView(discord.ui.View):
             )
             return
 
-        # Call your existing handle_deny logic
-        await handle_deny(interaction, self.case_info, self.gdoc_link, self.filing_date, self.message_url)
+        review = await self._review(interaction)
+        if review is None:
+            return
+        await handle_deny(interaction, review.case_info, review.gdoc_link, review.filing_date, review.message_url)
 
     @discord.ui.button(label="Edit", style=discord.ButtonStyle.primary, custom_id="docket_edit")
     async def edit_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -172,17 +296,80 @@ class ReviewView(discord.ui.View):
             )
             return
 
-        modal = EditCaseModal(self.case_info, self.gdoc_link, self.filing_date, self.message_url, self)
+        review = await self._review(interaction)
+        if review is None:
+            return
+        modal = EditCaseModal(review.case_info, review.gdoc_link, review.filing_date, review.message_url, review)
         await interaction.response.send_modal(modal)
 
+# ------------------------ Persistent Group Review View ------------------------
+class GroupReviewView(discord.ui.View):
+    """
+    Persistent view for the grouped review of a multi-link message.
+    Accept / Deny apply to every filing in the group. Like ReviewView, the instance registered
+    at startup loads each message's state from the review store.
+    """
+    def __init__(self, filings: list, filing_date: str, message_url: str):
+        super().__init__(timeout=None)  # persistent
+        self.filings = filings
+        self.filing_date = filing_date
+        self.message_url = message_url
+
+    def state(self) -> dict:
+        return {
+            "kind": "group",
+            "filings": [{"gdoc_link": f["gdoc_link"], "case_info": f.get("case_info")} for f in self.filings],
+            "filing_date": self.filing_date,
+            "message_url": self.message_url,
+        }
+
+    async def _review(self, interaction: discord.Interaction) -> "GroupReviewView | None":
+        if self.filings is not None:
+            return self
+        state = await _stored_review(interaction, "group")
+        if state is None:
+            return None
+        return GroupReviewView(state["filings"], state["filing_date"], state["message_url"])
+
+    @discord.ui.button(label="Accept All", style=discord.ButtonStyle.success, custom_id="docket_group_accept")
+    async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if REVIEWER_IDS and interaction.user.id not in REVIEWER_IDS:
+            await interaction.response.send_message(
+                "You are not authorized to interact with this message.", ephemeral=True
+            )
+            return
+
+        review = await self._review(interaction)
+        if review is None:
+            return
+        await handle_group_accept(interaction, review.filings, review.filing_date, review.message_url)
+
+    @discord.ui.button(label="Deny All", style=discord.ButtonStyle.danger, custom_id="docket_group_deny")
+    async def deny_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if REVIEWER_IDS and interaction.user.id not in REVIEWER_IDS:
+            await interaction.response.send_message(
+                "You are not authorized to interact with this message.", ephemeral=True
+            )
+            return
+
+        review = await self._review(interaction)
+        if review is None:
+            return
+        await handle_group_deny(interaction, review.filings, review.filing_date, review.message_url)
+
 # ------------------------ ACCEPT / DENY HANDLERS (top-level) ------------------------
-async def handle_accept(interaction: discord.Interaction, case_info: dict, gdoc_link: str, filing_date: str, message_url: str):
+async def _enter_filing(case_info: dict, gdoc_link: str, filing_date: str) -> dict:
     """
-    Add case to docket, update message UI, notify original submitter, trigger assignment.
+    Adds one reviewed filing to the docket as not yet assigned; returns {"success", "message"}.
+    The case number is taken from the counter first: a provisional one is replaced by a newly
+    allocated number (case_info is updated), a typed-in one moves the counter past it. Either is
+    handed back if the filing couldn't be added.
     """
-    if not case_info.get("success", False):
-        await interaction.response.send_message("Cannot accept: case info unknown.", ephemeral=True)
-        return
+    provisional = bool(case_info.get("provisional_number"))
+    try:
+        taken = await async_confirm_case_number(case_info)
+    except Exception as e:
+        return {"success": False, "message": str(e)}
 
     case_info_to_add = case_info.copy()
     case_info_to_add["case_status"] = "PT Not assigned"
@@ -190,16 +377,73 @@ async def handle_accept(interaction: discord.Interaction, case_info: dict, gdoc_
     case_info_to_add["filing_link"] = gdoc_link
     case_info_to_add["judge"] = "NA"
 
+    try:
+        result = await async_add_to_docket(case_info_to_add)
+    except Exception as e:
+        result = {"success": False, "message": str(e)}
+
+    if taken and not result.get("success"):
+        await async_release_case_number(case_info.get("case_type", ""), case_info["case_number"])
+        case_info["provisional_number"] = provisional
+    return result
+
+
+async def _notify_submitter(interaction: discord.Interaction, message_url: str, description: str):
+    """Replies to the original submission message (from its jump URL) that its filings were entered."""
+    try:
+        # Try to fetch the original message from the jump URL if provided
+        if message_url:
+            # message_url is of format https://.../channels/<guild_id>/<channel_id>/<message_id>
+            m = re.search(r"/channels/\d+/(\d+)/(\d+)$", message_url)
+            if m:
+                channel_id = int(m.group(1))
+                message_id = int(m.group(2))
+                ch = interaction.client.get_channel(channel_id)
+                if ch:
+                    try:
+                        original_msg = await ch.fetch_message(message_id)
+                        await original_msg.reply(embed=discord.Embed(
+                            title="Case Entered into Docket",
+                            description=description,
+                            color=0x00FF00
+                        ))
+                    except Exception:
+                        # fallback: do nothing
+                        pass
+    except Exception as e:
+        log(f"Failed to notify submitter after accept: {e}")
+
+
+async def _assign_entered(client, case_info: dict, gdoc_link: str, filing_date: str):
+    """Triggers judge assignment for a filing that was just entered."""
+    new_case_lookup = {
+        "success": True,
+        "case_name": case_info.get("case_name"),
+        "case_status": "PT Not assigned",
+        "filing_date": filing_date,
+        "filing_link": gdoc_link,
+    }
+    try:
+        await assign_case(client, case_info.get('case_number'), case_lookup=new_case_lookup)
+    except Exception as e:
+        log(f"Error triggering case assignment: {e}")
+
+
+async def handle_accept(interaction: discord.Interaction, case_info: dict, gdoc_link: str, filing_date: str, message_url: str):
+    """
+    Add case to docket, update message UI, notify original submitter, trigger assignment.
+    A provisional case number is only taken from the counter now, in _enter_filing.
+    """
+    if not case_info.get("success", False):
+        await interaction.response.send_message("Cannot accept: case info unknown.", ephemeral=True)
+        return
+
     try:
         await interaction.response.defer()
     except Exception:
         pass
 
-    try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, add_to_docket, case_info_to_add)
-    except Exception as e:
-        result = {"success": False, "message": str(e)}
+    result = await _enter_filing(case_info, gdoc_link, filing_date)
 
     if not result.get("success"):
         msg = result.get("message", "Unknown error")
@@ -230,52 +474,96 @@ async def handle_accept(interaction: discord.Interaction, case_info: dict, gdoc_
             await interaction.message.edit(embed=accepted_embed, view=None)
     except Exception as e:
         log(f"Failed to update review message after accept: {e}")
+    review_store.delete(interaction.message.id)
 
     # Notify original submission message if possible
+    await _notify_submitter(
+        interaction, message_url,
+        f"Entered as: **{case_info.get('case_name')} {case_info.get('case_number')}**."
+    )
+
+    # Trigger judge assignment using known case info
+    await _assign_entered(interaction.client, case_info, gdoc_link, filing_date)
+
+async def handle_deny(interaction: discord.Interaction, case_info: dict, gdoc_link: str, filing_date: str, message_url: str):
+    # A denied doc may be corrected and submitted again; its provisional case number was never taken
+    submission_registry.release(document_id(gdoc_link))
+
+    review_store.delete(interaction.message.id)
+
+    denied_embed = create_review_embed(case_info, gdoc_link, filing_date, message_url, edited=True)
+    denied_embed.color = 0xFFFF00
+    denied_embed.title = "Docket Entry Review - DENIED"
+    denied_embed.description = f"Denied by {interaction.user.mention}"
+
     try:
-        # Try to fetch the original message from the jump URL if provided
-        if message_url:
-            # message_url is of format https://.../channels/<guild_id>/<channel_id>/<message_id>
-            m = re.search(r"/channels/\d+/(\d+)/(\d+)$", message_url)
-            if m:
-                channel_id = int(m.group(1))
-                message_id = int(m.group(2))
-                ch = interaction.client.get_channel(channel_id)
-                if ch:
-                    try:
-                        original_msg = await ch.fetch_message(message_id)
-                        await original_msg.reply(embed=discord.Embed(
-                            title="Case Entered into Docket",
-                            description=f"Entered as: **{case_info.get('case_name')} {case_info.get('case_number')}**.",
-                            color=0x00FF00
-                        ))
-                    except Exception:
-                        # fallback: do nothing
-                        pass
-    except Exception as e:
-        log(f"Failed to notify submitter after accept: {e}")
+        await interaction.response.edit_message(embed=denied_embed, view=None)
+    except Exception:
+        try:
+            await interaction.response.send_message("Denied, but failed to update the message UI.", ephemeral=True)
+        except Exception:
+            log("Could not acknowledge deny interaction")
+
+async def handle_group_accept(interaction: discord.Interaction, filings: list, filing_date: str, message_url: str):
+    """
+    Enters every filing of a grouped review that has case info, in link order, then updates the
+    review embed with each filing's outcome, replies once to the submitter and assigns judges.
+    """
+    if not any((f.get("case_info") or {}).get("success", False) for f in filings):
+        await interaction.response.send_message("Cannot accept: no filing has known case info.", ephemeral=True)
+        return
 
-    # Increment available case number
     try:
-        await asyncio.get_event_loop().run_in_executor(None, increment_available_case_number, case_info.get("case_type", "").lower())
-    except Exception as e:
-        log(f"Failed to increment available case number: {e}")
+        await interaction.response.defer()
+    except Exception:
+        pass
+
+    entered = []
+    for filing in filings:
+        case_info = filing.get("case_info") or {}
+        if not case_info.get("success", False):
+            filing["outcome"] = "Skipped: case info unknown."
+            continue
+        # One at a time, so docket rows keep the order of the links in the message
+        result = await _enter_filing(case_info, filing["gdoc_link"], filing_date)
+        if result.get("success"):
+            filing["outcome"] = "✅ Entered into docket."
+            entered.append(filing)
+        else:
+            filing["outcome"] = f"❌ Failed to add: {result.get('message', 'Unknown error')}"
+
+    accepted_embed = create_group_review_embed(filings, filing_date, message_url, edited=True)
+    accepted_embed.color = 0x00FF00 if entered else 0xFF0000
+    accepted_embed.title = f"Docket Entry Review - ACCEPTED ({len(entered)}/{len(filings)} entered)"
+    accepted_embed.description = f"Accepted by {interaction.user.mention}"
 
-    # Trigger judge assignment using known case info
-    new_case_lookup = {
-        "success": True,
-        "case_name": case_info.get("case_name"),
-        "case_status": case_info_to_add.get("case_status"),
-        "filing_date": filing_date,
-        "filing_link": gdoc_link,
-    }
     try:
-        await assign_case(interaction.client, case_info.get('case_number'), case_lookup=new_case_lookup)
+        try:
+            await interaction.followup.edit_message(interaction.message.id, embed=accepted_embed, view=None)
+        except Exception:
+            await interaction.message.edit(embed=accepted_embed, view=None)
     except Exception as e:
-        log(f"Error triggering case assignment: {e}")
+        log(f"Failed to update group review message after accept: {e}")
+    review_store.delete(interaction.message.id)
 
-async def handle_deny(interaction: discord.Interaction, case_info: dict, gdoc_link: str, filing_date: str, message_url: str):
-    denied_embed = create_review_embed(case_info, gdoc_link, filing_date, message_url, edited=True)
+    if not entered:
+        return
+
+    cases = "\n".join(
+        f"**{f['case_info'].get('case_name')} {f['case_info'].get('case_number')}**" for f in entered
+    )
+    await _notify_submitter(interaction, message_url, f"Entered as:\n{cases}")
+
+    for filing in entered:
+        await _assign_entered(interaction.client, filing["case_info"], filing["gdoc_link"], filing_date)
+
+async def handle_group_deny(interaction: discord.Interaction, filings: list, filing_date: str, message_url: str):
+    for filing in filings:
+        submission_registry.release(document_id(filing["gdoc_link"]))
+
+    review_store.delete(interaction.message.id)
+
+    denied_embed = create_group_review_embed(filings, filing_date, message_url, edited=True)
     denied_embed.color = 0xFFFF00
     denied_embed.title = "Docket Entry Review - DENIED"
     denied_embed.description = f"Denied by {interaction.user.mention}"
@@ -286,69 +574,245 @@ async def handle_deny(interaction: discord.Interaction, case_info: dict, gdoc_li
         try:
             await interaction.response.send_message("Denied, but failed to update the message UI.", ephemeral=True)
         except Exception:
-            log("Could not acknowledge deny interaction")
+            log("Could not acknowledge group deny interaction")
 
 # ------------------------ COG ------------------------
 class DocketEntry(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Submissions are worked through by a fixed number of workers: dedupe -> fetch -> classify -> number -> post
+        self.pipeline = SubmissionPipeline(
+            [
+                ("dedupe", self._stage_dedupe),
+                ("fetch", self._stage_fetch),
+                ("classify", self._stage_classify),
+                ("number", self._stage_number),
+                ("post", self._stage_post),
+            ],
+            workers=PIPELINE_CONFIG.get("workers", 4),
+            max_queue=PIPELINE_CONFIG.get("max_queue", 20),
+            max_deferred=PIPELINE_CONFIG.get("max_deferred", 100),
+            on_error=self._stage_failed,
+        )
+
+    async def cog_load(self):
+        self.pipeline.start()
+
+    async def cog_unload(self):
+        await self.pipeline.stop()
+
+    def review_stats(self) -> dict:
+        """Time-to-review-embed percentiles, for ;ping."""
+        return review_embed_stats()
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         if message.author == self.bot.user or message.channel.id != submission_channel_id:
             return
+        received_at = time.perf_counter()
 
         log(f"Received message from {message.author} in submission channel.")
 
-        links = extract_google_docs_links(message.content)
+        # Same document linked twice (links are normalised to the document id) is processed once
+        links = list(dict.fromkeys(extract_google_docs_links(message.content)))
         if not links:
             log("No valid Google Doc link found.")
             return
-        gdoc_link = links[0]
-        log(f"Processing Google Doc link: {gdoc_link}")
-
-        testing_mode = config.get("AI", {}).get("testing_result", False)
+        if len(links) > MAX_LINKS_PER_MESSAGE:
+            log(f"Message has {len(links)} links; processing the first {MAX_LINKS_PER_MESSAGE}")
+            links = links[:MAX_LINKS_PER_MESSAGE]
+
+        duplicates = []
+        for link in links:
+            earlier = submission_registry.claim(document_id(link), message.jump_url)
+            if earlier is not None:
+                duplicates.append((link, earlier))
+        if duplicates:
+            await self._note_duplicates(message, duplicates)
+            links = [link for link in links if link not in {d[0] for d in duplicates}]
+            if not links:
+                return
+        log(f"Processing Google Doc link(s): {', '.join(links)}")
 
-        if testing_mode:
-            log("Testing mode enabled - using mock case data")
-            case_info = {
-                "success": True,
-                "case_name": "SD v. Ed",
-                "case_number": "Crim 193",
-                "case_type": "Criminal",
-                "errors": []
-            }
-        else:
+        job = {
+            "message": message,
+            "filings": [{"gdoc_link": link} for link in links],
+            "received_at": received_at,
+        }
+        status = self.pipeline.submit(job)
+        if status == DEFERRED:
+            log(f"Submission pipeline saturated, deferred {', '.join(links)}")
             try:
-                loop = asyncio.get_event_loop()
-                case_info = await loop.run_in_executor(None, get_gdoccase_info, gdoc_link)
-                log(f"Case info: {case_info}")
+                await message.add_reaction("⏳")
+            except Exception:
+                pass
+        elif status == REJECTED:
+            log(f"Submission pipeline full, rejected {', '.join(links)}")
+            for link in links:
+                submission_registry.release(document_id(link))
+            internal_channel = self.bot.get_channel(internal_review_channel_id)
+            if internal_channel is not None:
+                commands_text = "\n".join(f"`;add {link}`" for link in links)
+                await internal_channel.send(
+                    f"⚠️ Too many submissions queued; this one was not processed. "
+                    f"Use these once the queue drains:\n{commands_text}\n[Jump to original message]({message.jump_url})"
+                )
+
+    async def _note_duplicates(self, message: discord.Message, duplicates: list):
+        """Points the internal channel at the earlier review of each doc submitted again."""
+        lines = []
+        for link, earlier in duplicates:
+            log(f"Duplicate submission of {link}, first submitted in {earlier['message_url']}")
+            target = earlier["review_url"] or earlier["message_url"]
+            label = "existing review" if earlier["review_url"] else "earlier submission"
+            lines.append(f"[Google Doc]({link}) is already under review: [{label}]({target})")
+        internal_channel = self.bot.get_channel(internal_review_channel_id)
+        if internal_channel is None:
+            log(f"Error: Could not find internal review channel with ID {internal_review_channel_id}")
+            return
+        try:
+            await internal_channel.send(
+                "🔁 Resubmitted, not reprocessed:\n" + "\n".join(lines)
+                + f"\n[Jump to new message]({message.jump_url})"
+            )
+        except Exception as e:
+            log(f"Failed to note duplicate submission: {e}")
+
+    # ---- submission pipeline stages ----
+    # A job is one message; the links in it are fetched and classified concurrently
+    async def _stage_dedupe(self, job: dict):
+        """Drops filings whose doc is already on the docket (from the docket index, no doc or AI call)."""
+        docketed = []
+        for filing in job["filings"]:
+            try:
+                case = await async_find_case_by_document(document_id(filing["gdoc_link"]))
             except Exception as e:
-                log(f"Error getting case info: {e}")
-                case_info = {"success": False, "errors": [str(e)]}
+                log(f"Could not check the docket for {filing['gdoc_link']}: {e}")
+                continue
+            if case is not None:
+                docketed.append((filing, case))
+        if not docketed:
+            return
 
-        if case_info.get("case_type", "").upper() == "SC":
-            log(f"SC petition detected: {case_info.get('case_name', 'Unknown')}")
+        job["filings"] = [f for f in job["filings"] if all(f is not d for d, _ in docketed)]
+        lines = []
+        for filing, case in docketed:
+            submission_registry.release(document_id(filing["gdoc_link"]))
+            log(f"{filing['gdoc_link']} is already on the docket as {case.get('case_number')}")
+            lines.append(
+                f"[Google Doc]({filing['gdoc_link']}) is already on the docket as "
+                f"**{case.get('case_name')} {case.get('case_number')}**"
+            )
+        internal_channel = self.bot.get_channel(internal_review_channel_id)
+        if internal_channel is not None:
+            await internal_channel.send(
+                "📁 Already docketed, not reprocessed:\n" + "\n".join(lines)
+                + f"\n[Jump to original message]({job['message'].jump_url})"
+            )
+        if not job["filings"]:
+            return False
+
+    async def _stage_fetch(self, job: dict):
+        filings = job["filings"]
+        if config.get("AI", {}).get("testing_result", False):
+            log("Testing mode enabled - using mock case data")
+            for filing in filings:
+                filing["case_info"] = {
+                    "success": True,
+                    "case_name": "SD v. Ed",
+                    "case_number": "Crim 193",
+                    "case_type": "Criminal",
+                    "errors": []
+                }
+            return
+
+        results = await asyncio.gather(
+            *(async_fetch_case_text(f["gdoc_link"]) for f in filings), return_exceptions=True
+        )
+        for filing, result in zip(filings, results):
+            if isinstance(result, Exception):
+                result = (False, str(result))
+            success, text = result
+            if success:
+                filing["text"] = text
+            else:
+                filing["case_info"] = {"success": False, "case_name": None, "case_number": None, "case_type": None, "errors": [text]}
+
+    async def _stage_classify(self, job: dict):
+        pending = [f for f in job["filings"] if "case_info" not in f]
+        results = await asyncio.gather(
+            *(async_classify_case_text(f["text"]) for f in pending), return_exceptions=True
+        )
+        for filing, result in zip(pending, results):
+            if isinstance(result, Exception):
+                log(f"Error classifying {filing['gdoc_link']}: {result}")
+                result = {"success": False, "case_name": None, "case_number": None, "case_type": None, "errors": [str(result)]}
+            filing["case_info"] = result
+
+        # SC petitions are only acknowledged internally, not reviewed
+        petitions = [f for f in job["filings"] if (f["case_info"].get("case_type") or "").upper() == "SC"]
+        if petitions:
+            job["filings"] = [f for f in job["filings"] if f not in petitions]
             internal_channel = self.bot.get_channel(internal_review_channel_id)
             if internal_channel is None:
                 log(f"Error: Could not find internal review channel with ID {internal_review_channel_id}")
-                return
-            sc_embed = discord.Embed(title="SC Petition Received", color=0xFFFF00)
-            sc_embed.add_field(name="", value=f"[Jump to original message]({message.jump_url})", inline=False)
-            await internal_channel.send(embed=sc_embed)
-            log("SC petition acknowledged internally")
-            return
-
+            else:
+                for filing in petitions:
+                    log(f"SC petition detected: {filing['case_info'].get('case_name', 'Unknown')}")
+                    sc_embed = discord.Embed(title="SC Petition Received", color=0xFFFF00)
+                    sc_embed.add_field(name="", value=f"[Jump to original message]({job['message'].jump_url})", inline=False)
+                    if len(petitions) + len(job["filings"]) > 1:
+                        sc_embed.add_field(name="Filing Link", value=f"[View Google Doc]({filing['gdoc_link']})", inline=False)
+                    await internal_channel.send(embed=sc_embed)
+                log("SC petition acknowledged internally")
+        if not job["filings"]:
+            return False
+
+    async def _stage_number(self, job: dict):
+        # Provisional numbers, consecutive per case type in link order: Accept All enters the
+        # filings in that order, so they get these numbers unless other filings are accepted first
+        taken = collections.Counter()
+        for filing in job["filings"]:
+            case_info = filing["case_info"]
+            if case_info.get("case_number") is None and case_info.get("case_type"):
+                try:
+                    await async_number_case(case_info, offset=taken[case_info["case_type"]])
+                    taken[case_info["case_type"]] += 1
+                except Exception as e:
+                    log(f"Error getting case info: {e}")
+                    filing["case_info"] = {"success": False, "errors": [str(e)]}
+            log(f"Case info: {filing['case_info']}")
+
+    async def _stage_post(self, job: dict):
+        message = job["message"]
         filing_date = datetime.datetime.now().strftime("%m/%d/%Y")
-        message_url = message.jump_url
-
-        await self._post_internal_review(case_info, gdoc_link, filing_date, message_url, message)
+        filings = job["filings"]
+        if len(filings) == 1:
+            review = await self._post_internal_review(filings[0]["case_info"], filings[0]["gdoc_link"], filing_date,
+                                                      message.jump_url, message, job["received_at"])
+        else:
+            review = await self._post_group_review(filings, filing_date, message.jump_url, job["received_at"])
+        if review is not None:
+            for filing in filings:
+                submission_registry.attach_review(document_id(filing["gdoc_link"]), review.jump_url)
+
+    async def _stage_failed(self, job: dict, stage: str, error: Exception):
+        """A stage raised: still post a review embed (with the error) unless posting itself failed."""
+        if stage == "post":
+            return
+        for filing in job["filings"]:
+            if not (filing.get("case_info") or {}).get("success", False):
+                filing["case_info"] = {"success": False, "errors": [f"{stage}: {error}"]}
+        await self._stage_post(job)
 
-    async def _post_internal_review(self, case_info, gdoc_link, filing_date, message_url, original_message: Optional[discord.Message]):
+    async def _post_internal_review(self, case_info, gdoc_link, filing_date, message_url, original_message: Optional[discord.Message],
+                                    received_at: float = None):
         """
         Post the internal review embed with Accept / Deny / Edit buttons.
         original_message is the source message (may be None for manual flows).
+        received_at (time.perf_counter()) is when the submission arrived, for the time-to-review-embed metric.
         This uses persistent View instances with fixed custom_id values.
+        Returns the review message, or None if it couldn't be posted.
         """
         internal_channel = self.bot.get_channel(internal_review_channel_id)
         if internal_channel is None:
@@ -368,8 +832,15 @@ class DocketEntry(commands.Cog):
         view = ReviewView(case_info, gdoc_link, filing_date, message_url)
 
         try:
-            await internal_channel.send(embed=review_embed, view=view)
-            log(f"Internal review sent successfully for case {case_info.get('case_number', 'UNKNOWN')}.")
+            review = await internal_channel.send(embed=review_embed, view=view)
+            review_store.put(review.id, view.state())
+            if received_at is not None:
+                elapsed_ms = round((time.perf_counter() - received_at) * 1000)
+                review_embed_latencies.append(elapsed_ms)
+                log(f"Internal review sent for case {case_info.get('case_number', 'UNKNOWN')} in {elapsed_ms}ms.")
+            else:
+                log(f"Internal review sent successfully for case {case_info.get('case_number', 'UNKNOWN')}.")
+            return review
         except Exception as e:
             log(f"Error sending internal review message: {e}")
             try:
@@ -377,6 +848,37 @@ class DocketEntry(commands.Cog):
             except Exception:
                 log("Failed to send any message to internal channel")
 
+    async def _post_group_review(self, filings: list, filing_date: str, message_url: str, received_at: float = None):
+        """
+        Post one internal review embed covering every filing of a multi-link message,
+        with Accept All / Deny All buttons. Returns the review message, or None.
+        """
+        internal_channel = self.bot.get_channel(internal_review_channel_id)
+        if internal_channel is None:
+            log(f"Error: Could not find internal review channel with ID {internal_review_channel_id}")
+            return
+
+        review_embed = create_group_review_embed(filings, filing_date, message_url)
+        view = GroupReviewView(filings, filing_date, message_url)
+        numbers = ", ".join(str((f.get("case_info") or {}).get("case_number") or "UNKNOWN") for f in filings)
+
+        try:
+            review = await internal_channel.send(embed=review_embed, view=view)
+            review_store.put(review.id, view.state())
+            if received_at is not None:
+                elapsed_ms = round((time.perf_counter() - received_at) * 1000)
+                review_embed_latencies.append(elapsed_ms)
+                log(f"Group review sent for cases {numbers} in {elapsed_ms}ms.")
+            else:
+                log(f"Group review sent successfully for cases {numbers}.")
+            return review
+        except Exception as e:
+            log(f"Error sending group review message: {e}")
+            try:
+                await internal_channel.send(f"Error creating review embed: {e}")
+            except Exception:
+                log("Failed to send any message to internal channel")
+
     @commands.command(name="add")
     async def manual_add_case(self, ctx: commands.Context, gdoc_link: str = None):
         """
@@ -384,6 +886,7 @@ class DocketEntry(commands.Cog):
         Usage: ;add https://docs.google.com/...
         Posts the same internal-review flow as on_message (does NOT add immediately).
         """
+        received_at = time.perf_counter()
         if ctx.channel.id != internal_review_channel_id:
             await ctx.send("This command can only be used in the internal review channel.", delete_after=10)
             return
@@ -396,9 +899,8 @@ class DocketEntry(commands.Cog):
 
         log(f"Manual add requested by {ctx.author} for link: {gdoc_link}")
 
-        loop = asyncio.get_running_loop()
         try:
-            case_info = await loop.run_in_executor(None, get_gdoccase_info, gdoc_link)
+            case_info = await async_get_gdoccase_info(gdoc_link)
         except Exception as e:
             log(f"Error extracting case info: {e}")
             await ctx.send(f"Error extracting case info: {str(e)}", delete_after=10)
@@ -410,28 +912,36 @@ class DocketEntry(commands.Cog):
 
         filing_date = datetime.datetime.now().strftime("%m/%d/%Y")
         message_url = ctx.message.jump_url
-        await self._post_internal_review(case_info, gdoc_link, filing_date, message_url, ctx.message)
+        await self._post_internal_review(case_info, gdoc_link, filing_date, message_url, ctx.message, received_at)
 
 # ----------------------- #
 
 def get_judge_name(judge_id):
     """
-    place holder function to get judge discord id from name
+    Judge name for a discord id from the roster, or the id itself if the judge isn't on it.
     """
-    return "Ed"  # placeholder
+    return judge_scheduler.judge_name(judge_id) or str(judge_id)
 
 # --------------------- Case Assignment -------------------- #
-def get_free_judge(last_denied: list) -> str:
+async def _refresh_judge_scheduler():
+    """Rebuilds the judge roster and loads once the TTL has passed (one Data tab read; docket from the index)."""
+    if judge_scheduler.is_fresh():
+        return
+    judges = await async_get_judges()
+    if not judges.get("success"):
+        log(f"Could not load judges: {judges.get('message')}")
+        return
+    cases = await async_get_all_cases(refresh=False)
+    judge_scheduler.rebuild(judges["judges"], cases.get("cases", []))
+    log(f"Judge roster loaded: {judge_scheduler.stats()}")
+
+async def get_free_judge(last_denied: list, case_name: str = None) -> str:
     """
-    Filler function until we have real judge assignment logic.
-    Returns the next available judge not in last_denied list.
-    Cycles through a predefined list of judge ids.
+    Returns the discord id of the least-loaded active judge not in last_denied and not a party
+    to case_name, or "No Judges Available".
     """
-    judges = [
-        "1272553776154411103",  # Ed
-    ]
-
-    return "1272553776154411103"
+    await _refresh_judge_scheduler()
+    return judge_scheduler.pick(last_denied, case_name) or "No Judges Available"
 
 # ...existing code...
 async def assign_case(bot, case_number: str, case_lookup: dict = None, last_denied: list = None, update_notify: dict = None) -> dict:
@@ -451,8 +961,7 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
     # Ensure we have case info (use provided or fetch)
     if not case_lookup:
         try:
-            loop = asyncio.get_event_loop()
-            case_info = await loop.run_in_executor(None, get_case_info_from_number, case_number)
+            case_info = await async_get_case_info_from_number(case_number)
         except Exception as e:
             log(f"Error getting case info for assignment: {e}")
             return {"success": False, "error": str(e)}
@@ -460,7 +969,7 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
         case_info = case_lookup
 
     # Choose a judge id (string). get_free_judge returns string ids in this repo.
-    judge_id_str = get_free_judge(last_denied)
+    judge_id_str = await get_free_judge(last_denied, case_info.get("case_name"))
     if judge_id_str == "No Judges Available":
         log(f"No judges available to assign case {case_number}")
         internal_channel = bot.get_channel(internal_review_channel_id)
@@ -498,6 +1007,19 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
     view.add_item(accept_btn)
     view.add_item(deny_btn)
 
+    # The pick counts as an open request on the judge's load until it is answered, expires or fails to send
+    offer_open = True
+
+    def close_offer(accepted: bool):
+        nonlocal offer_open
+        if not offer_open:
+            return
+        offer_open = False
+        if accepted:
+            judge_scheduler.accept(judge_id_str)
+        else:
+            judge_scheduler.decline(judge_id_str)
+
     # Accept callback
     async def accept_callback(interaction: discord.Interaction):
         try:
@@ -533,8 +1055,7 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
             update_fields['filing_link'] = filing_link_value
 
         try:
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, lambda: edit_docket(case_number, update_fields))
+            result = await async_edit_docket(case_number, update_fields, row_number=case_info.get('row_number'))
         except Exception as e:
             log(f"Error updating docket: {e}")
             result = {"success": False, "message": str(e)}
@@ -551,6 +1072,9 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
                     log("Could not notify judge of update failure")
             return
 
+        close_offer(accepted=True)
+        view.stop()
+
         accepted_embed = discord.Embed(
             title="Judge Assignment - ACCEPTED",
             description=f"Accepted by {interaction.user.mention}",
@@ -572,8 +1096,7 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
 
         try:
             if update_notify:
-                loop = asyncio.get_event_loop()
-                case_result = await loop.run_in_executor(None, get_case_info_from_number, case_number)
+                case_result = await async_get_case_info_from_number(case_number)
                 if case_result.get('success'):
                     judge_display = judge_name
                     status = case_result.get('case_status') or case_info.get('case_status')
@@ -621,6 +1144,8 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
             return
 
         log(f"Judge {judge_name} ({judge_id_str}) denied assignment for case {case_number}")
+        close_offer(accepted=False)
+        view.stop()
 
         denied_embed = discord.Embed(
             title="Judge Assignment - DENIED",
@@ -643,20 +1168,43 @@ async def assign_case(bot, case_number: str, case_lookup: dict = None, last_deni
         await asyncio.sleep(1)
         await assign_case(bot, case_number, case_lookup=case_info, last_denied=last_denied)
 
+    sent = None
+
+    # Unanswered request: release it from the judge's load and take the buttons away
+    async def on_timeout():
+        if not offer_open:
+            return
+        close_offer(accepted=False)
+        log(f"Judge assignment request for case {case_number} to {judge_name} ({judge_id_str}) expired unanswered")
+        if sent is not None:
+            expired_embed = discord.Embed(
+                title="Judge Assignment - EXPIRED",
+                description="No answer was given in time; the case is still unassigned.",
+                color=0x808080
+            )
+            expired_embed.add_field(name="Case", value=f"{case_info.get('case_name','N/A')} ({case_number})", inline=False)
+            try:
+                await sent.edit(embed=expired_embed, view=None)
+            except Exception as e:
+                log(f"Failed to update expired assignment message: {e}")
+
     accept_btn.callback = accept_callback
     deny_btn.callback = deny_callback
+    view.on_timeout = on_timeout
 
     internal_channel = bot.get_channel(internal_review_channel_id)
     if internal_channel is None:
         log(f"Error: Internal review channel {internal_review_channel_id} not found")
+        close_offer(accepted=False)
         return {"success": False, "error": "Internal review channel not found"}
 
     try:
-        await internal_channel.send(content=f"<@{judge_id_str}>", embed=embed, view=view)
+        sent = await internal_channel.send(content=f"<@{judge_id_str}>", embed=embed, view=view)
         log(f"Posted judge assignment request in internal channel for {judge_name} ({judge_id_str}) (case {case_number})")
         return {"success": True}
     except Exception as e:
         log(f"Error sending judge assignment: {e}")
+        close_offer(accepted=False)
         return {"success": False, "error": str(e)}
 
 # ------------------------ SETUP ------------------------
@@ -665,6 +1213,7 @@ async def setup(bot):
     # Register the persistent ReviewView so discord.py restores callbacks after restarts
     try:
         bot.add_view(ReviewView(None, None, None, None))
-        log("Persistent ReviewView registered")
+        bot.add_view(GroupReviewView(None, None, None))
+        log("Persistent ReviewView and GroupReviewView registered")
     except Exception as e:
         log(f"Failed to register persistent views: {e}")
@@ -2,6 +2,9 @@ import discord
 from discord.ext import commands
 import time
 
+from services.google_requests import rate_limiter
+from services.ai_requests import ai_stats
+
 class Ping(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -21,6 +24,40 @@ class Ping(commands.Cog):
             description=f"Latency: `{latency}ms`",
             color=discord.Color.blue()
         )
+        quota = rate_limiter.quota()
+        embed.add_field(
+            name="Google API quota left",
+            value=(
+                f"Sheets reads `{quota['read']['remaining']}/{quota['read']['per_minute']}` · "
+                f"writes `{quota['write']['remaining']}/{quota['write']['per_minute']}` · "
+                f"Docs `{quota['docs']['remaining']}/{quota['docs']['per_minute']}`\n"
+                f"Throttled `{quota['throttled']}` · retried `{quota['retries']}`"
+            ),
+            inline=False
+        )
+        docket_entry = self.bot.get_cog("DocketEntry")
+        review = docket_entry.review_stats() if docket_entry is not None else {"count": 0}
+        ai = ai_stats()
+        embed.add_field(
+            name="Time to review embed",
+            value=(
+                f"p50 `{review['p50_ms']}ms` · p95 `{review['p95_ms']}ms` over `{review['count']}` submissions\n"
+                f"AI requests `{ai['requests']}` · streamed `{ai['streamed']}` · stopped early `{ai['stopped_early']}`"
+            ) if review["count"] else "No submissions yet",
+            inline=False
+        )
+        if docket_entry is not None:
+            pipeline = docket_entry.pipeline.stats()
+            stages = " · ".join(f"{name} `{s['avg_ms']}ms`" for name, s in pipeline["stages"].items())
+            embed.add_field(
+                name="Submission pipeline",
+                value=(
+                    f"Queued `{pipeline['queue_depth']}` · deferred `{pipeline['deferred_now']}` · "
+                    f"busy `{pipeline['active_workers']}/{pipeline['workers']}` · rejected `{pipeline['rejected']}`\n"
+                    f"Avg per stage: {stages}"
+                ),
+                inline=False
+            )
         embed.set_footer(text=f"Requested by {ctx.author.display_name}", icon_url=ctx.author.avatar.url)
 
         await message.edit(content=None, embed=embed)
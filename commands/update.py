@@ -50,7 +50,13 @@ import asyncio
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.google_requests import get_all_cases, edit_docket, get_case_info_from_number, delete_case_row, finish_case
+from services.async_google_requests import (
+    async_get_all_cases,
+    async_edit_docket,
+    async_get_case_info_from_number,
+    async_delete_case_row,
+    async_finish_case,
+)
 from commands.docket_entry import assign_case
 from utils.logger import log
 
@@ -144,9 +150,8 @@ class EditCaseModal(Modal, title="Edit Case Information"):
         if original_case_number != updated_case_number:
             changes["case_number"] = updated_case_number
 
-        loop = asyncio.get_event_loop()
         # Use the original case number to find the row, then update values (including case_number)
-        result = await loop.run_in_executor(None, lambda: edit_docket(original_case_number, changes))
+        result = await async_edit_docket(original_case_number, changes, row_number=self.case.get('row_number'))
 
         if result.get("success"):
             log(f"Case {original_case_number} updated by {interaction.user}: name='{updated_case_name}', number='{updated_case_number}'")
@@ -213,8 +218,7 @@ class ActionView(View):
         self.actions.append(action_log)
 
         if fetch:
-            loop = asyncio.get_event_loop()
-            case_result = await loop.run_in_executor(None, get_case_info_from_number, self.case["case_number"])
+            case_result = await async_get_case_info_from_number(self.case["case_number"])
 
             if case_result.get("success"):
                 # Prefer authoritative values from the sheet (case_result). Fallback to local values when missing.
@@ -223,7 +227,8 @@ class ActionView(View):
                     "case_number": case_result.get("case_number") or self.case.get("case_number"),
                     "case_status": case_result.get("case_status") or self.case.get("case_status"),
                     "judge": case_result.get("judge") or self.case.get("judge"),
-                    "filing_link": case_result.get("link") or self.case.get("filing_link")
+                    "filing_link": case_result.get("link") or self.case.get("filing_link"),
+                    "row_number": case_result.get("row_number") or self.case.get("row_number")
                 }
                 self.case = refreshed
             else:
@@ -277,7 +282,6 @@ class ActionView(View):
             await interaction.responses.send_modal(modal)
             return
 
-        loop = asyncio.get_event_loop()
         action_log = ""
 
         if custom_id == "reassign_case":
@@ -296,8 +300,7 @@ class ActionView(View):
             await assign_case(self.bot, self.case['case_number'], update_notify=update_notify)
             
             # Try to fetch the updated case info after reassignment
-            loop = asyncio.get_event_loop()
-            case_result = await loop.run_in_executor(None, get_case_info_from_number, self.case.get('case_number'))
+            case_result = await async_get_case_info_from_number(self.case.get('case_number'))
             new_judge = None
             
             if case_result.get('success'):
@@ -315,7 +318,7 @@ class ActionView(View):
                     pass
             else:
                 # Fallback: re-scan all cases by name/number to find any moved row
-                all_cases_result = await loop.run_in_executor(None, get_all_cases)
+                all_cases_result = await async_get_all_cases()
                 if all_cases_result.get('success'):
                     
                     match = next((c for c in all_cases_result.get('cases', []) if c.get('case_name') == self.case.get('case_name') or c.get('case_number') == self.case.get('case_number')), None)
@@ -349,7 +352,7 @@ class ActionView(View):
                 update_fields = {"case_status": "In Trial"}
                 log(f"Moving case {self.case['case_number']} to Trial by {user}")
 
-            result = await loop.run_in_executor(None, lambda: edit_docket(self.case['case_number'], update_fields))
+            result = await async_edit_docket(self.case['case_number'], update_fields, row_number=self.case.get('row_number'))
             if result.get("success"):
                 action_log = f"Case status updated to '{update_fields['case_status']}' by {user.mention}."
             else:
@@ -420,7 +423,6 @@ class EndingLinkModal(Modal, title="Finish Case - Link"):
         except Exception:
             pass
 
-        loop = asyncio.get_event_loop()
         case_info = {
             "case_number": self.case.get('case_number'),
             "case_name": self.case.get('case_name'),
@@ -430,7 +432,7 @@ class EndingLinkModal(Modal, title="Finish Case - Link"):
             "ending_link": link
         }
 
-        result = await loop.run_in_executor(None, lambda: finish_case(case_info))
+        result = await async_finish_case(case_info)
 
         if result.get("success"):
             log(f"Case {self.case['case_number']} finished as '{self.ending}' by {interaction.user}")
@@ -564,8 +566,7 @@ class DeleteConfirmView(View):
             return
 
         await interaction.response.defer()
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, lambda: delete_case_row(self.case.get('case_name', ''), self.case.get('case_number', '')))
+        result = await async_delete_case_row(self.case.get('case_name', ''), self.case.get('case_number', ''))
 
         if result.get('success'):
             log(f"Case {self.case.get('case_number')} deleted by {user}")
@@ -674,8 +675,8 @@ class CaseSelectView(View):
         await interaction.response.defer()
         case_number = interaction.data["values"][0]
         
-        loop = asyncio.get_event_loop()
-        all_cases_result = await loop.run_in_executor(None, get_all_cases)
+        # The case list was just read by ;update, so the docket index is fresh enough here
+        all_cases_result = await async_get_all_cases(refresh=False)
 
         if not all_cases_result.get("success"):
              await interaction.followup.send("Failed to fetch case details.", ephemeral=True)
@@ -712,8 +713,7 @@ class Update(commands.Cog):
             return
 
         await ctx.defer()
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, get_all_cases)
+        result = await async_get_all_cases()
 
         if not result.get("success"):
             await ctx.send(f"❌ Error fetching cases: {result.get('message')}", delete_after=10)
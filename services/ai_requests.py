@@ -1,12 +1,18 @@
 import json
 import os
 from pathlib import Path
-import os
-import json
+import re
+import asyncio
+import threading
+import time
+import aiohttp
 import dotenv
 import yaml
 import google.generativeai as genai
 
+from services.classification_batcher import ClassificationBatcher
+from services.classification_cache import ClassificationCache, cache_key
+
 dotenv.load_dotenv()
 
 # Config & keys
@@ -20,6 +26,13 @@ with open(CONFIG_PATH, "r", encoding="utf-8") as f:
 
 model_name = config.get("AI", {}).get("google_model", "")
 testing_mode = config.get("AI", {}).get("testing_mode", False)
+_config_mtime = os.path.getmtime(CONFIG_PATH)
+
+# Classifications of identical (prompt, model, case text) are reused across restarts
+classification_cache = ClassificationCache(
+    config.get("AI", {}).get("classification_cache_path") or str(BASE_DIR.parent / "data" / "classification_cache.sqlite3"),
+    max_entries=config.get("AI", {}).get("classification_cache_size", 5000),
+)
 
 # Prompt file: prefer PROMPT_PATH env, otherwise use ../data/prompt.txt (module-relative)
 prompt_candidates = [
@@ -46,124 +59,537 @@ if google_api_key:
         pass
 
 
-def ai_function(dict) -> dict:
-    """"
-    Input dict will include prompt, model, K-Tempreture, etc etc
-    output dict with success status, and prompt output
-    """
+# One GenerativeModel per model name; building it per call re-did client setup every time
+_model_lock = threading.Lock()
+_models = {}
+
+# Limits for ai_function; read once, like the Google API limits
+MAX_CONCURRENT_AI_REQUESTS = config.get("AI", {}).get("max_concurrent_requests", 4)
+AI_REQUEST_TIMEOUT = config.get("AI", {}).get("request_timeout_seconds", 20)
+
+# Empty to use the Gemini SDK; e.g. http://127.0.0.1:8085 for utils/fake_google_server.py,
+# which ai_function then calls over plain REST
+AI_API_BASE_URL = (config.get("AI", {}).get("api_base_url") or "").rstrip("/")
+_rest_session = None
+
+# Classification reads the answer as a stream and stops once the JSON object is complete
+STREAM_CLASSIFICATION = config.get("AI", {}).get("stream_classification", True)
 
-    
+_ai_stats = {"requests": 0, "errors": 0, "timeouts": 0, "streamed": 0, "stopped_early": 0}
 
+# The bot's event loop, recorded on first use, so sync callers in worker threads can run
+# ai_function there instead of on a loop of their own
+_ai_loop = None
+_ai_semaphore = None    # caps in-flight AI requests on _ai_loop
+
+
+def _refresh_config():
+    """Re-reads the AI section of config.yaml if the file changed since it was last read."""
+    global config, model_name, testing_mode, _config_mtime
+    try:
+        mtime = os.path.getmtime(CONFIG_PATH)
+        if mtime == _config_mtime:
+            return
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            new_config = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError):
+        # Keep the last good config if the file is missing or half-written
+        return
+    config = new_config
+    model_name = config.get("AI", {}).get("google_model", "")
+    testing_mode = config.get("AI", {}).get("testing_mode", False)
+    _config_mtime = mtime
+
+
+def get_model(name: str = None):
+    """Shared GenerativeModel for name (default AI.google_model, re-read when config.yaml changes)."""
+    _refresh_config()
+    name = name or model_name
+    with _model_lock:
+        if name not in _models:
+            _models[name] = genai.GenerativeModel(name)
+        return _models[name]
+
+
+def _semaphore() -> asyncio.Semaphore:
+    global _ai_semaphore
+    if asyncio.get_running_loop() is not _ai_loop:
+        # A blocking get_case_type() on a loop of its own (asyncio.run): nothing else runs on it
+        return asyncio.Semaphore(MAX_CONCURRENT_AI_REQUESTS)
+    if _ai_semaphore is None:
+        _ai_semaphore = asyncio.Semaphore(MAX_CONCURRENT_AI_REQUESTS)
+    return _ai_semaphore
+
+
+def _usage(response) -> dict:
+    """Token counts from a response's usage_metadata (zeros if it has none)."""
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        "total_tokens": getattr(usage, "total_token_count", 0) or 0,
+    }
+
+
+def _rest_body(prompt: str, generation_config: dict) -> dict:
+    body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if generation_config:
+        # REST field names are camelCase: max_output_tokens -> maxOutputTokens
+        body["generationConfig"] = {
+            re.sub(r"_(\w)", lambda m: m.group(1).upper(), k): v for k, v in generation_config.items()
+        }
+    return body
+
+
+def _rest_result(data: dict) -> tuple[str, dict | None]:
+    """(text, usage or None) of one REST GenerateContentResponse (or stream chunk)."""
+    parts = (data.get("candidates") or [{}])[0].get("content", {}).get("parts", [])
+    usage = data.get("usageMetadata")
+    return "".join(p.get("text", "") for p in parts), usage and {
+        "prompt_tokens": usage.get("promptTokenCount", 0),
+        "output_tokens": usage.get("candidatesTokenCount", 0),
+        "total_tokens": usage.get("totalTokenCount", 0),
+    }
+
+
+def _get_rest_session() -> aiohttp.ClientSession:
+    global _rest_session
+    if _rest_session is None or _rest_session.closed:
+        _rest_session = aiohttp.ClientSession()
+    return _rest_session
+
+
+async def _rest_generate(name: str, prompt: str, generation_config: dict) -> tuple[str, dict]:
+    """generateContent over REST at AI_API_BASE_URL; returns (text, usage)."""
+    async with _get_rest_session().post(
+        f"{AI_API_BASE_URL}/v1beta/models/{name}:generateContent",
+        params={"key": google_api_key or ""},
+        json=_rest_body(prompt, generation_config)
+    ) as resp:
+        data = await resp.json(content_type=None)
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status}: {(data or {}).get('error', {}).get('message', resp.reason)}")
+
+    text, usage = _rest_result(data)
+    return text, usage or _usage(None)
+
+
+async def _rest_stream(name: str, prompt: str, generation_config: dict):
+    """streamGenerateContent (server-sent events) at AI_API_BASE_URL; yields (text, usage or None)."""
+    async with _get_rest_session().post(
+        f"{AI_API_BASE_URL}/v1beta/models/{name}:streamGenerateContent",
+        params={"key": google_api_key or "", "alt": "sse"},
+        json=_rest_body(prompt, generation_config)
+    ) as resp:
+        if resp.status >= 400:
+            data = await resp.json(content_type=None)
+            raise RuntimeError(f"HTTP {resp.status}: {(data or {}).get('error', {}).get('message', resp.reason)}")
+        # Leaving this block early (the consumer stopped) drops the connection, ending the stream
+        async for line in resp.content:
+            line = line.strip()
+            if line.startswith(b"data:"):
+                yield _rest_result(json.loads(line[5:]))
+
+
+async def _sdk_stream(name: str, prompt: str, generation_config: dict):
+    """generate_content_async(stream=True); yields (text, usage or None) per chunk."""
+    response = await get_model(name).generate_content_async(
+        prompt, generation_config=generation_config or None, stream=True
+    )
+    chunks = aiter(response)
     try:
+        async for chunk in chunks:
+            yield _response_text(chunk), _usage(chunk) if getattr(chunk, "usage_metadata", None) else None
+    finally:
+        # Stopping early: close the response's iterator so no further chunks are read
+        await chunks.aclose()
 
 
+async def close_ai_session():
+    """Closes the REST session used with AI.api_base_url, if one was opened."""
+    if _rest_session is not None and not _rest_session.closed:
+        await _rest_session.close()
 
-        AIoutput = ""
-        return {"sucess": True, "AIoutput": AIoutput}
 
+async def ai_function(request: dict) -> dict:
+    """
+    One async model call.
+
+    request: prompt (required), model, temperature, max_output_tokens, response_schema (JSON output
+    constrained to that schema), timeout (seconds), stream and until. With stream=True the answer is
+    read as it is generated; until(text_so_far) returning True stops reading and cancels the rest.
+    Returns success, AIoutput, message, model, latency_ms, first_token_ms (streams), stopped_early,
+    usage {prompt_tokens, output_tokens, total_tokens} and timed_out. The timeout covers waiting for
+    a free slot (AI.max_concurrent_requests) as well as the call itself; cancelling the awaiting task
+    cancels the request and frees its slot.
+    """
+    global _ai_loop, _ai_semaphore
+    if _ai_loop is None or _ai_loop.is_closed():
+        # First call, or the loop recorded before was a finished asyncio.run()
+        _ai_loop, _ai_semaphore = asyncio.get_running_loop(), None
+
+    name = request.get("model") or model_name
+    result = {"success": False, "AIoutput": "", "message": None, "model": name, "latency_ms": 0,
+              "first_token_ms": None, "stopped_early": False, "usage": _usage(None), "timed_out": False}
+    if not request.get("prompt"):
+        result["message"] = "No prompt provided"
+        return result
+
+    generation_config = {k: request[k] for k in ("temperature", "max_output_tokens") if request.get(k) is not None}
+    if request.get("response_schema"):
+        generation_config.update(response_mime_type="application/json", response_schema=request["response_schema"])
+    timeout = request.get("timeout") or AI_REQUEST_TIMEOUT
+    until = request.get("until")
+
+    async def _consume(chunks):
+        text, usage = "", _usage(None)
+        try:
+            async for piece, chunk_usage in chunks:
+                if result["first_token_ms"] is None:
+                    result["first_token_ms"] = round((time.perf_counter() - start) * 1000)
+                text += piece
+                usage = chunk_usage or usage
+                if until is not None and until(text):
+                    result["stopped_early"] = True
+                    break
+        finally:
+            await chunks.aclose()
+        return text, usage
+
+    async def _call():
+        async with _semaphore():
+            if request.get("stream"):
+                stream = _rest_stream if AI_API_BASE_URL else _sdk_stream
+                return await _consume(stream(name, request["prompt"], generation_config))
+            if AI_API_BASE_URL:
+                return await _rest_generate(name, request["prompt"], generation_config)
+            response = await get_model(name).generate_content_async(
+                request["prompt"], generation_config=generation_config or None
+            )
+            return _response_text(response), _usage(response)
+
+    _ai_stats["requests"] += 1
+    _ai_stats["streamed"] += bool(request.get("stream"))
+    start = time.perf_counter()
+    try:
+        text, usage = await asyncio.wait_for(_call(), timeout)
+    except asyncio.TimeoutError:
+        _ai_stats["timeouts"] += 1
+        result.update(timed_out=True, message=f"AI request timed out after {timeout}s")
+        return result
     except Exception as e:
-        return {"success": False, "message": f"Error getting AI response: {e}"}
+        _ai_stats["errors"] += 1
+        result["message"] = f"Error getting AI response: {e}"
+        return result
+    finally:
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000)
 
-    model = [] or model_name
-    prompt = []
-    k_temp = [] or 0
+    _ai_stats["stopped_early"] += result["stopped_early"]
+    result.update(success=True, AIoutput=text, usage=usage)
+    return result
 
 
-    pass
+def ai_stats() -> dict:
+    """Counts of model requests since startup: total, errors, timeouts, streamed, stopped early."""
+    return dict(_ai_stats)
 
 
-def clean_triple_backticks(s: str) -> str:
-    s = (s or "").strip()
-    if s.startswith("```"):
-        parts = s.split("\n", 1)
-        s = parts[1] if len(parts) == 2 else s.lstrip("`")
-    if s.endswith("```"):
-        s = s.rsplit("```", 1)[0]
-    return s.strip()
+async def warm_up_model() -> dict:
+    """
+    Builds the model handle and sends a one-token request, so client and TLS setup
+    happen at startup instead of on the first filing.
+    """
+    _refresh_config()
+    if testing_mode:
+        return {"success": True, "message": "AI testing mode, skipped model warm-up"}
+    if not google_api_key or not model_name:
+        return {"success": False, "message": "AI model not configured, skipped warm-up"}
+    result = await ai_function({"prompt": "ping", "max_output_tokens": 1})
+    if not result["success"]:
+        return {"success": False, "message": f"AI model warm-up failed: {result['message']}"}
+    return {"success": True, "message": f"Warmed up AI model {model_name} ({result['latency_ms']}ms)"}
 
 
-def get_case_type(casetext: str) -> dict:
-    """Call the AI once and return dict: success, case_type, case_name, error."""
+def _response_text(response) -> str:
+    """Text of an SDK response; response.text raises when the candidate has no text parts."""
+    try:
+        return response.text
+    except (AttributeError, ValueError):
+        candidates = getattr(response, "candidates", None) or []
+        parts = getattr(getattr(candidates[0], "content", None), "parts", []) if candidates else []
+        return "".join(getattr(p, "text", "") for p in parts)
+
+
+# ---- Structured output ----
+# Classification requests ask for schema-constrained JSON, so the answer is always one of these
+# shapes and is parsed with a single json.loads; no backtick stripping or free-text fallbacks.
+
+# "SC" marks a Supreme Court petition; those are acknowledged internally instead of being docketed
+CASE_TYPES = ["Criminal", "Civil", "SC"]
+
+CLASSIFICATION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "case_type": {"type": "STRING", "enum": CASE_TYPES},
+        "case_name": {"type": "STRING"},
+    },
+    "required": ["case_type", "case_name"],
+}
+
+BATCH_CLASSIFICATION_SCHEMA = {"type": "ARRAY", "items": CLASSIFICATION_SCHEMA}
+
+# Output budget per classified document; the JSON object is ~20-30 tokens
+CLASSIFY_MAX_OUTPUT_TOKENS = config.get("AI", {}).get("classify_max_output_tokens", 64)
+
+
+def _classification(entry) -> dict | None:
+    """One schema object -> get_case_type result, or None if it doesn't match the schema."""
+    if not isinstance(entry, dict) or entry.get("case_type") not in CASE_TYPES or not entry.get("case_name"):
+        return None
+    return {"success": True, "case_type": entry["case_type"], "case_name": entry["case_name"], "error": None}
+
+
+def _json_value_end(text: str) -> int | None:
+    """Index just past the first complete top-level JSON object/array in text, or None if it isn't complete yet."""
+    depth, in_string, escaped = 0, False, False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def _parse_case_type(text: str) -> dict:
+    """CLASSIFICATION_SCHEMA output -> dict: success, case_type, case_name, error."""
+    end = _json_value_end(text)
+    try:
+        result = _classification(json.loads(text[:end] if end else text))
+    except ValueError:
+        result = None
+    if result is None:
+        return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": f"Response did not match the classification schema: {text[:200]}"}
+    return result
+
+
+# ---- Rule-based pre-classifier ----
+# Most filings use the court's templates: a "CRIMINAL COMPLAINT" / "CIVIL COMPLAINT" title and a
+# caption with the parties on their own lines around "v.". Those are classified here without
+# calling the model; anything else (or anything contradictory) scores low and goes to the model.
+
+PRECLASSIFY_THRESHOLD = config.get("AI", {}).get("rule_confidence_threshold", 0.9)
+
+_CRIMINAL_TITLE = re.compile(r"^\s*CRIMINAL\s+(?:COMPLAINT|INFORMATION|INDICTMENT|CHARGES?)\b", re.IGNORECASE | re.MULTILINE)
+_CIVIL_TITLE = re.compile(r"^\s*(?:CIVIL\s+(?:COMPLAINT|ACTION|SUIT)|COMPLAINT\s+FOR\b)", re.IGNORECASE | re.MULTILINE)
+# Petitions (e.g. for a writ of certiorari) may be Supreme Court filings; the model decides those
+_PETITION_TITLE = re.compile(r"^\s*PETITION\b", re.IGNORECASE | re.MULTILINE)
+# Party, optional comma, role line, "v." line, other party; e.g. "State of SimDemocracy,\n Prosecution,\nv.\nboho43 (id)"
+_CAPTION = re.compile(
+    r"^[ \t]*(?P<first>[^\n,]+?)[ \t]*,?[ \t]*\n\s*(?P<role>Prosecution|Plaintiffs?|Petitioners?)[ \t]*,?[ \t]*\n"
+    r"\s*vs?\.?[ \t]*\n\s*(?P<second>[^\n]+)",
+    re.IGNORECASE | re.MULTILINE
+)
+# Single-line caption, e.g. "State of SimDemocracy v. boho43"
+_INLINE_CAPTION = re.compile(r"^[ \t]*(?P<first>[^\n]+?)\s+vs?\.\s+(?P<second>[^\n]+)", re.IGNORECASE | re.MULTILINE)
+_STATE_PARTY = re.compile(r"^\s*(?:the\s+)?State\s+of\s+SimDemocracy\b|^\s*SimDemocracy\b|^\s*SD\s*$", re.IGNORECASE)
+_PARTY_NOISE = re.compile(r"\s*\(\s*\d{15,20}\s*\)|\s*<@!?\d+>|[\s,]*(?:Defendants?|Respondents?)[\s,]*$", re.IGNORECASE)
+
+_preclassify_lock = threading.Lock()
+_preclassify_stats = {"resolved": 0, "sent_to_model": 0}
+
+
+def _party_name(party: str) -> str:
+    """Caption party -> docket name: the state becomes "SD", Discord ids and role labels are dropped."""
+    party = _PARTY_NOISE.sub("", party).strip(" ,.\t")
+    return "SD" if _STATE_PARTY.match(party) else party
+
+
+def preclassify(casetext: str) -> dict:
+    """
+    Classifies a filing from its title and caption alone.
+    Returns case_type, case_name ("Unknown" when not found) and confidence in [0, 1].
+    """
+    head = (casetext or "")[:600]
+    if _PETITION_TITLE.search(head):
+        return {"case_type": "Unknown", "case_name": "Unknown", "confidence": 0.0}
+    criminal = civil = 0.0
+    if _CRIMINAL_TITLE.search(head):
+        criminal += 0.6
+    if _CIVIL_TITLE.search(head):
+        civil += 0.6
+
+    case_name = "Unknown"
+    caption = _CAPTION.search(head)
+    if caption:
+        role = caption.group("role").lower()
+        if role == "prosecution":
+            criminal += 0.4
+        else:
+            civil += 0.4
+        first, second = _party_name(caption.group("first")), _party_name(caption.group("second"))
+    else:
+        caption = _INLINE_CAPTION.search(head)
+        first = _party_name(caption.group("first")) if caption else ""
+        second = _party_name(caption.group("second")) if caption else ""
+
+    if first == "SD":
+        criminal += 0.3
+    if first and second:
+        case_name = f"{first} v. {second}"
+
+    if criminal and civil:
+        # Contradicting signals; only trust a clear margin
+        confidence = abs(criminal - civil) / 2
+    else:
+        confidence = min(1.0, criminal or civil)
+    if case_name == "Unknown":
+        confidence /= 2
+
+    case_type = "Unknown"
+    if criminal != civil:
+        case_type = "Criminal" if criminal > civil else "Civil"
+    return {"case_type": case_type, "case_name": case_name, "confidence": round(confidence, 2)}
+
+
+def preclassify_stats() -> dict:
+    """How many filings the rules resolved, and how many went to the model."""
+    with _preclassify_lock:
+        return dict(_preclassify_stats)
+
+
+# ---- Model calls, micro-batched ----
+
+BATCH_INSTRUCTIONS = (
+    "You are given several documents instead of one. Classify each of them as described above and "
+    "respond with only a JSON array containing one object with \"case_type\" and \"case_name\" per "
+    "document, in the same order as the documents."
+)
+
+
+def _single_prompt(casetext: str) -> str:
+    prompt = (promptbase) + "\n" + casetext + "\n" + "[DOCUMENT TEXT END]"
+    return prompt.replace("`", "")
+
+
+def _batch_prompt(casetexts: list) -> str:
+    parts = [promptbase, BATCH_INSTRUCTIONS]
+    for i, casetext in enumerate(casetexts, start=1):
+        parts.append(f"[DOCUMENT {i}]\n{casetext}\n[DOCUMENT {i} END]")
+    return "\n".join(parts).replace("`", "")
+
+
+def _parse_batch(text: str, count: int) -> list | None:
+    """
+    Model output for a batch prompt -> one result per document (None where an entry is unusable),
+    or None if the output isn't a JSON array of count entries.
+    """
+    try:
+        entries = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(entries, list) or len(entries) != count:
+        return None
+    return [_classification(entry) for entry in entries]
+
+
+async def _classify_one(casetext: str) -> dict:
+    result = await ai_function({
+        "prompt": _single_prompt(casetext),
+        "model": model_name,
+        "response_schema": CLASSIFICATION_SCHEMA,
+        "max_output_tokens": CLASSIFY_MAX_OUTPUT_TOKENS,
+        # Stop reading as soon as the JSON object is closed
+        "stream": STREAM_CLASSIFICATION,
+        "until": lambda text: _json_value_end(text) is not None,
+    })
+    if not result["success"]:
+        return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": result["message"]}
+    return _parse_case_type(result["AIoutput"])
+
+
+async def _classify_batch(casetexts: list) -> list | None:
+    result = await ai_function({
+        "prompt": _batch_prompt(casetexts),
+        "model": model_name,
+        "response_schema": BATCH_CLASSIFICATION_SCHEMA,
+        "max_output_tokens": CLASSIFY_MAX_OUTPUT_TOKENS * len(casetexts),
+    })
+    if not result["success"]:
+        return None
+    return _parse_batch(result["AIoutput"], len(casetexts))
+
+
+# Filings arriving while a classification is in flight share the next model request
+classification_batcher = ClassificationBatcher(
+    _classify_batch,
+    _classify_one,
+    window_seconds=config.get("AI", {}).get("batch_window_ms", 250) / 1000.0,
+    max_batch=config.get("AI", {}).get("max_batch_size", 8),
+)
+
+
+async def async_get_case_type(casetext: str) -> dict:
+    """
+    Classify a filing: rule-based preclassify() first, then the cache, then the model
+    (batched with other filings arriving at the same time).
+    Returns dict: success, case_type, case_name, error.
+    """
     if not isinstance(casetext, str) or not casetext.strip():
         return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": "Empty case text provided"}
 
+    _refresh_config()
+
     # Short-circuit deterministic testing mode
     if testing_mode:
         return {"success": True, "case_type": "Criminal", "case_name": "SD v. Ed", "error": None}
 
+    # Template filings don't need the model
+    rules = preclassify(casetext)
+    resolved = rules["confidence"] >= PRECLASSIFY_THRESHOLD and rules["case_type"] != "Unknown"
+    with _preclassify_lock:
+        _preclassify_stats["resolved" if resolved else "sent_to_model"] += 1
+    if resolved:
+        return {"success": True, "case_type": rules["case_type"], "case_name": rules["case_name"], "error": None}
+
     # Basic checks
     if not google_api_key:
         return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": "Missing GOOGLE_API_KEY environment variable"}
     if not model_name:
         return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": "Model name not set in config.yaml (AI.google_model)"}
 
-    # Prepare prompt (limit input length)
+    # Limit input length
     casetext = casetext[:600]
-    prompt = (promptbase) + "\n" + casetext + "\n" + "[DOCUMENT TEXT END]"
-    prompt = prompt.replace("`", "")
 
-    # Call the generative model once
-    try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-    except Exception as e:
-        return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": str(e)}
+    key = cache_key(promptbase, model_name, casetext)
+    cached = classification_cache.get(key)
+    if cached:
+        return {"success": True, "case_type": cached["case_type"], "case_name": cached["case_name"], "error": None}
 
-    # Extract text robustly from possible response shapes
-    text = ""
-    try:
-        if hasattr(response, "text") and response.text:
-            text = response.text
-        elif hasattr(response, "candidates") and response.candidates:
-            cand = response.candidates[0]
-            if hasattr(cand, "content"):
-                text = cand.content
-            elif isinstance(cand, dict) and cand.get("content"):
-                text = cand.get("content")
-        elif isinstance(response, dict):
-            # common keys to try
-            for key in ("content", "output", "data", "result"):
-                val = response.get(key)
-                if isinstance(val, str) and val:
-                    text = val
-                    break
-                if isinstance(val, list) and val:
-                    # flatten if list of dicts with "content"
-                    parts = []
-                    for item in val:
-                        if isinstance(item, dict) and item.get("content"):
-                            parts.append(item.get("content"))
-                    if parts:
-                        text = "\n".join(parts)
-                        break
-        else:
-            text = str(response)
-    except Exception:
-        text = str(response)
+    classification = await classification_batcher.classify(casetext)
+    if classification["success"]:
+        classification_cache.put(key, classification["case_type"], classification["case_name"])
+    return classification
 
-    text = clean_triple_backticks(text)
 
-    # Try JSON parse then simple key:value parse
-    try:
-        response_json = json.loads(text)
-        return {
-            "success": True,
-            "case_type": response_json.get("case_type", "Unknown"),
-            "case_name": response_json.get("case_name", "Unknown"),
-            "error": None,
-        }
-    except Exception:
-        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-        parsed = {}
-        for ln in lines:
-            if ":" in ln:
-                k, v = ln.split(":", 1)
-                parsed[k.strip().lower()] = v.strip()
-        case_type = parsed.get("case_type", parsed.get("type", "Unknown"))
-        case_name = parsed.get("case_name", parsed.get("name", "Unknown"))
-        if case_type == "Unknown" and case_name == "Unknown":
-            return {"success": False, "case_type": "Unknown", "case_name": "Unknown", "error": f"Unable to parse response. Raw: {text}"}
-        return {"success": True, "case_type": case_type, "case_name": case_name, "error": None}
+def get_case_type(casetext: str) -> dict:
+    """
+    Blocking async_get_case_type, for code outside the event loop (e.g. worker threads).
+    Runs on the bot's loop once it has made an AI call, so the async client stays on one loop.
+    """
+    if _ai_loop is not None and _ai_loop.is_running():
+        return asyncio.run_coroutine_threadsafe(async_get_case_type(casetext), _ai_loop).result()
+    return asyncio.run(async_get_case_type(casetext))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,776 @@
+"""
+Async Google Sheets/Docs API layer.
+
+The same operations and return shapes as services/google_requests.py (async_add_to_docket,
+async_edit_docket, async_get_all_cases, ...), but the REST calls go through one pooled
+aiohttp session on the event loop instead of googleapiclient on executor threads.
+In-flight requests are bounded by google.max_concurrent_requests in config.yaml.
+
+Credentials, the docket index and all row building/parsing are shared with google_requests.
+Writes go through mutation_queue, so writes issued close together share one batchUpdate.
+"""
+
+import asyncio
+import json
+import re
+from urllib.parse import quote
+
+import aiohttp
+
+from services.ai_requests import async_get_case_type
+from services.case_numbers import CaseNumberAllocator
+from services.rate_limiter import is_idempotent, request_kind, should_retry
+from services.sheet_metadata import METADATA_FIELDS
+from services.sheets_mutation_queue import SheetsMutationQueue, delete_row_request
+from services.google_requests import (
+    config,
+    clients,
+    GOOGLE_API_BASE_URL,
+    rate_limiter,
+    docket_index,
+    sheet_metadata,
+    SCOPES,
+    SCOPES_SHEETS,
+    SCOPES_DRIVE,
+    SHEET_ID,
+    SHEET_NAME,
+    APPEND_RANGE,
+    DATA_SHEET_RANGE,
+    TESTING_CASE_INFO,
+    normalize_key,
+    parse_docket_row,
+    _doc_id_from_link,
+    _extract_doc_text,
+    _record_doc_fetch,
+    DOC_TEXT_FIELDS,
+    DRIVE_REVISION_FIELDS,
+    doc_cache,
+    _revision_source,
+    _drive_revision,
+    _docs_revision,
+    _disable_drive_revisions,
+    CLASSIFY_CHARS,
+    _build_docket_row,
+    _appended_row_number,
+    _record_docket_append,
+    _case_filter,
+    _tag_row_request,
+    _retag_request,
+    _docket_row_patch,
+    _matched_case_row,
+    _matched_a1_values,
+    _updated_row,
+    _docket_cell,
+    _cell_holds,
+    _docket_row_range,
+    _row_is_case,
+    _docket_cell_updates,
+    _case_info_result,
+    _counter_cell,
+    _format_case_number,
+    _testing_result_enabled,
+    _case_info_from_classification,
+    _case_log_target,
+    _build_case_log_row,
+    _remember_case_log_row,
+    _case_log_range,
+    _case_log_next_row,
+    _grid_growth,
+    JUDGES_RANGE,
+    _judges_from_rows,
+)
+from utils.logger import log
+
+
+SHEETS_API = f"{GOOGLE_API_BASE_URL or 'https://sheets.googleapis.com'}/v4/spreadsheets"
+DOCS_API = f"{GOOGLE_API_BASE_URL or 'https://docs.googleapis.com'}/v1/documents"
+DRIVE_API = f"{GOOGLE_API_BASE_URL or 'https://www.googleapis.com'}/drive/v3/files"
+
+MAX_CONCURRENT_REQUESTS = config['google'].get('max_concurrent_requests', 8)
+REQUEST_TIMEOUT_SECONDS = config['google'].get('request_timeout_seconds', 30)
+WRITE_COALESCE_SECONDS = config['google'].get('write_coalesce_ms', 25) / 1000
+CASE_NUMBER_BLOCK_SIZE = config['google'].get('case_number_block_size', 1)
+
+
+class GoogleAPIError(Exception):
+    """A non-2xx response from a Google API."""
+
+    def __init__(self, status: int, message: str, retry_after: str = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+def _query(params: dict | None) -> list | None:
+    """aiohttp wants str query values; lists become repeated keys (e.g. ranges=...)."""
+    if not params:
+        return None
+    query = []
+    for key, value in params.items():
+        for v in (value if isinstance(value, (list, tuple)) else [value]):
+            query.append((key, str(v).lower() if isinstance(v, bool) else str(v)))
+    return query
+
+
+class AsyncGoogleClient:
+    """
+    Thin async client for the Sheets v4 and Docs v1 REST endpoints the bot uses.
+
+    One aiohttp session (and connection pool) per process, created lazily on the running loop.
+    A semaphore caps the number of in-flight requests; limiter (shared with the sync path)
+    meters them against the read/write quotas and retries 429s (and 5xx for idempotent requests).
+    """
+
+    def __init__(self, client_manager, limiter=None, max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+                 timeout: float = REQUEST_TIMEOUT_SECONDS):
+        self.clients = client_manager
+        self.limiter = limiter
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self._session = None
+        self._semaphore = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrent, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def _token(self, scopes: list[str]) -> str:
+        creds = self.clients.peek_credentials(scopes)
+        if creds is None:
+            # Loading or refreshing the token is blocking I/O; it happens about once an hour
+            creds = await asyncio.to_thread(self.clients.get_credentials, scopes)
+        return creds.token
+
+    async def request(self, method: str, url: str, scopes: list[str], params: dict = None, body: dict = None,
+                      sized: bool = False):
+        """
+        Sends one authorized request and returns the decoded JSON body, retrying as the limiter allows.
+        With sized=True returns (body, response size in bytes).
+        """
+        if self.limiter is None:
+            return await self._send(method, url, scopes, params, body, sized)
+
+        kind = request_kind(method, url)
+        idempotent = is_idempotent(method, url, body)
+        for attempt in range(self.limiter.max_retries + 1):
+            await self.limiter.acquire_async(kind)
+            try:
+                return await self._send(method, url, scopes, params, body, sized)
+            except GoogleAPIError as e:
+                if not should_retry(e.status, idempotent) or attempt == self.limiter.max_retries:
+                    if should_retry(e.status, idempotent):
+                        self.limiter.count_event("gave_up")
+                    raise
+                delay = self.limiter.backoff(attempt, e.retry_after)
+                log(f"Google API {kind} request failed with HTTP {e.status}; retrying in {delay:.1f}s")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # The request may have been applied; only send it again if that is harmless
+                if not idempotent:
+                    raise
+                if attempt == self.limiter.max_retries:
+                    self.limiter.count_event("gave_up")
+                    raise
+                delay = self.limiter.backoff(attempt)
+                log(f"Google API {kind} request failed ({e!r}); retrying in {delay:.1f}s")
+            self.limiter.count_event("retries")
+            await asyncio.sleep(delay)
+
+    async def _send(self, method: str, url: str, scopes: list[str], params: dict = None, body: dict = None,
+                    sized: bool = False):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async with self._semaphore:
+            token = await self._token(scopes)
+            session = self._get_session()
+            async with session.request(
+                method,
+                url,
+                params=_query(params),
+                json=body,
+                # No token with anonymous credentials (api_base_url pointing at a fake server)
+                headers={"Authorization": f"Bearer {token}"} if token else None
+            ) as resp:
+                raw = await resp.read()
+                try:
+                    data = json.loads(raw) if raw else {}
+                except ValueError:
+                    data = {}
+                if resp.status >= 400:
+                    message = (data or {}).get("error", {}).get("message", resp.reason) if isinstance(data, dict) else resp.reason
+                    raise GoogleAPIError(resp.status, message, resp.headers.get("Retry-After"))
+                return (data or {}, len(raw)) if sized else data or {}
+
+    # ---- Sheets ----
+    async def values_get(self, range_: str, **params) -> dict:
+        return await self.request("GET", f"{SHEETS_API}/{SHEET_ID}/values/{quote(range_, safe='')}", SCOPES_SHEETS, params=params)
+
+    async def values_batch_get_by_data_filter(self, data_filters: list, **options) -> dict:
+        return await self.request(
+            "POST", f"{SHEETS_API}/{SHEET_ID}/values:batchGetByDataFilter", SCOPES_SHEETS,
+            body=dict(options, dataFilters=data_filters)
+        )
+
+    async def values_batch_update_by_data_filter(self, data: list, value_input_option: str = "USER_ENTERED") -> dict:
+        return await self.request(
+            "POST", f"{SHEETS_API}/{SHEET_ID}/values:batchUpdateByDataFilter", SCOPES_SHEETS,
+            body={"valueInputOption": value_input_option, "data": data}
+        )
+
+    async def values_update(self, range_: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        return await self.request(
+            "PUT", f"{SHEETS_API}/{SHEET_ID}/values/{quote(range_, safe='')}", SCOPES_SHEETS,
+            params={"valueInputOption": value_input_option}, body={"values": values}
+        )
+
+    async def values_append(self, range_: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        return await self.request(
+            "POST", f"{SHEETS_API}/{SHEET_ID}/values/{quote(range_, safe='')}:append", SCOPES_SHEETS,
+            params={"valueInputOption": value_input_option}, body={"values": values}
+        )
+
+    async def spreadsheet_get(self, fields: str = None) -> dict:
+        return await self.request("GET", f"{SHEETS_API}/{SHEET_ID}", SCOPES_SHEETS, params={"fields": fields} if fields else None)
+
+    async def batch_update(self, requests: list) -> dict:
+        return await self.request("POST", f"{SHEETS_API}/{SHEET_ID}:batchUpdate", SCOPES_SHEETS, body={"requests": requests})
+
+    # ---- Docs ----
+    async def document_get(self, document_id: str, sized: bool = False, **params):
+        return await self.request("GET", f"{DOCS_API}/{document_id}", SCOPES, params=params, sized=sized)
+
+    # ---- Drive ----
+    async def drive_file_get(self, file_id: str, fields: str) -> dict:
+        return await self.request(
+            "GET", f"{DRIVE_API}/{file_id}", SCOPES_DRIVE,
+            params={"fields": fields, "supportsAllDrives": True}
+        )
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+# One client (and connection pool) for the whole bot
+google_api = AsyncGoogleClient(clients, limiter=rate_limiter)
+
+async def async_load_sheet_metadata() -> dict:
+    """Async load_sheet_metadata: fetches the tab properties into the shared sheet_metadata cache."""
+    try:
+        metadata = await google_api.spreadsheet_get(fields=METADATA_FIELDS)
+        sheet_metadata.load(metadata)
+        return {"success": True, "message": f"Loaded properties of {len(metadata.get('sheets', []))} tabs."}
+    except Exception as e:
+        return {"success": False, "message": f"Error loading sheet metadata: {e}"}
+
+
+async def _sheet_props(title: str) -> dict:
+    """Cached properties of a tab; raises ValueError if the tab doesn't exist."""
+    props = sheet_metadata.get(title)
+    if props is None:
+        await async_load_sheet_metadata()
+        props = sheet_metadata.get(title)
+    if props is None:
+        raise ValueError(f"Sheet '{title}' not found.")
+    return props
+
+
+async def _sheet_id(title: str) -> int:
+    """Numeric sheetId of a tab, from the metadata cache."""
+    return (await _sheet_props(title))["sheet_id"]
+
+
+# All bot writes go through this queue so bursts share one batchUpdate
+mutation_queue = SheetsMutationQueue(google_api, _sheet_id, window_seconds=WRITE_COALESCE_SECONDS)
+
+
+async def _read_counter(cell_ref: str):
+    await mutation_queue.wait_idle()
+    result = await google_api.values_get(cell_ref)
+    return result.get('values', [])[0][0]
+
+
+async def _write_counter(cell_ref: str, value: str):
+    await mutation_queue.submit(mutation_queue.set_counter(cell_ref, value))
+
+
+# Hands out case numbers from memory; the Data tab counters are written back behind it
+case_numbers = CaseNumberAllocator(_read_counter, _write_counter, block_size=CASE_NUMBER_BLOCK_SIZE)
+
+
+async def _read_docket_rows() -> list:
+    await mutation_queue.wait_idle()
+    result = await google_api.values_get(
+        DATA_SHEET_RANGE,
+        valueRenderOption="FORMULA",
+        dateTimeRenderOption="FORMATTED_STRING"
+    )
+    return result.get('values', [])
+
+
+async def _find_case(case_number: str) -> dict | None:
+    """Async counterpart of google_requests._find_case."""
+    rebuilt = False
+    if not docket_index.is_fresh():
+        docket_index.rebuild(await _read_docket_rows())
+        rebuilt = True
+
+    case = docket_index.get(case_number)
+    if case is None and not rebuilt:
+        docket_index.rebuild(await _read_docket_rows())
+        case = docket_index.get(case_number)
+    return case
+
+
+async def async_find_case_by_document(doc_id: str) -> dict | None:
+    """
+    The docket case filed with this document, or None. Answered from the docket index; the
+    docket is only read when the index is stale, not again on a miss (most documents are new).
+    """
+    if not docket_index.is_fresh():
+        docket_index.rebuild(await _read_docket_rows())
+    return docket_index.find_by_document(doc_id)
+
+
+async def _row_matches(row_number: int, case_number: str) -> bool:
+    """Async google_requests._row_matches: one-cell check that a row still holds case_number."""
+    await mutation_queue.wait_idle()
+    result = await google_api.values_get(_docket_cell("case_number", row_number), valueRenderOption="FORMULA")
+    return _cell_holds(result.get('values', []), case_number)
+
+
+async def _locate_row(case_number: str, row_number: int = None) -> int | None:
+    """Async google_requests._locate_row."""
+    if row_number is None:
+        if not docket_index.is_fresh():
+            docket_index.rebuild(await _read_docket_rows())
+            case = docket_index.get(case_number)
+            return case["row_number"] if case else None
+        case = docket_index.get(case_number)
+        row_number = case["row_number"] if case else None
+
+    if row_number is not None and await _row_matches(row_number, case_number):
+        return row_number
+
+    log(f"Docket row {row_number} does not hold '{case_number}', re-reading docket")
+    docket_index.rebuild(await _read_docket_rows())
+    case = docket_index.get(case_number)
+    return case["row_number"] if case else None
+
+
+async def _doc_revision(document_id: str) -> str | None:
+    """Async google_requests._doc_revision."""
+    if _revision_source["drive"]:
+        try:
+            return _drive_revision(await google_api.drive_file_get(document_id, DRIVE_REVISION_FIELDS))
+        except GoogleAPIError as e:
+            if e.status not in (401, 403):
+                raise
+            _disable_drive_revisions(e)
+
+    return _docs_revision(await google_api.document_get(document_id, fields="revisionId"))
+
+
+async def async_get_gdoc_text(gdoc_link: str, max_chars: int = None):
+    """Async get_gdoc_text: returns (success, text or error message)."""
+    try:
+        document_id = _doc_id_from_link(gdoc_link)
+        if not document_id:
+            return False, "Invalid Google Docs link format."
+
+        try:
+            revision = await _doc_revision(document_id)
+        except Exception as e:
+            log(f"Could not check revision of doc {document_id}: {e}")
+            revision = None
+        if revision:
+            cached = doc_cache.get(document_id, revision, max_chars)
+            if cached is not None:
+                return True, cached
+
+        document, size = await google_api.document_get(document_id, sized=True, fields=DOC_TEXT_FIELDS)
+        text = _extract_doc_text(document, max_chars)
+        _record_doc_fetch(document_id, size, len(text))
+        if revision:
+            doc_cache.put(document_id, revision, text, complete=max_chars is None or len(text) < max_chars)
+        return True, text
+
+    except GoogleAPIError as error:
+        return False, f"An HTTP error occurred: {error}"
+    except Exception as e:
+        return False, f"An unexpected error occurred: {e}"
+
+
+async def async_allocate_case_number(case_type: str) -> str:
+    """
+    Takes the next case number of a case type, e.g. "Crim 40", and moves the counter past it.
+    No two callers get the same number. Raises Exception for case types without a counter.
+    """
+    try:
+        prefix, cell_ref = _counter_cell(case_type)
+        number = await case_numbers.allocate(cell_ref)
+    except Exception as e:
+        raise Exception(f"Error getting available case number: {e}")
+
+    return _format_case_number(prefix, case_numbers.format(cell_ref, number))
+
+
+async def async_preview_case_number(case_type: str, offset: int = 0) -> str:
+    """
+    The case number async_allocate_case_number would hand out now (or offset allocations later),
+    e.g. "Crim 40"; nothing is taken.
+    """
+    try:
+        prefix, cell_ref = _counter_cell(case_type)
+        number = await case_numbers.peek(cell_ref) + offset
+    except Exception as e:
+        raise Exception(f"Error getting available case number: {e}")
+
+    return _format_case_number(prefix, case_numbers.format(cell_ref, number))
+
+
+def _number_counter(case_type: str, case_number: str) -> tuple[str, int] | None:
+    """
+    (counter cell, number) of a case number like "Crim 40": the counter of its prefix, else of
+    case_type. None if the number has no digits or there is no such counter (e.g. "SC").
+    """
+    m = re.match(r'^\s*([A-Za-z]*)\D*?(\d+)\s*$', case_number or "")
+    if not m:
+        return None
+    for kind in (m.group(1), case_type):
+        try:
+            return _counter_cell(kind)[1], int(m.group(2))
+        except ValueError:
+            continue
+    return None
+
+
+async def async_claim_case_number(case_type: str, case_number: str) -> bool:
+    """
+    Moves the counter past a case number typed in by a reviewer, so it is never allocated again.
+    Returns whether the counter moved (False if the number is already behind it).
+    """
+    counter = _number_counter(case_type, case_number)
+    if counter is None:
+        return False
+    try:
+        return await case_numbers.claim(*counter)
+    except Exception as e:
+        raise Exception(f"Error taking case number '{case_number}': {e}")
+
+
+async def async_confirm_case_number(case_info: dict) -> bool:
+    """
+    Takes the case number of an accepted filing: a provisional number (shown during review) is
+    replaced by a newly allocated one, and a number typed in by the reviewer moves the counter
+    past it. Returns whether the counter moved, i.e. whether the number should be released if
+    the filing isn't entered after all.
+    """
+    if case_info.get("provisional_number"):
+        case_info["case_number"] = await async_allocate_case_number(case_info["case_type"])
+        case_info["provisional_number"] = False
+        return True
+    return await async_claim_case_number(case_info.get("case_type", ""), case_info.get("case_number"))
+
+
+async def async_release_case_number(case_type: str, case_number: str) -> bool:
+    """Gives back an allocated case number that won't be used, if it is still the latest one."""
+    try:
+        counter = _number_counter(case_type, case_number)
+        if counter is None:
+            return False
+        return await case_numbers.release(*counter)
+    except Exception as e:
+        log(f"Could not release case number '{case_number}': {e}")
+        return False
+
+
+# The three steps of async_get_gdoccase_info, also run one by one as submission pipeline stages
+
+async def async_fetch_case_text(link: str):
+    """Stage 1: (success, the first CLASSIFY_CHARS characters of the doc or an error message)."""
+    return await async_get_gdoc_text(link, max_chars=CLASSIFY_CHARS)
+
+
+async def async_classify_case_text(gdoc_text: str) -> dict:
+    """Stage 2: case info without a number yet: success, case_name, case_number (None), case_type, errors."""
+    case_type_result = await async_get_case_type(gdoc_text[:CLASSIFY_CHARS])
+    case_type, case_name, errors = _case_info_from_classification(case_type_result)
+    return {
+        "success": len(errors) == 0,
+        "case_name": case_name,
+        "case_number": None,
+        "case_type": case_type,
+        "errors": errors
+    }
+
+
+async def async_number_case(case_info: dict, offset: int = 0) -> dict:
+    """
+    Stage 3: fills in the next case number of case_info's type as a provisional number for the
+    review. The number is only taken from the counter when the filing is accepted
+    (async_confirm_case_number), so denied filings never use up a number.
+    """
+    case_info["case_number"] = await async_preview_case_number(case_info["case_type"], offset)
+    case_info["provisional_number"] = True
+    return case_info
+
+
+async def async_get_gdoccase_info(link: str) -> dict:
+    """Async get_gdoccase_info: success, case_name, case_number, case_type, errors."""
+    if _testing_result_enabled():
+        return dict(TESTING_CASE_INFO)
+
+    success, gdoc_text = await async_fetch_case_text(link)
+    if not success:
+        return {
+            "success": False,
+            "case_name": None,
+            "case_number": None,
+            "case_type": None,
+            "errors": [gdoc_text]
+        }
+
+    return await async_number_case(await async_classify_case_text(gdoc_text))
+
+
+async def async_add_to_docket(case_info: dict) -> dict:
+    """
+    Async add_to_docket. values.append places the row below the sheet's last data row itself,
+    so rows typed in by hand since the docket index was built are never overwritten; the index
+    is updated from the reported row.
+    """
+    try:
+        # The tag is written at the appended row, so no delete may shift it in between
+        async with mutation_queue.row_lock(SHEET_NAME):
+            await mutation_queue.wait_idle()
+            result = await google_api.values_append(APPEND_RANGE, [_build_docket_row(case_info)])
+            row_number = _appended_row_number(result)
+            _record_docket_append(case_info, row_number)
+            if row_number and case_info.get("case_number"):
+                try:
+                    await mutation_queue.submit(mutation_queue.request(
+                        _tag_row_request(await _sheet_id(SHEET_NAME), row_number, case_info["case_number"])
+                    ))
+                except Exception as e:
+                    log(f"Failed to tag docket row {row_number} with '{case_info['case_number']}': {e}")
+        return {"success": True, "message": f"Case '{case_info.get('case_name', '')}' added to docket."}
+    except Exception as e:
+        docket_index.invalidate()
+        sheet_metadata.invalidate()
+        return {"success": False, "message": f"Error adding to docket: {e}"}
+
+
+async def async_edit_docket(case_number: str, changes: dict, row_number: int = None) -> dict:
+    """Async edit_docket: writes only the changed cells, through the row's metadata tag when it has one."""
+    try:
+        patch, applied = _docket_row_patch(changes)
+        if not applied:
+            return {"success": True, "message": f"Nothing to update for case '{case_number}'."}
+
+        await mutation_queue.wait_idle()
+        result = await google_api.values_batch_update_by_data_filter(
+            [{"dataFilter": _case_filter(case_number), "values": [patch]}]
+        )
+
+        if _updated_row(result) is None:
+            # Untagged row: locate it, write the cells and tag it in one batch
+            async with mutation_queue.row_lock(SHEET_NAME):
+                row_index_to_update = await _locate_row(case_number, row_number)
+                if row_index_to_update is None:
+                    return {"success": False, "message": f"Case with number '{case_number}' not found."}
+
+                cells, _ = _docket_cell_updates(row_index_to_update, changes)
+                tag = _tag_row_request(await _sheet_id(SHEET_NAME), row_index_to_update, applied.get("case_number") or case_number)
+                await mutation_queue.submit(
+                    *[mutation_queue.update_cells(cell, [[value]]) for cell, value in cells],
+                    mutation_queue.request(tag),
+                )
+        elif "case_number" in applied:
+            try:
+                await mutation_queue.submit(mutation_queue.request(_retag_request(case_number, applied["case_number"])))
+            except Exception as e:
+                log(f"Failed to update the metadata tag of '{case_number}': {e}")
+
+        if not docket_index.update(case_number, applied):
+            docket_index.invalidate()
+
+        return {"success": True, "message": f"Case '{case_number}' successfully updated."}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error updating docket: {e}"}
+
+
+async def async_get_case_info_from_number(case_number: str) -> dict:
+    """Async get_case_info_from_number."""
+    try:
+        if not docket_index.is_fresh():
+            await mutation_queue.wait_idle()
+            result = await google_api.values_batch_get_by_data_filter(
+                [_case_filter(case_number)],
+                valueRenderOption="FORMULA",
+                dateTimeRenderOption="FORMATTED_STRING"
+            )
+            matched = _matched_case_row(result.get("valueRanges", []))
+            if matched:
+                return _case_info_result(parse_docket_row(matched[1], matched[0]))
+
+        case = await _find_case(case_number)
+        if case is None:
+            return {"success": False, "message": f"Case number '{case_number}' not found."}
+        return _case_info_result(case)
+    except Exception as e:
+        return {"success": False, "message": f"Error reading sheet: {e}"}
+
+
+async def async_get_all_cases(refresh: bool = True) -> dict:
+    """Async get_all_cases."""
+    try:
+        if refresh or not docket_index.is_fresh():
+            docket_index.rebuild(await _read_docket_rows())
+
+        cases = docket_index.all_cases()
+        if not cases:
+            return {"success": True, "cases": [], "message": "No data found in the sheet."}
+        return {"success": True, "cases": cases}
+
+    except Exception as e:
+        return {"success": False, "cases": [], "message": f"Error retrieving cases: {e}"}
+
+
+async def async_get_judges() -> dict:
+    """Async get_judges(refresh=False): the Valid judges, without rewriting judge_data.json or config.yaml."""
+    try:
+        result = await google_api.values_get(JUDGES_RANGE)
+        return {"success": True, "judges": _judges_from_rows(result.get("values", []))}
+    except Exception as e:
+        return {"success": False, "judges": [], "message": f"Error retrieving judges: {e}"}
+
+
+async def async_delete_case_row(case_name: str, case_number: str) -> dict:
+    """Async delete_case_row: deletes the row only if it holds both case_name and case_number."""
+    try:
+        try:
+            pending_cases_id = await _sheet_id(SHEET_NAME)
+        except ValueError:
+            return {"success": False, "message": f"Sheet '{SHEET_NAME}' not found."}
+
+        # The row is located and deleted under the tab's row lock, so no other write shifts it in between
+        async with mutation_queue.row_lock(SHEET_NAME):
+            await mutation_queue.wait_idle()
+            row_index_to_delete = -1
+            result = await google_api.values_batch_get_by_data_filter([_case_filter(case_number)], valueRenderOption="FORMULA")
+            matched = _matched_case_row(result.get("valueRanges", []))
+            if matched and _row_is_case(matched[1], matched[0], case_name, case_number):
+                row_index_to_delete = matched[0] - 1
+
+            for attempt in range(0 if row_index_to_delete != -1 else 2):
+                case = await _find_case(case_number)
+                if case is None or normalize_key(case["case_name"]) != normalize_key(case_name):
+                    break
+                row = (await google_api.values_get(_docket_row_range(case["row_number"]), valueRenderOption="FORMULA")).get("values", [[]])
+                if _row_is_case(row[0] if row else [], case["row_number"], case_name, case_number):
+                    row_index_to_delete = case["row_number"] - 1
+                    break
+                log(f"Docket row {case['row_number']} no longer holds '{case_number}', re-reading docket")
+                docket_index.invalidate()
+
+            if row_index_to_delete == -1:
+                return {
+                    "success": False,
+                    "message": f"Case with name '{case_name}' and number '{case_number}' not found."
+                }
+
+            await mutation_queue.submit(mutation_queue.request(delete_row_request(pending_cases_id, row_index_to_delete + 1)))
+
+            if not docket_index.remove(case_number):
+                docket_index.invalidate()
+
+        return {"success": True, "message": f"Deleted case with name '{case_name}' and number '{case_number}'."}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error deleting case: {e}"}
+
+
+async def async_finish_case(case_info: dict) -> dict:
+    """
+    Async finish_case: appends the case to its case log and removes it from Pending Cases
+    in one batchUpdate.
+    """
+    try:
+        case_number = (case_info.get("case_number") or "").strip()
+        if not case_number:
+            return {"success": False, "message": "Missing case_number in case_info."}
+
+        target = _case_log_target(case_number)
+        if not target.get("success"):
+            return target
+        sheet_name, start_col, start_row = target["sheet_name"], target["start_col"], target["start_row"]
+
+        try:
+            pending_cases_id = await _sheet_id(SHEET_NAME)
+            case_log = await _sheet_props(sheet_name)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+
+        # Both rows are located and written under their tabs' row locks, so another finish or
+        # delete can't take the same case-log row or shift the docket row in between
+        async with mutation_queue.row_lock(SHEET_NAME, sheet_name):
+            await mutation_queue.wait_idle()
+            log_range, cached_log_row = _case_log_range(target)
+            try:
+                result = await google_api.values_batch_get_by_data_filter(
+                    [_case_filter(case_number), {"a1Range": log_range}],
+                    valueRenderOption="FORMULA",
+                    dateTimeRenderOption="FORMATTED_STRING"
+                )
+            except Exception as e:
+                return {"success": False, "message": f"Failed to read docket and case log tab: {e}"}
+            value_ranges = result.get("valueRanges", [])
+            matched = _matched_case_row(value_ranges)
+            log_row = _case_log_next_row(target, cached_log_row, _matched_a1_values(value_ranges, log_range))
+
+            if matched:
+                docket_row = matched[0]
+                lookup = _case_info_result(parse_docket_row(matched[1], docket_row))
+            else:
+                # Untagged row: find it through the docket index
+                docket_row = await _locate_row(case_number)
+                case = docket_index.get(case_number)
+                lookup = _case_info_result(case) if case else {"success": False}
+            if docket_row is None:
+                return {"success": False, "message": f"Failed to delete case from Pending Cases: Case number '{case_number}' not found."}
+
+            if log_row is None:
+                result = await google_api.values_get(f"{sheet_name}!{start_col}{start_row}:{start_col}")
+                log_row = start_row + len(result.get('values', []))
+
+            new_row = _build_case_log_row(case_info, lookup)
+
+            try:
+                await mutation_queue.submit(
+                    *[mutation_queue.request(r) for r in _grid_growth(sheet_name, case_log, log_row)],
+                    mutation_queue.update_cells(f"{sheet_name}!{start_col}{log_row}", [new_row]),
+                    mutation_queue.request(delete_row_request(pending_cases_id, docket_row)),
+                )
+            except Exception:
+                docket_index.invalidate()
+                sheet_metadata.invalidate()
+                _remember_case_log_row(target, None)
+                raise
+
+            # Update the caches only once the batch is applied
+            if not docket_index.remove(case_number):
+                docket_index.invalidate()
+            _remember_case_log_row(target, log_row + 1)
+
+        return {"success": True, "message": "Case finished and appended to case log.", "appended_row": new_row}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error finishing case: {e}"}
@@ -0,0 +1,190 @@
+"""
+In-process case-number allocator.
+
+The Data tab counters (google.last_criminalcase_number / lasts_civilcase_number) hold the next
+free number of each case type. The allocator reads them once, then hands numbers out from memory
+under an asyncio lock, so concurrent submissions never get the same number and allocation
+doesn't wait on the sheet.
+
+Numbers are formatted the way the counter cell displays them: zero-padded only if the cell's
+text is ("040"), plain otherwise ("40").
+
+With block_size 1 the counter is written back in the background after every allocation.
+With a larger block_size the counter is moved a whole block ahead before the first number of
+the block is handed out; numbers left in a block when the bot stops are skipped.
+"""
+
+import asyncio
+
+from utils.logger import log
+
+
+class CaseNumberAllocator:
+    """
+    allocate(counter_cell) -> next number; release(counter_cell, number) gives back the last one;
+    peek(counter_cell) -> the number allocate() would return now, without taking it;
+    claim(counter_cell, number) moves the counter past a number typed in by hand.
+
+    read_counter(cell) is an async callable returning the cell's current value;
+    write_counter(cell, value) is an async callable writing it.
+    """
+
+    def __init__(self, read_counter, write_counter, block_size: int = 1):
+        self.read_counter = read_counter
+        self.write_counter = write_counter
+        self.block_size = max(1, int(block_size))
+        self._lock = None
+        self._next = {}         # counter cell -> next number to hand out
+        self._reserved = {}     # counter cell -> value the sheet counter has been (or is being) set to
+        self._width = {}        # counter cell -> digits the cell shows (zero-padded), 1 if not padded
+        self._stale = set()     # counters to re-read, e.g. after a failed write-back
+        self._writes = set()    # background write-back tasks
+        self._stats = {"allocations": 0, "claims": 0, "releases": 0, "loads": 0, "writes": 0, "write_failures": 0}
+
+    async def _load(self, cell: str):
+        value = await self.read_counter(cell)
+        number = parse_counter(value)
+        self._width[cell] = counter_width(value)
+        # Never go backwards if the sheet is behind what was already handed out
+        self._next[cell] = max(number, self._next.get(cell, 0))
+        self._reserved[cell] = max(number, self._reserved.get(cell, 0))
+        self._stale.discard(cell)
+        self._stats["loads"] += 1
+
+    async def peek(self, cell: str) -> int:
+        """The next number of this counter, for display; it is not reserved."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if cell not in self._next or cell in self._stale:
+                await self._load(cell)
+            return self._next[cell]
+
+    def format(self, cell: str, number: int) -> str:
+        """number as the counter cell shows it."""
+        return format_counter(number, self._width.get(cell, 1))
+
+    async def allocate(self, cell: str) -> int:
+        """Returns a number no other caller has received from this counter."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if cell not in self._next or cell in self._stale:
+                await self._load(cell)
+
+            number = self._next[cell]
+            self._next[cell] = number + 1
+
+            if self.block_size == 1:
+                self._reserved[cell] = number + 1
+                self._write_back(cell, number + 1)
+            elif number >= self._reserved[cell]:
+                # Out of reserved numbers: claim the next block on the sheet before using it
+                self._reserved[cell] = number + self.block_size
+                try:
+                    await self.write_counter(cell, self.format(cell, self._reserved[cell]))
+                    self._stats["writes"] += 1
+                except Exception:
+                    self._next[cell] = number
+                    self._stale.add(cell)
+                    self._stats["write_failures"] += 1
+                    raise
+
+            self._stats["allocations"] += 1
+            return number
+
+    async def claim(self, cell: str, number: int) -> bool:
+        """
+        Marks a number chosen by hand (not handed out by allocate()) as used, moving the counter
+        past it so allocate() never returns it. Returns whether the counter moved.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if cell not in self._next or cell in self._stale:
+                await self._load(cell)
+            if number < self._next[cell]:
+                return False
+
+            self._next[cell] = number + 1
+            if self.block_size == 1:
+                self._reserved[cell] = number + 1
+                self._write_back(cell, number + 1)
+            elif number >= self._reserved[cell]:
+                # Past the reserved block: the next allocate() claims a new block from here
+                previous = self._reserved[cell]
+                self._reserved[cell] = number + 1
+                try:
+                    await self.write_counter(cell, self.format(cell, number + 1))
+                    self._stats["writes"] += 1
+                except Exception:
+                    self._reserved[cell] = previous
+                    self._stale.add(cell)
+                    self._stats["write_failures"] += 1
+                    raise
+
+            self._stats["claims"] += 1
+            return True
+
+    async def release(self, cell: str, number: int) -> bool:
+        """
+        Gives back a number nobody used (e.g. a denied submission).
+        Only the most recently allocated number can be given back; returns whether it was.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._next.get(cell) != number + 1:
+                return False
+            self._next[cell] = number
+            if self.block_size == 1:
+                self._reserved[cell] = number
+                self._write_back(cell, number)
+            self._stats["releases"] += 1
+            return True
+
+    def _write_back(self, cell: str, value: int):
+        task = asyncio.create_task(self._write(cell, value))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, cell: str, value: int):
+        try:
+            await self.write_counter(cell, self.format(cell, value))
+            self._stats["writes"] += 1
+        except Exception as e:
+            # Re-read before the next allocation; the local counter never moves backwards
+            self._stale.add(cell)
+            self._stats["write_failures"] += 1
+            log(f"Failed to write case number counter {cell} = {value}: {e}")
+
+    async def flush(self):
+        """Waits for pending background counter writes."""
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return dict(self._stats, counters={cell: n for cell, n in self._next.items()})
+
+
+def parse_counter(value) -> int:
+    """Counter cell value ("193", "040", "Crim 193") -> 193."""
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    if not digits:
+        raise ValueError(f"Could not parse case number counter '{value}'")
+    return int(digits)
+
+
+def counter_width(value) -> int:
+    """Zero-padded width of a counter cell's text ("040" -> 3), or 1 if it isn't padded ("40")."""
+    digits = "".join(ch for ch in str(value) if ch.isdigit())
+    return len(digits) if len(digits) > 1 and digits.startswith("0") else 1
+
+
+def format_counter(number: int, width: int = 1) -> str:
+    """Counter value padded to width digits, e.g. (40, 3) -> "040", (40, 1) -> "40"."""
+    return f"{number:0{width}d}"
@@ -0,0 +1,119 @@
+"""
+Micro-batching of AI case classifications.
+
+Filings tend to arrive in bursts around deadlines. Instead of one model request per filing,
+texts are classified together with one request whose answer is a JSON array, and each caller
+gets its own element back. If the batch request fails or its answer can't be matched up, the
+affected texts are classified one by one.
+
+Most filings arrive alone, so a text is sent straight away when no request is in flight. Only
+texts arriving while one is in flight are collected, for window_seconds, into the next batch.
+"""
+
+import asyncio
+
+from utils.logger import log
+
+
+class ClassificationBatcher:
+    """
+    classify(casetext) -> {"success", "case_type", "case_name", "error"}.
+
+    classify_batch(texts) is an async callable returning a list with one result (or None, if that
+    entry couldn't be parsed) per text, or None if the whole batch failed; classify_one(text) is
+    an async callable returning a single result.
+    """
+
+    def __init__(self, classify_batch, classify_one, window_seconds: float = 0.25, max_batch: int = 8):
+        self.classify_batch = classify_batch
+        self.classify_one = classify_one
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, int(max_batch))
+        self._pending = []      # list of (casetext, future)
+        self._flush_task = None
+        self._in_flight = 0     # model requests being sent
+        self._flushes = set()   # flushes started early by a full batch
+        self._stats = {"submissions": 0, "batches": 0, "batched_texts": 0, "single": 0, "fallbacks": 0}
+
+    async def classify(self, casetext: str) -> dict:
+        """Queues casetext for the next batch and waits for its classification."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((casetext, future))
+        self._stats["submissions"] += 1
+
+        if len(self._pending) >= self.max_batch:
+            # Full batch: don't wait for the window
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+                self._flush_task = None
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._flush_task is None:
+            # Nothing in flight: send now; otherwise collect what arrives during the window
+            delay = self.window_seconds if self._in_flight else 0
+            self._flush_task = asyncio.create_task(self._flush_after_window(delay))
+
+        return await future
+
+    async def _flush_after_window(self, delay: float):
+        await asyncio.sleep(delay)
+        # Texts arriving while this batch is in flight start the next window
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Classifies everything queued so far."""
+        pending, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window(self.window_seconds))
+        if not pending:
+            return
+
+        self._in_flight += 1
+        try:
+            await self._send(pending)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+
+    async def _send(self, pending: list):
+        if len(pending) == 1:
+            self._stats["single"] += 1
+            text, future = pending[0]
+            result = await self.classify_one(text)
+            if not future.done():
+                future.set_result(result)
+            return
+
+        results = await self.classify_batch([text for text, _ in pending])
+        self._stats["batches"] += 1
+        self._stats["batched_texts"] += len(pending)
+        if results is None or len(results) != len(pending):
+            log(f"Batched classification of {len(pending)} filings failed; classifying them one by one")
+            results = [None] * len(pending)
+
+        # Only the entries the batch didn't answer go out individually
+        retry = [(text, future) for (text, future), result in zip(pending, results) if result is None]
+        for (_, future), result in zip(pending, results):
+            if result is not None and not future.done():
+                future.set_result(result)
+
+        async def _one(text, future):
+            self._stats["fallbacks"] += 1
+            try:
+                result = await self.classify_one(text)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+        await asyncio.gather(*(_one(text, future) for text, future in retry))
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=len(self._pending))
@@ -0,0 +1,132 @@
+"""
+Persistent cache of AI case classifications.
+
+get_case_type only ever sees the first CLASSIFY_CHARS characters of a filing, so resubmissions,
+;add retries and test runs send the model exactly the same prompt again. Results are stored in a
+small SQLite file keyed by a hash of (prompt template, model name, case text), so a changed prompt
+or model never returns an old answer, and the cache survives restarts.
+
+All rows are also held in memory; lookups never touch the disk. Hits only update the in-memory
+last-used time, which is written back with the next put()/flush(). Past max_entries, the least
+recently used rows are evicted.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(prompt_template: str, model: str, casetext: str) -> str:
+    """sha256 of the three inputs that decide the model's answer."""
+    digest = hashlib.sha256()
+    for part in (prompt_template, model, casetext):
+        data = (part or "").encode("utf-8")
+        # Length-prefixed so ("ab", "c") and ("a", "bc") don't collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    cache_key -> {"case_type", "case_name"}. Thread-safe (get_case_type runs in worker threads).
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}      # key -> {"case_type", "case_name", "last_used"}
+        self._touched = set()   # keys whose last_used hasn't been written back yet
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            " key TEXT PRIMARY KEY,"
+            " case_type TEXT NOT NULL,"
+            " case_name TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        for key, case_type, case_name, last_used in self._db.execute(
+            "SELECT key, case_type, case_name, last_used FROM classifications"
+        ):
+            self._entries[key] = {"case_type": case_type, "case_name": case_name, "last_used": last_used}
+        self._evict()
+
+    def get(self, key: str) -> dict | None:
+        """Returns {"case_type", "case_name"} for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            entry["last_used"] = time.time()
+            self._touched.add(key)
+            self._stats["hits"] += 1
+            return {"case_type": entry["case_type"], "case_name": entry["case_name"]}
+
+    def put(self, key: str, case_type: str, case_name: str):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {"case_type": case_type, "case_name": case_name, "last_used": now}
+            self._touched.discard(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO classifications (key, case_type, case_name, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, case_type, case_name, now, now)
+            )
+            self._stats["stores"] += 1
+            self._write_touched()
+            self._evict()
+            self._db.commit()
+
+    def flush(self):
+        """Writes pending last-used times to disk."""
+        with self._lock:
+            self._write_touched()
+            self._db.commit()
+
+    def purge(self) -> int:
+        """Deletes every cached classification; returns how many there were."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM classifications")
+            self._db.commit()
+            return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), path=self.path)
+
+    # Both called with the lock held; the caller commits
+    def _write_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE classifications SET last_used = ? WHERE key = ?",
+                [(self._entries[key]["last_used"], key) for key in self._touched if key in self._entries]
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])[:overflow]
+        for key in oldest:
+            del self._entries[key]
+            self._touched.discard(key)
+        self._db.executemany("DELETE FROM classifications WHERE key = ?", [(key,) for key in oldest])
+        self._db.commit()
+        self._stats["evictions"] += len(oldest)
@@ -0,0 +1,77 @@
+"""
+LRU cache of extracted Google Doc text, keyed by document id and revision.
+
+A filing is often read more than once (on_message, ;add, re-reviews after an edit). Before
+downloading a doc, callers ask Drive/Docs for its current revision, which is a tiny response,
+and only download again when that revision isn't cached. Entries also expire after
+max_age_seconds, so a revision marker that failed to change can't pin old text forever.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class DocTextCache:
+    """
+    (document id, revision) -> extracted text. Thread-safe.
+
+    Text cut short by max_chars is stored as incomplete; it still answers requests for
+    up to as many characters as it holds.
+    """
+
+    def __init__(self, max_entries: int = 128, max_age_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # document id -> {"revision", "text", "complete", "stored_at"}
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, document_id: str, revision: str, max_chars: int = None) -> str | None:
+        """Returns the cached text for this revision if it covers max_chars characters, else None."""
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            expired = time.monotonic() - entry["stored_at"] > self.max_age_seconds
+            if entry["revision"] != revision or expired:
+                del self._entries[document_id]
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            text = entry["text"]
+            if not entry["complete"] and (max_chars is None or len(text) < max_chars):
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(document_id)
+            self._stats["hits"] += 1
+            return text if max_chars is None else text[:max_chars]
+
+    def put(self, document_id: str, revision: str, text: str, complete: bool):
+        with self._lock:
+            self._entries[document_id] = {
+                "revision": revision,
+                "text": text,
+                "complete": complete,
+                "stored_at": time.monotonic(),
+            }
+            self._entries.move_to_end(document_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, document_id: str = None):
+        """Drops one document, or everything."""
+        with self._lock:
+            if document_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(document_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
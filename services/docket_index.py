@@ -0,0 +1,215 @@
+"""
+In-memory index of the Pending Cases docket.
+
+Built from one read of the docket range, it maps a normalized case number (and case name, and
+the document id of the filing link) to the sheet row and the parsed row, so finding one case
+doesn't download the whole sheet.
+Writes made by the bot update it in place. It goes stale after a TTL, or straight away
+when a caller detects that the sheet was edited by someone else (invalidate()).
+"""
+
+import re
+import threading
+import time
+
+
+# Docket columns, in add_to_docket order
+DOCKET_COLUMNS = {
+    "judge": 0,
+    "case_status": 1,
+    "case_name": 2,
+    "case_number": 3,
+    "filing_date": 4,
+    "filing_link": 5,
+}
+
+_WHITESPACE = re.compile(r'\s+')
+_HYPERLINK_URL_DQ = re.compile(r'HYPERLINK\s*\(\s*"([^"]+)"', re.IGNORECASE)
+_HYPERLINK_URL_SQ = re.compile(r"HYPERLINK\s*\(\s*'([^']+)'", re.IGNORECASE)
+_HYPERLINK_LABEL = re.compile(r'HYPERLINK\(\s*"[^"]+"\s*,\s*"([^"]+)"', re.IGNORECASE)
+_PLAIN_URL = re.compile(r'(https?://[^\s"\']+)')
+_DOCUMENT_ID = re.compile(r'/d/([a-zA-Z0-9-_]+)')
+
+
+def normalize_key(s) -> str:
+    """Normalize a case number or name for matching: strip invisible chars, collapse whitespace, lower-case."""
+    if s is None:
+        return ""
+    s = str(s).replace('\u00A0', ' ').replace('\u200b', '').strip()
+    return _WHITESPACE.sub(' ', s).lower()
+
+
+def extract_url(cell) -> str | None:
+    """Returns the URL inside a =HYPERLINK(...) formula or a plain URL cell, else None."""
+    if not cell:
+        return None
+    cell = str(cell).strip()
+    for pattern in (_HYPERLINK_URL_DQ, _HYPERLINK_URL_SQ):
+        m = pattern.search(cell)
+        if m:
+            url = m.group(1).strip()
+            if url.startswith('http://') or url.startswith('https://'):
+                return url
+    m = _PLAIN_URL.search(cell)
+    if m:
+        return m.group(1).rstrip('"\')')
+    return None
+
+
+def document_id(url) -> str | None:
+    """Returns the document id in a Google Docs/Drive link (.../d/<id>), or None."""
+    m = _DOCUMENT_ID.search(url or "")
+    return m.group(1) if m else None
+
+
+def visible_text(cell) -> str:
+    """Returns the label of a =HYPERLINK(url, "label") cell, or the cell itself."""
+    cell = "" if cell is None else str(cell)
+    m = _HYPERLINK_LABEL.search(cell)
+    return m.group(1) if m else cell
+
+
+def parse_docket_row(row: list, sheet_row: int) -> dict:
+    """Parses one docket row (read with valueRenderOption=FORMULA) into a case dict."""
+    def cell(name):
+        i = DOCKET_COLUMNS[name]
+        return "" if len(row) <= i or row[i] is None else str(row[i])
+
+    return {
+        "judge": cell("judge"),
+        "case_status": cell("case_status"),
+        "case_name": cell("case_name"),
+        "case_number": visible_text(cell("case_number")),
+        "filing_date": cell("filing_date"),
+        "filing_link": extract_url(cell("filing_link")),
+        "row_number": sheet_row,
+    }
+
+
+class DocketIndex:
+    """
+    Case lookups by normalized case number or case name, kept in sheet row order.
+
+    Thread-safe; shared by the executor threads that run google_requests.
+    """
+
+    def __init__(self, data_start_row: int, ttl_seconds: float = 60):
+        self.data_start_row = data_start_row
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._cases = []       # parsed rows in sheet order, index 0 == data_start_row
+        self._by_number = {}   # normalized case number -> case dict (same objects as _cases)
+        self._by_name = {}     # normalized case name -> list of case dicts
+        self._by_doc = {}      # filing link document id -> case dict
+        self._built_at = None
+        self._stats = {"builds": 0, "hits": 0, "misses": 0, "invalidations": 0}
+
+    # ---- building / freshness ----
+    def rebuild(self, rows: list):
+        """Replaces the index with the given range values (first row == data_start_row)."""
+        with self._lock:
+            self._cases = [parse_docket_row(row, self.data_start_row + offset) for offset, row in enumerate(rows)]
+            self._reindex()
+            self._built_at = time.monotonic()
+            self._stats["builds"] += 1
+
+    def _reindex(self):
+        self._by_number = {}
+        self._by_name = {}
+        self._by_doc = {}
+        for case in self._cases:
+            key = normalize_key(case["case_number"])
+            # first match wins, like the old top-to-bottom scan
+            if key and key not in self._by_number:
+                self._by_number[key] = case
+            name_key = normalize_key(case["case_name"])
+            if name_key:
+                self._by_name.setdefault(name_key, []).append(case)
+            doc_id = document_id(case["filing_link"])
+            if doc_id and doc_id not in self._by_doc:
+                self._by_doc[doc_id] = case
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            return self._built_at is not None and time.monotonic() - self._built_at < self.ttl_seconds
+
+    def invalidate(self):
+        """Marks the index stale so the next lookup re-reads the sheet."""
+        with self._lock:
+            self._built_at = None
+            self._stats["invalidations"] += 1
+
+    # ---- lookups ----
+    def get(self, case_number: str) -> dict | None:
+        """Returns a copy of the case with this case number, or None."""
+        with self._lock:
+            case = self._by_number.get(normalize_key(case_number))
+            self._stats["hits" if case else "misses"] += 1
+            return dict(case) if case else None
+
+    def find_by_name(self, case_name: str) -> list[dict]:
+        """Returns copies of every case with this case name."""
+        with self._lock:
+            return [dict(c) for c in self._by_name.get(normalize_key(case_name), [])]
+
+    def find_by_document(self, doc_id: str) -> dict | None:
+        """Returns a copy of the first case whose filing link is this document, or None."""
+        with self._lock:
+            case = self._by_doc.get(doc_id)
+            return dict(case) if case else None
+
+    def all_cases(self) -> list[dict]:
+        """Returns copies of every row in sheet order."""
+        with self._lock:
+            return [dict(c) for c in self._cases]
+
+    def next_row_number(self) -> int:
+        """Sheet row just below the last indexed row, where the next append lands."""
+        with self._lock:
+            return self.data_start_row + len(self._cases)
+
+    # ---- in-place updates for the bot's own writes ----
+    def add(self, case: dict, row_number: int):
+        """Records a row the bot wrote at row_number, shifting rows at or below it down."""
+        with self._lock:
+            offset = row_number - self.data_start_row
+            if offset < 0:
+                self.invalidate()
+                return
+            while len(self._cases) < offset:
+                self._cases.append(parse_docket_row([], self.data_start_row + len(self._cases)))
+            for existing in self._cases[offset:]:
+                existing["row_number"] += 1
+            entry = {k: case.get(k, "") for k in DOCKET_COLUMNS}
+            entry["row_number"] = row_number
+            self._cases.insert(offset, entry)
+            self._reindex()
+
+    def update(self, case_number: str, changes: dict) -> bool:
+        """Applies changes to the indexed row; returns False if the case isn't indexed."""
+        with self._lock:
+            case = self._by_number.get(normalize_key(case_number))
+            if case is None:
+                return False
+            for key, value in changes.items():
+                if key in DOCKET_COLUMNS:
+                    case[key] = value
+            self._reindex()
+            return True
+
+    def remove(self, case_number: str) -> bool:
+        """Drops the row for case_number and shifts the rows below it up, as deleteDimension does."""
+        with self._lock:
+            case = self._by_number.get(normalize_key(case_number))
+            if case is None:
+                return False
+            offset = case["row_number"] - self.data_start_row
+            del self._cases[offset]
+            for existing in self._cases[offset:]:
+                existing["row_number"] -= 1
+            self._reindex()
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, cases=len(self._by_number), fresh=self.is_fresh())
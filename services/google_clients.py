@@ -0,0 +1,124 @@
+"""
+Process-wide Google API clients.
+
+Credentials are loaded from the service account file once per scope set and are
+refreshed shortly before they expire, so a request never pays for a token exchange
+it did not need.
+
+googleapiclient service objects wrap an httplib2.Http, which is not thread-safe,
+so every executor thread gets its own service object built on the shared credentials.
+Builds use the bundled (static) discovery documents, so no discovery fetch happens either.
+
+With api_endpoint set (e.g. utils/fake_google_server.py), every service is pointed at it and
+anonymous credentials are used instead of the service account.
+"""
+
+import datetime
+import threading
+
+from googleapiclient.discovery import build
+from google.auth.credentials import AnonymousCredentials
+from google.oauth2 import service_account
+from google.auth.transport.requests import Request
+from utils.logger import log
+
+
+# Refresh the access token when it has less than this left before expiry
+REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+# Path of each API under the endpoint root; api_endpoint replaces rootUrl and servicePath both
+SERVICE_PATHS = {"drive": "drive/v3/"}
+
+
+class GoogleClientManager:
+    """
+    Builds Google API clients once and hands them out to any thread.
+
+    get_service() returns a ready-to-use service for (api, version, scopes).
+    stats() reports how many credential loads, service builds and token refreshes happened.
+    """
+
+    def __init__(self, service_account_file: str, refresh_margin: datetime.timedelta = REFRESH_MARGIN,
+                 request_builder=None, api_endpoint: str = None):
+        self.service_account_file = service_account_file
+        # Base URL replacing https://*.googleapis.com, e.g. a local fake server
+        self.api_endpoint = api_endpoint.rstrip("/") + "/" if api_endpoint else None
+        self.refresh_margin = refresh_margin
+        # HttpRequest class for build(requestBuilder=...), e.g. one that rate-limits execute()
+        self.request_builder = request_builder
+        self._lock = threading.Lock()
+        self._credentials = {}
+        self._local = threading.local()
+        self._stats = {"credential_loads": 0, "service_builds": 0, "token_refreshes": 0}
+
+    def _needs_refresh(self, creds) -> bool:
+        if isinstance(creds, AnonymousCredentials):
+            return False
+        if not creds.token or creds.expiry is None:
+            return True
+        return creds.expiry - datetime.datetime.utcnow() < self.refresh_margin
+
+    def get_credentials(self, scopes: list[str]):
+        """
+        Returns the shared credentials for the given scopes, loading or refreshing them if needed.
+        """
+        key = tuple(sorted(scopes))
+        with self._lock:
+            creds = self._credentials.get(key)
+            if creds is None and self.api_endpoint:
+                creds = self._credentials[key] = AnonymousCredentials()
+            if creds is None:
+                creds = service_account.Credentials.from_service_account_file(
+                    self.service_account_file, scopes=list(key)
+                )
+                self._credentials[key] = creds
+                self._stats["credential_loads"] += 1
+                log(f"Loaded Google credentials for scopes {list(key)}")
+
+            if self._needs_refresh(creds):
+                creds.refresh(Request())
+                self._stats["token_refreshes"] += 1
+                log(f"Refreshed Google access token (refresh #{self._stats['token_refreshes']})")
+
+            return creds
+
+    def peek_credentials(self, scopes: list[str]):
+        """
+        Returns the shared credentials only if they are loaded and not due for a refresh, else None.
+        Never blocks on I/O, so async code can call it before falling back to get_credentials in a thread.
+        """
+        with self._lock:
+            creds = self._credentials.get(tuple(sorted(scopes)))
+            if creds is None or self._needs_refresh(creds):
+                return None
+            return creds
+
+    def get_service(self, api: str, version: str, scopes: list[str]):
+        """
+        Returns this thread's service object for (api, version, scopes), building it on first use.
+        """
+        creds = self.get_credentials(scopes)
+
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+
+        key = (api, version, tuple(sorted(scopes)))
+        service = services.get(key)
+        if service is None:
+            kwargs = {"requestBuilder": self.request_builder} if self.request_builder else {}
+            if self.api_endpoint:
+                kwargs["client_options"] = {"api_endpoint": self.api_endpoint + SERVICE_PATHS.get(api, "")}
+            service = build(api, version, credentials=creds, cache_discovery=False, **kwargs)
+            services[key] = service
+            with self._lock:
+                self._stats["service_builds"] += 1
+                builds = self._stats["service_builds"]
+            log(f"Built Google {api} {version} client in {threading.current_thread().name} (build #{builds})")
+
+        return service
+
+    def stats(self) -> dict:
+        """Returns a snapshot of build/refresh counters."""
+        with self._lock:
+            return dict(self._stats)
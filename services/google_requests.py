@@ -1,9 +1,12 @@
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
-import re, datetime
-from services.ai_requests import get_case_type
+import re, datetime, threading, time
 import yaml, json
+from services.google_clients import GoogleClientManager
+from services.rate_limiter import GoogleRateLimiter, rate_limited_request
+from services.doc_cache import DocTextCache
+from services.docket_index import DocketIndex, DOCKET_COLUMNS, normalize_key, visible_text, parse_docket_row
+from services.sheet_metadata import SheetMetadataCache, METADATA_FIELDS
+from services.sheets_mutation_queue import a1_to_grid as _a1_to_grid, update_cells_request, delete_row_request, append_rows_request
 from utils.logger import log
 
 
@@ -14,6 +17,9 @@ with open("./config.yaml", "r") as f:
 SCOPES = ['https://www.googleapis.com/auth/documents.readonly']
 SERVICE_ACCOUNT_FILE = "./data/service_account2.json"
 
+# Drive file metadata, used only to tell whether a doc changed since it was cached
+SCOPES_DRIVE = ['https://www.googleapis.com/auth/drive.metadata.readonly']
+
 
 
 SHEET_ID = config['google']['sheet_id']
@@ -53,360 +59,430 @@ SCOPES_SHEETS = ['https://www.googleapis.com/auth/spreadsheets']
 LAST_AVAILABLE_CASE_NUMBER_CRIMINAL = config['google'].get('last_criminalcase_number')
 LAST_AVAILABLE_CASE_NUMBER_CIVIL = config['google'].get('lasts_civilcase_number')
 
+# Read/write budgets shared by every Sheets and Docs call, sync or async
+rate_limiter = GoogleRateLimiter(
+    read_per_minute=config['google'].get('read_requests_per_minute', 60),
+    write_per_minute=config['google'].get('write_requests_per_minute', 60),
+    docs_per_minute=config['google'].get('docs_requests_per_minute', 300),
+    max_retries=config['google'].get('max_retries', 5),
+)
 
-def _normalize_range_ref(r: str) -> str | None:
-    """Normalize a config-provided cell reference like 'Data:O3' to 'Data!O3'."""
-    if not r:
-        return None
-    if ':' in r and '!' not in r:
-        return r.replace(':', '!', 1)
-    return r
+# Empty for the real Google APIs; e.g. http://127.0.0.1:8085 for utils/fake_google_server.py
+GOOGLE_API_BASE_URL = (config['google'].get('api_base_url') or "").rstrip("/")
 
-def extract_google_docs_links(text):
-    """
-    Extracts Google Docs/Sheets/Slides/Form links from text, ending at the document ID.
-    """
-    # Matches URLs like https://docs.google.com/document/d/<ID> or similar
-    pattern = r'https?://(?:docs|drive)\.google\.com/(?:document|spreadsheets|presentation|forms)/d/([a-zA-Z0-9-_]+)'
-    matches = re.finditer(pattern, text)
-    links = []
-    for match in matches:
-        doc_type = match.group(0).split('/')[3]  # e.g., 'document'
-        doc_id = match.group(1)
-        base_url = f"https://docs.google.com/{doc_type}/d/{doc_id}"
-        links.append(base_url)
-    return links
+# One client manager for the whole process; credentials and services are reused across calls
+clients = GoogleClientManager(
+    SERVICE_ACCOUNT_FILE,
+    request_builder=rate_limited_request(rate_limiter),
+    api_endpoint=GOOGLE_API_BASE_URL or None
+)
 
 
+def _sheets_service():
+    """Shared Sheets v4 client for the calling thread."""
+    return clients.get_service("sheets", "v4", SCOPES_SHEETS)
 
 
+def _docs_service():
+    """Shared Docs v1 client for the calling thread."""
+    return clients.get_service("docs", "v1", SCOPES)
 
-def get_gdoc_text(gdoc_link: str):
-    """
-    Extracts text content from a gdoc given its link.
-    """
-    try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES)
 
-        # Extract document ID from the link (case-insensitive)
-        match = re.search(r"/document/d/([a-zA-Z0-9-_]+)", gdoc_link, re.IGNORECASE)
-        if not match:
-            return False, "Invalid Google Docs link format."
-        document_id = match.group(1)
+def _drive_service():
+    """Shared Drive v3 client for the calling thread."""
+    return clients.get_service("drive", "v3", SCOPES_DRIVE)
 
-        service = build('docs', 'v1', credentials=creds)
-        document = service.documents().get(documentId=document_id).execute()
-        
-        content = document.get('body', {}).get('content', [])
-        
-        text_content = []
-        for element in content:
-            if 'paragraph' in element:
-                for paragraph_element in element.get('paragraph', {}).get('elements', []):
-                    if 'textRun' in paragraph_element:
-                        text_content.append(paragraph_element.get('textRun', {}).get('content', ''))
-        
-        return True, "".join(text_content)
 
-    except HttpError as error:
-        return False, f"An HTTP error occurred: {error}"
-    except Exception as e:
-        return False, f"An unexpected error occurred: {e}"
+# In-memory index of the Pending Cases rows (see services/docket_index.py)
+docket_index = DocketIndex(DATA_START_ROW, ttl_seconds=config['google'].get('docket_index_ttl_seconds', 60))
 
 
+def _read_docket_rows(service) -> list:
+    """One read of the whole docket range, with formulas so HYPERLINK urls survive."""
+    result = service.spreadsheets().values().get(
+        spreadsheetId=SHEET_ID,
+        range=DATA_SHEET_RANGE,
+        valueRenderOption="FORMULA",
+        dateTimeRenderOption="FORMATTED_STRING"
+    ).execute()
+    return result.get('values', [])
 
 
+def _find_case(service, case_number: str) -> dict | None:
+    """
+    Looks a case up in the docket index, re-reading the sheet only if the index is stale
+    or the case is missing from an index that wasn't just rebuilt.
+    """
+    rebuilt = False
+    if not docket_index.is_fresh():
+        docket_index.rebuild(_read_docket_rows(service))
+        rebuilt = True
 
+    case = docket_index.get(case_number)
+    if case is None and not rebuilt:
+        docket_index.rebuild(_read_docket_rows(service))
+        case = docket_index.get(case_number)
+    return case
 
 
+def _docket_cell(column: str, row_number: int) -> str:
+    """A1 reference of one docket cell, e.g. ("case_status", 7) -> "Pending Cases!B7"."""
+    return f"{SHEET_NAME}!{chr(ord('A') + DOCKET_COLUMNS[column])}{row_number}"
 
 
+def _cell_holds(values: list, case_number: str) -> bool:
+    """True if a one-cell values().get result holds case_number."""
+    cell = values[0][0] if values and values[0] else ""
+    return normalize_key(visible_text(cell)) == normalize_key(case_number)
 
 
+def _docket_row_range(row_number: int) -> str:
+    """A1 range of one whole docket row, e.g. 7 -> "Pending Cases!A7:F7"."""
+    return f"{SHEET_NAME}!A{row_number}:F{row_number}"
 
-# Sheets configuration is defined above from config.yaml (SHEET_ID, SHEET_NAME, DATA_START_ROW, DATA_SHEET_RANGE)
 
+def _row_is_case(row: list, row_number: int, case_name: str, case_number: str) -> bool:
+    """True if docket row values hold both case_name and case_number, the match a delete requires."""
+    case = parse_docket_row(row, row_number)
+    return (
+        normalize_key(case["case_name"]) == normalize_key(case_name)
+        and normalize_key(case["case_number"]) == normalize_key(case_number)
+    )
 
 
-def add_to_docket(case_info: dict) -> dict:
-    try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        # Unpack fields with defaults
-        judge = case_info.get("judge", "")
-        case_status = case_info.get("case_status", "")
-        case_name = case_info.get("case_name", "")
-        case_number = case_info.get("case_number", "")
-        filing_date = case_info.get("filing_date", "")
-        filing_link = case_info.get("filing_link", "")
-        spreadsheetId = case_info.get("spreadsheetId", "")
-        append_range = case_info.get("range", "")
-
-        if spreadsheetId:
-            spreadsheetId = spreadsheetId
-        else:
-            spreadsheetId = SHEET_ID
+def _row_matches(service, row_number: int, case_number: str) -> bool:
+    """Reads just the case-number cell of a row and checks it still holds case_number."""
+    result = service.spreadsheets().values().get(
+        spreadsheetId=SHEET_ID,
+        range=_docket_cell("case_number", row_number),
+        valueRenderOption="FORMULA"
+    ).execute()
+    return _cell_holds(result.get('values', []), case_number)
 
-        if append_range:
-            append_range = append_range
-        else:
-            append_range = APPEND_RANGE
 
-        hyperlink = f'=HYPERLINK("{filing_link}", "Link")' if filing_link else ""
+def _locate_row(service, case_number: str, row_number: int = None) -> int | None:
+    """
+    Sheet row holding case_number, or None.
+    A row number the caller already has (or the docket index's) is confirmed with a one-cell read.
+    If the docket has to be read to find the case, that read is the check.
+    If the check fails, someone else moved rows, so the docket is re-read once.
+    """
+    if row_number is None:
+        if not docket_index.is_fresh():
+            docket_index.rebuild(_read_docket_rows(service))
+            case = docket_index.get(case_number)
+            return case["row_number"] if case else None
+        case = docket_index.get(case_number)
+        row_number = case["row_number"] if case else None
 
-        new_row = [
-            judge,
-            case_status,
-            case_name,
-            case_number,
-            filing_date,
-            hyperlink
-        ]
+    if row_number is not None and _row_matches(service, row_number, case_number):
+        return row_number
 
-        body = {"values": [new_row]}
+    log(f"Docket row {row_number} does not hold '{case_number}', re-reading docket")
+    docket_index.rebuild(_read_docket_rows(service))
+    case = docket_index.get(case_number)
+    return case["row_number"] if case else None
 
-        service.spreadsheets().values().append(
-            spreadsheetId=spreadsheetId,
-            range=append_range,
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
 
-        return {"success": True, "message": f"Case '{case_name}' added to docket."}
+def _normalize_range_ref(r: str) -> str | None:
+    """Normalize a config-provided cell reference like 'Data:O3' to 'Data!O3'."""
+    if not r:
+        return None
+    if ':' in r and '!' not in r:
+        return r.replace(':', '!', 1)
+    return r
 
-    except Exception as e:
-        return {"success": False, "message": f"Error adding to docket: {e}"}
-    
+def _doc_id_from_link(gdoc_link: str) -> str | None:
+    """Returns the document ID in a Google Docs link (case-insensitive), or None."""
+    match = re.search(r"/document/d/([a-zA-Z0-9-_]+)", gdoc_link or "", re.IGNORECASE)
+    return match.group(1) if match else None
 
-    
 
-def edit_docket(case_number: str, changes: dict) -> dict:
+# documents().get field mask: only the text runs of top-level paragraphs, which is all
+# _extract_doc_text reads (no styles, lists, inline objects or revision info)
+DOC_TEXT_FIELDS = "body(content(paragraph(elements(textRun(content)))))"
+
+# How much of a filing the classifier looks at
+CLASSIFY_CHARS = 600
+
+_doc_fetch_lock = threading.Lock()
+_doc_fetch_stats = {"fetches": 0, "bytes": 0}
+
+
+def _extract_doc_text(document: dict, max_chars: int = None) -> str:
     """
-    Edits an existing case entry in the docket by its case number.
-    Works with columns A-F: Judge, Case Status, Case Name, Case Number, Filing Date, Filing Link
+    Joins the text runs of a documents().get response body.
+    With max_chars, stops as soon as that many characters are collected.
     """
-    try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        # Column mapping
-        column_indices = {
-            "judge": 0,
-            "case_status": 1,
-            "case_name": 2,
-            "case_number": 3,
-            "filing_date": 4,
-            "filing_link": 5,
-        }
+    content = document.get('body', {}).get('content', [])
 
-        # Read the configured data range (skips header rows)
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=DATA_SHEET_RANGE
-        ).execute()
+    text_content = []
+    collected = 0
+    for element in content:
+        if 'paragraph' in element:
+            for paragraph_element in element.get('paragraph', {}).get('elements', []):
+                if 'textRun' in paragraph_element:
+                    text = paragraph_element.get('textRun', {}).get('content', '')
+                    text_content.append(text)
+                    collected += len(text)
+                    if max_chars is not None and collected >= max_chars:
+                        return "".join(text_content)[:max_chars]
 
-        values = result.get('values', [])
-        if not values:
-            return {"success": False, "message": "No data found in the sheet."}
+    return "".join(text_content)
 
-        row_index_to_update = -1
-        for offset, row in enumerate(values):
-            sheet_row = DATA_START_ROW + offset
-            # Skip rows that don't have a case number column
-            if len(row) <= column_indices["case_number"]:
-                continue
-            if (row[column_indices["case_number"]] or "").strip().lower() == case_number.strip().lower():
-                row_index_to_update = sheet_row
-                break
 
-        if row_index_to_update == -1:
-            return {"success": False, "message": f"Case with number '{case_number}' not found."}
+def _record_doc_fetch(document_id: str, size: int, chars: int):
+    """Counts and logs the bytes a Docs fetch transferred."""
+    with _doc_fetch_lock:
+        _doc_fetch_stats["fetches"] += 1
+        _doc_fetch_stats["bytes"] += size
+    log(f"Fetched doc {document_id}: {size} bytes, {chars} chars kept")
 
-        row_to_edit_range = f"{SHEET_NAME}!A{row_index_to_update}:F{row_index_to_update}"
-        existing_row_result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=row_to_edit_range
-        ).execute()
 
-        existing_row_values = existing_row_result.get('values', [])
-        if not existing_row_values:
-            return {"success": False, "message": f"Could not retrieve data for row {row_index_to_update}."}
+def doc_fetch_stats() -> dict:
+    """Number of Docs fetches and bytes transferred since startup, plus doc cache counters."""
+    with _doc_fetch_lock:
+        return dict(_doc_fetch_stats, cache=doc_cache.stats())
 
-        updated_row_values = existing_row_values[0][:]
 
-        # Update fields
-        for key, new_value in {k.lower(): v for k, v in changes.items()}.items():
-            col_index = column_indices.get(key)
-            if col_index is not None:
-                if key == "filing_link" and new_value:
-                    updated_row_values[col_index] = f'=HYPERLINK("{new_value}", "Link")'
-                else:
-                    updated_row_values[col_index] = new_value
+# Extracted doc text by (document id, revision); see services/doc_cache.py
+doc_cache = DocTextCache(
+    max_entries=config['google'].get('doc_cache_size', 128),
+    max_age_seconds=config['google'].get('doc_cache_max_age_seconds', 3600)
+)
 
-        body = {"values": [updated_row_values]}
-        service.spreadsheets().values().update(
-            spreadsheetId=SHEET_ID,
-            range=row_to_edit_range,
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
+# Drive metadata fields that change whenever a doc is edited
+DRIVE_REVISION_FIELDS = "version,modifiedTime"
 
-        return {"success": True, "message": f"Case '{case_number}' successfully updated."}
+# Switched off the first time Drive refuses us (API not enabled or scope not granted);
+# revisions then come from Docs' revisionId instead
+_revision_source = {"drive": True}
 
-    except Exception as e:
-        return {"success": False, "message": f"Error updating docket: {e}"}
+
+def _drive_revision(file: dict) -> str | None:
+    """Revision marker from a Drive files.get response."""
+    if not file.get("version") and not file.get("modifiedTime"):
+        return None
+    return f"drive:{file.get('version')}:{file.get('modifiedTime')}"
 
 
+def _docs_revision(document: dict) -> str | None:
+    """Revision marker from a documents().get(fields="revisionId") response."""
+    return f"docs:{document['revisionId']}" if document.get("revisionId") else None
 
 
+def _disable_drive_revisions(error):
+    _revision_source["drive"] = False
+    log(f"Drive metadata unavailable ({error}); checking doc revisions through Docs instead")
 
-def get_available_case_number(case_type: str) -> str:
+
+def _doc_revision(document_id: str) -> str | None:
     """
-    Returns the next available case number string for the given type ("criminal" or "civil").
-    Retrieves data from the google sheet to find the last available case number which is in the "Data" sheet.
-    The last available case number for criminal cases is in O3 and for civil cases is in O4.
-    The function accesses the google sheet and gets that number and returns it with its case type prefix, e.g., "Crim 40" or "Civ 80".
+    Cheap check of a doc's current revision: Drive version/modifiedTime, else Docs revisionId.
+    Returns None when neither is available, in which case the doc isn't cached.
     """
+    if _revision_source["drive"]:
+        try:
+            file = _drive_service().files().get(
+                fileId=document_id,
+                fields=DRIVE_REVISION_FIELDS,
+                supportsAllDrives=True
+            ).execute()
+            return _drive_revision(file)
+        except HttpError as e:
+            if getattr(e.resp, "status", None) not in (401, 403):
+                raise
+            _disable_drive_revisions(e)
 
-    # Map input to correct prefix
-    case_type_map = {
-        "criminal": "Crim",
-        "crim": "Crim",
-        "civil": "Civ",
-        "civ": "Civ"
-    }
+    document = _docs_service().documents().get(documentId=document_id, fields="revisionId").execute()
+    return _docs_revision(document)
 
-    # Get the last available case number from the google sheet
-    try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        if case_type.lower() in ["criminal", "crim"]:
-            cell_ref = _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CRIMINAL) or 'Data!O3'
-            last_available_case_number = service.spreadsheets().values().get(
-                spreadsheetId=SHEET_ID,
-                range=cell_ref
-            ).execute().get('values', [])[0][0]
-            prefix = case_type_map["criminal"]
-        elif case_type.lower() in ["civil", "civ"]:
-            cell_ref = _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CIVIL) or 'Data!O4'
-            last_available_case_number = service.spreadsheets().values().get(
-                spreadsheetId=SHEET_ID,
-                range=cell_ref
-            ).execute().get('values', [])[0][0]
-            prefix = case_type_map["civil"]
-        else:
-            raise ValueError("Invalid case type. Must be 'criminal' or 'civil'.")
 
-    except Exception as e:
-        raise Exception(f"Error getting available case number: {e}")
+def _build_docket_row(case_info: dict) -> list:
+    """Builds a Pending Cases row (columns A-F) from case info."""
+    filing_link = case_info.get("filing_link", "")
+    hyperlink = f'=HYPERLINK("{filing_link}", "Link")' if filing_link else ""
+
+    return [
+        case_info.get("judge", ""),
+        case_info.get("case_status", ""),
+        case_info.get("case_name", ""),
+        case_info.get("case_number", ""),
+        case_info.get("filing_date", ""),
+        hyperlink
+    ]
 
-    # Extract numeric part and return with prefix
-    m = re.search(r'(\d+)', str(last_available_case_number))
-    number = m.group(1) if m else str(last_available_case_number)
-    return f"{prefix} {number}"
 
+def _appended_row_number(append_result: dict) -> int | None:
+    """Row number from a values().append response, e.g. "'Pending Cases'!A15:F15" -> 15."""
+    updated_range = append_result.get("updates", {}).get("updatedRange", "")
+    m_row = re.search(r'![A-Z]+(\d+)', updated_range)
+    return int(m_row.group(1)) if m_row else None
 
 
-# ---
-def increment_available_case_number(case_type: str) -> bool:
+def _record_docket_append(case_info: dict, row_number: int | None):
+    """
+    Keeps the docket index in step with a row the bot appended. If the row didn't land where
+    the index expected, the sheet changed underneath it and the index is dropped instead.
     """
-    Read the last available case number for the given case_type, increment the numeric part,
-    and write the new value back to the appropriate cell in the "Data" sheet.
+    if row_number and docket_index.is_fresh() and row_number == docket_index.next_row_number():
+        docket_index.add(case_info, row_number)
+    else:
+        docket_index.invalidate()
+
 
-    Accepts case_type like "criminal", "crim", "civil", "civ" (case-insensitive).
-    Returns True on success, raises Exception on failure.
+def _docket_cell_updates(row_number: int, changes: dict) -> tuple[list, dict]:
     """
-    # local mapping and target cell selection
-    case_type_key = (case_type or "").strip().lower()
-    prefix_map = {"criminal": "Crim", "crim": "Crim", "civil": "Civ", "civ": "Civ"}
-    # Normalize config-provided cell refs for writing back the incremented numbers
-    cell_map = {
-        "criminal": _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CRIMINAL) or 'Data!O3',
-        "crim": _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CRIMINAL) or 'Data!O3',
-        "civil": _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CIVIL) or 'Data!O4',
-        "civ": _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CIVIL) or 'Data!O4',
-    }
+    Turns changes (keyed by DOCKET_COLUMNS names) into the cells to write in row_number.
+    Returns ([(A1 cell, value), ...], the changes that mapped to a column).
+    """
+    cells = []
+    applied = {}
+    for key, new_value in {k.lower(): v for k, v in changes.items()}.items():
+        if key not in DOCKET_COLUMNS:
+            continue
+        if key == "filing_link" and new_value:
+            cells.append((_docket_cell(key, row_number), f'=HYPERLINK("{new_value}", "Link")'))
+        else:
+            cells.append((_docket_cell(key, row_number), new_value))
+        applied[key] = new_value
 
-    if case_type_key not in prefix_map:
-        raise ValueError("Invalid case type. Must be 'criminal'/'crim' or 'civil'/'civ'.")
+    return cells, applied
 
-    try:
-        # get current value (uses existing helper)
-        last_available_case_number = get_available_case_number(case_type_key)
-    except Exception as e:
-        raise Exception(f"Error reading current available case number: {e}")
 
-    orig = str(last_available_case_number).strip()
+# Developer metadata key tagging each Pending Cases row with its (normalized) case number.
+# Row-located metadata moves with the row, so the server can resolve a case's row even after
+# rows above it were inserted or deleted.
+CASE_METADATA_KEY = "judiciary_bot_case_number"
 
-    # Parse numeric suffix robustly; prefix is optional (handles "Crim193", "Crim 193", "193", "Crim-193")
-    m = re.search(r'^(?:([A-Za-z]+)\s*[-]?\s*)?0*([0-9]+)\s*$', orig)
-    if not m:
-        raise ValueError(f"Could not parse numeric suffix from '{last_available_case_number}'")
 
-    prefix_in_cell = m.group(1)  # may be None if only digits present
-    try:
-        current_num = int(m.group(2))
-    except Exception as e:
-        raise ValueError(f"Invalid numeric part in '{last_available_case_number}': {e}")
+def _case_filter(case_number: str) -> dict:
+    """DataFilter matching the docket row tagged with case_number."""
+    return {
+        "developerMetadataLookup": {
+            "metadataKey": CASE_METADATA_KEY,
+            "metadataValue": normalize_key(case_number),
+            "locationType": "ROW",
+        }
+    }
 
-    new_num = current_num + 1
 
-    # Decide whether to include a space between prefix and number.
-    # Preserve a space if the original had letters + space before digits; if original was digits-only, use space.
-    has_letters = bool(re.search(r'[A-Za-z]', orig))
-    had_space_between = bool(re.search(r'[A-Za-z]+\s+[0-9]+$', orig))
-    if not has_letters:
-        use_space = True
-    else:
-        use_space = had_space_between
+def _tag_row_request(sheet_id: int, row_number: int, case_number: str) -> dict:
+    """createDeveloperMetadata request tagging a docket row with its case number."""
+    return {
+        "createDeveloperMetadata": {
+            "developerMetadata": {
+                "metadataKey": CASE_METADATA_KEY,
+                "metadataValue": normalize_key(case_number),
+                "location": {
+                    "dimensionRange": {
+                        "sheetId": sheet_id,
+                        "dimension": "ROWS",
+                        "startIndex": row_number - 1,
+                        "endIndex": row_number,
+                    }
+                },
+                "visibility": "DOCUMENT",
+            }
+        }
+    }
 
-    standard_prefix = prefix_map[case_type_key]
 
-    if use_space:
-        incremented_case_number_str = f"{new_num:03d}"
-    else:
-        incremented_case_number_str = f"{new_num:03d}"
+def _retag_request(old_case_number: str, new_case_number: str) -> dict:
+    """updateDeveloperMetadata request moving a row's tag to its new case number."""
+    return {
+        "updateDeveloperMetadata": {
+            "dataFilters": [_case_filter(old_case_number)],
+            "developerMetadata": {"metadataValue": normalize_key(new_case_number)},
+            "fields": "metadataValue",
+        }
+    }
+
+
+def _docket_row_patch(changes: dict) -> tuple[list, dict]:
+    """
+    Turns changes into a docket row where untouched cells are None, which the values API skips.
+    Returns (row, the changes that mapped to a column).
+    """
+    cells, applied = _docket_cell_updates(DATA_START_ROW, changes)
+    row = [None] * len(DOCKET_COLUMNS)
+    for key, (_, value) in zip(applied, cells):
+        row[DOCKET_COLUMNS[key]] = value
+    while row and row[-1] is None:
+        row.pop()
+    return row, applied
+
 
-    # Write the incremented case number back to the sheet
+def _range_row(range_a1: str) -> int | None:
+    """First row number of an A1 range, e.g. "'Pending Cases'!A7:Z7" -> 7."""
     try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
+        return _a1_to_grid(range_a1)[1] + 1
+    except ValueError:
+        return None
 
-        target_range = cell_map[case_type_key]
 
-        body = {"values": [[incremented_case_number_str]]}
-        service.spreadsheets().values().update(
-            spreadsheetId=SHEET_ID,
-            range=target_range,
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
+def _matched_case_row(value_ranges: list) -> tuple[int, list] | None:
+    """(row number, row values) of the case matched in a batchGetByDataFilter response, or None."""
+    for matched in value_ranges:
+        if any("developerMetadataLookup" in f for f in matched.get("dataFilters", [])):
+            value_range = matched.get("valueRange", {})
+            row_number = _range_row(value_range.get("range", ""))
+            if row_number:
+                return row_number, (value_range.get("values") or [[]])[0]
+    return None
 
-        return True
 
-    except Exception as e:
-        raise Exception(f"Error incrementing available case number: {e}")
+def _matched_a1_values(value_ranges: list, range_a1: str) -> list:
+    """Values of the a1Range filter range_a1 in a batchGetByDataFilter response."""
+    for matched in value_ranges:
+        if any(f.get("a1Range") == range_a1 for f in matched.get("dataFilters", [])):
+            return matched.get("valueRange", {}).get("values", [])
+    return []
+
+
+def _updated_row(update_result: dict) -> int | None:
+    """Row written by a values().batchUpdateByDataFilter, or None if the filter matched no row."""
+    for response in update_result.get("responses", []):
+        if response.get("updatedRange"):
+            return _range_row(response["updatedRange"])
+    return None
 
 
+def _case_info_result(case: dict) -> dict:
+    """Shapes an indexed case the way get_case_info_from_number returns it."""
+    return {
+        "success": True,
+        "row_number": case["row_number"],
+        "case_name": case["case_name"] or None,
+        "case_status": case["case_status"] or None,
+        "filing_date": case["filing_date"] or None,
+        "link": case["filing_link"],
+        "judge": case["judge"] or "NA"
+    }
 
 
-def get_gdoccase_info(link: str) -> dict:
+def _counter_cell(case_type: str) -> tuple[str, str]:
     """
-    Extracts case information from a Google Doc link.
-    Returns a dictionary with success status, case_name, case_number, case_type, and errors.
+    Maps "criminal"/"crim"/"civil"/"civ" (case-insensitive) to (case number prefix, counter cell).
+    Raises ValueError for anything else.
     """
-    # Check testing mode first - if enabled, return mock data without API calls
+    key = (case_type or "").strip().lower()
+    if key in ["criminal", "crim"]:
+        return "Crim", _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CRIMINAL) or 'Data!O3'
+    if key in ["civil", "civ"]:
+        return "Civ", _normalize_range_ref(LAST_AVAILABLE_CASE_NUMBER_CIVIL) or 'Data!O4'
+    raise ValueError("Invalid case type. Must be 'criminal'/'crim' or 'civil'/'civ'.")
+
+
+def _format_case_number(prefix: str, counter_value) -> str:
+    """Counter cell value -> case number string, e.g. ("Crim", "040") -> "Crim 040"."""
+    m = re.search(r'(\d+)', str(counter_value))
+    number = m.group(1) if m else str(counter_value)
+    return f"{prefix} {number}"
+
+
+def _testing_result_enabled() -> bool:
+    """True when AI.testing_result is set in config.yaml (re-read so it can be toggled live)."""
     # Load config safely and fall back to module-level `config` if available.
     try:
         with open("./config.yaml", "r") as f:
@@ -424,55 +500,362 @@ def get_gdoccase_info(link: str) -> dict:
             if k not in merged_cfg:
                 merged_cfg[k] = v
 
-    testing_result = False
     try:
-        testing_result = bool(merged_cfg.get("AI", {}).get("testing_result", False))
+        return bool(merged_cfg.get("AI", {}).get("testing_result", False))
     except Exception:
-        testing_result = False
-
-    if testing_result:
-        return {
-            "success": True,
-            "case_name": "SD v. Ed",
-            "case_number": "Crim 193",
-            "case_type": "Criminal",
-            "errors": []
-        }
-    
-    # Only make API calls if not in testing mode
-    errors = []
-
-    success, gdoc_text = get_gdoc_text(link)
-    if not success:
-        errors.append(gdoc_text)
-        return {
-            "success": False,
-            "case_name": None,
-            "case_number": None,
-            "case_type": None,
-            "errors": errors
-        }
+        return False
+
 
-    case_type_result = get_case_type(gdoc_text[:600])  # limit to first 600 characters
+TESTING_CASE_INFO = {
+    "success": True,
+    "case_name": "SD v. Ed",
+    "case_number": "Crim 193",
+    "case_type": "Criminal",
+    "errors": []
+}
+
+
+def _case_info_from_classification(case_type_result: dict) -> tuple[str, str, list]:
+    """Unpacks a get_case_type result into (case_type, case_name, errors)."""
     if not case_type_result.get("success"):
-        errors.append(f"AI Error: {case_type_result.get('error', 'Unknown error')}")
-        case_type = "Unknown"
-        case_name = "Unknown"
+        return "Unknown", "Unknown", [f"AI Error: {case_type_result.get('error', 'Unknown error')}"]
+    return case_type_result.get("case_type", "Unknown"), case_type_result.get("case_name", "Unknown"), []
+
+
+def _case_log_target(case_number: str) -> dict:
+    """
+    Picks the case-log range for a case number ("Crim ..." -> criminal log, otherwise civil).
+    Returns {"success", "sheet_name", "start_col", "start_row"} or {"success": False, "message"}.
+    """
+    # Match "Crim" or "CRIMINAL" (case-insensitive), but not "Civ"
+    is_criminal = bool(re.search(r"\bcrim(inal)?\b", case_number, re.IGNORECASE))
+
+    # Choose the proper case-log range from config
+    target_range_config = CASE_LOG_RANGE_CRIMINAL if is_criminal else CASE_LOG_RANGE_CIVIL
+    if not target_range_config:
+        return {"success": False, "message": "Case log range for the case type is not configured in config.yaml."}
+
+    # Parse the target range to get the starting column and sheet name
+    # e.g., "Case Log!J5:O5" -> sheet="Case Log", start_col="J", start_row=5
+    try:
+        sheet_name, range_part = target_range_config.split('!', 1)
+        m = re.match(r'([A-Za-z]+)(\d+)', range_part)
+        if not m:
+            return {"success": False, "message": "Invalid case log range format."}
+        return {"success": True, "sheet_name": sheet_name, "start_col": m.group(1), "start_row": int(m.group(2))}
+    except Exception as e:
+        return {"success": False, "message": f"Failed to parse case log range: {e}"}
+
+
+def _build_case_log_row(case_info: dict, lookup: dict) -> list:
+    """
+    Builds the case-log row for a finished case:
+    case name, case number, filing date, filing link, verdict date (MM/DD/YY), ending (hyperlinked if a link was given).
+    Values from the docket lookup win over the ones passed in case_info.
+    """
+    case_number = (case_info.get("case_number") or "").strip()
+    ending_type = case_info.get("ending_type") or case_info.get("case_ending_type") or "Other"
+    ending_link = case_info.get("ending_link") or case_info.get("ending_url") or ""
+
+    if lookup.get("success"):
+        case_name = lookup.get("case_name") or case_info.get("case_name") or ""
+        filing_date = lookup.get("filing_date") or case_info.get("filing_date") or ""
+        filing_link = lookup.get("link") or case_info.get("filing_link") or ""
     else:
-        case_type = case_type_result.get("case_type", "Unknown")
-        case_name = case_type_result.get("case_name", "Unknown")
+        case_name = case_info.get("case_name") or ""
+        filing_date = case_info.get("filing_date") or ""
+        filing_link = case_info.get("filing_link") or ""
 
-    case_number = get_available_case_number(case_type)
+    # Verdict date in MM/DD/YY
+    verdict_date = datetime.datetime.utcnow().strftime("%m/%d/%y")
 
+    # Ending cell: hyperlink if link provided
+    if ending_link:
+        ending_cell = f'=HYPERLINK("{ending_link}", "{ending_type}")'
+    else:
+        ending_cell = ending_type
 
+    # Prepare filing cell as HYPERLINK formula if URL present, else empty
+    if filing_link:
+        filing_cell = f'=HYPERLINK("{filing_link}", "Link")'
+    else:
+        filing_cell = ""
 
-    return {
-        "success": len(errors) == 0,
-        "case_name": case_name,
-        "case_number": case_number,
-        "case_type": case_type,
-        "errors": errors
-    }
+    return [
+        case_name,
+        case_number,
+        filing_date,
+        filing_cell,
+        verdict_date,
+        ending_cell,
+    ]
+
+
+# Tab ids and grid sizes of every tab (Pending Cases, case logs, Data, ...)
+sheet_metadata = SheetMetadataCache()
+
+
+def load_sheet_metadata() -> dict:
+    """Fetches the tab properties into sheet_metadata; called at startup and when a tab is missing."""
+    try:
+        metadata = _sheets_service().spreadsheets().get(spreadsheetId=SHEET_ID, fields=METADATA_FIELDS).execute()
+        sheet_metadata.load(metadata)
+        return {"success": True, "message": f"Loaded properties of {len(metadata.get('sheets', []))} tabs."}
+    except Exception as e:
+        return {"success": False, "message": f"Error loading sheet metadata: {e}"}
+
+
+def _sheet_props(title: str) -> dict | None:
+    """Cached properties of a tab ({"sheet_id", "row_count", "column_count"}), or None if it doesn't exist."""
+    props = sheet_metadata.get(title)
+    if props is None:
+        load_sheet_metadata()
+        props = sheet_metadata.get(title)
+    return props
+
+
+def _sheet_id(title: str) -> int | None:
+    """Numeric sheetId of a tab, from the metadata cache."""
+    props = _sheet_props(title)
+    return props["sheet_id"] if props else None
+
+
+def _grid_growth(title: str, props: dict, last_row: int) -> list:
+    """
+    appendDimension requests needed before writing to last_row (1-based) of a tab,
+    since updateCells can't write past the grid. Records the growth in sheet_metadata.
+    """
+    missing = last_row - props["row_count"]
+    if missing <= 0:
+        return []
+    sheet_metadata.grow(title, missing)
+    return [append_rows_request(props["sheet_id"], missing)]
+
+
+# Next free row of each case log, so finishing a case doesn't re-read the whole log column.
+# Trusted for the docket index TTL; finish_case also checks the cell is still empty.
+_case_log_rows = {}   # (sheet_name, start_col) -> (next free row, time.monotonic() when learnt)
+_case_log_lock = threading.Lock()
+
+
+def _cached_case_log_row(target: dict) -> int | None:
+    with _case_log_lock:
+        entry = _case_log_rows.get((target["sheet_name"], target["start_col"]))
+    if entry and time.monotonic() - entry[1] < docket_index.ttl_seconds:
+        return entry[0]
+    return None
+
+
+def _remember_case_log_row(target: dict, next_row: int | None):
+    """Records the next free row of a case log (None forgets it)."""
+    key = (target["sheet_name"], target["start_col"])
+    with _case_log_lock:
+        if next_row is None:
+            _case_log_rows.pop(key, None)
+        else:
+            _case_log_rows[key] = (next_row, time.monotonic())
+
+
+def _case_log_range(target: dict) -> tuple[str, int | None]:
+    """
+    The range finish_case reads to place a row in a case log, plus the cached next free row.
+    A cached row is confirmed with one cell; otherwise the log's first column is read in full.
+    """
+    sheet_name, start_col, start_row = target["sheet_name"], target["start_col"], target["start_row"]
+    log_row = _cached_case_log_row(target)
+    if log_row:
+        return f"{sheet_name}!{start_col}{log_row}", log_row
+    return f"{sheet_name}!{start_col}{start_row}:{start_col}", None
+
+
+def _case_log_next_row(target: dict, cached_log_row: int | None, values: list) -> int | None:
+    """Next free case-log row from the _case_log_range read, or None if the cached row is taken."""
+    if cached_log_row:
+        return None if values and any(values[0]) else cached_log_row
+    return target["start_row"] + len(values)
+
+
+def extract_google_docs_links(text):
+    """
+    Extracts Google Docs/Sheets/Slides/Form links from text, ending at the document ID.
+    """
+    # Matches URLs like https://docs.google.com/document/d/<ID> or similar
+    pattern = r'https?://(?:docs|drive)\.google\.com/(?:document|spreadsheets|presentation|forms)/d/([a-zA-Z0-9-_]+)'
+    matches = re.finditer(pattern, text)
+    links = []
+    for match in matches:
+        doc_type = match.group(0).split('/')[3]  # e.g., 'document'
+        doc_id = match.group(1)
+        base_url = f"https://docs.google.com/{doc_type}/d/{doc_id}"
+        links.append(base_url)
+    return links
+
+
+
+
+
+def get_gdoc_text(gdoc_link: str, max_chars: int = None):
+    """
+    Extracts text content from a gdoc given its link.
+    Only the paragraph text is requested (DOC_TEXT_FIELDS); with max_chars, parsing stops
+    once that many characters are collected.
+    Text is cached per revision, so an unchanged doc costs one small revision check.
+    """
+    try:
+        document_id = _doc_id_from_link(gdoc_link)
+        if not document_id:
+            return False, "Invalid Google Docs link format."
+
+        try:
+            revision = _doc_revision(document_id)
+        except Exception as e:
+            log(f"Could not check revision of doc {document_id}: {e}")
+            revision = None
+        if revision:
+            cached = doc_cache.get(document_id, revision, max_chars)
+            if cached is not None:
+                return True, cached
+
+        service = _docs_service()
+        request = service.documents().get(documentId=document_id, fields=DOC_TEXT_FIELDS)
+
+        # Measure the response body before it is parsed
+        size = {}
+        parse = request.postproc
+
+        def measured(resp, content):
+            size["bytes"] = len(content or b"")
+            return parse(resp, content)
+
+        request.postproc = measured
+        document = request.execute()
+
+        text = _extract_doc_text(document, max_chars)
+        _record_doc_fetch(document_id, size.get("bytes", 0), len(text))
+        if revision:
+            doc_cache.put(document_id, revision, text, complete=max_chars is None or len(text) < max_chars)
+        return True, text
+
+    except HttpError as error:
+        return False, f"An HTTP error occurred: {error}"
+    except Exception as e:
+        return False, f"An unexpected error occurred: {e}"
+
+
+
+
+
+
+
+
+
+
+
+
+# Sheets configuration is defined above from config.yaml (SHEET_ID, SHEET_NAME, DATA_START_ROW, DATA_SHEET_RANGE)
+
+
+
+def _tag_row(service, row_number: int | None, case_number: str | None):
+    """Tags a docket row with its case number. Best effort: untagged rows are still found by scanning."""
+    if not row_number or not case_number:
+        return
+    try:
+        service.spreadsheets().batchUpdate(
+            spreadsheetId=SHEET_ID,
+            body={"requests": [_tag_row_request(_sheet_id(SHEET_NAME), row_number, case_number)]}
+        ).execute()
+    except Exception as e:
+        log(f"Failed to tag docket row {row_number} with '{case_number}': {e}")
+
+
+def add_to_docket(case_info: dict) -> dict:
+    try:
+        service = _sheets_service()
+
+        case_name = case_info.get("case_name", "")
+        spreadsheetId = case_info.get("spreadsheetId", "") or SHEET_ID
+        append_range = case_info.get("range", "") or APPEND_RANGE
+
+        body = {"values": [_build_docket_row(case_info)]}
+
+        result = service.spreadsheets().values().append(
+            spreadsheetId=spreadsheetId,
+            range=append_range,
+            valueInputOption="USER_ENTERED",
+            body=body
+        ).execute()
+
+        if spreadsheetId == SHEET_ID and append_range == APPEND_RANGE:
+            row_number = _appended_row_number(result)
+            _record_docket_append(case_info, row_number)
+            _tag_row(service, row_number, case_info.get("case_number"))
+
+        return {"success": True, "message": f"Case '{case_name}' added to docket."}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error adding to docket: {e}"}
+    
+
+    
+
+def edit_docket(case_number: str, changes: dict, row_number: int = None) -> dict:
+    """
+    Edits an existing case entry in the docket by its case number.
+    Works with columns A-F: Judge, Case Status, Case Name, Case Number, Filing Date, Filing Link
+    Only the changed cells are written. Rows tagged with developer metadata are written through a
+    DataFilter, so the server finds the row and the edit is one request.
+    Untagged rows (added before tagging) are located as before and tagged on the way:
+    pass row_number if the caller already knows the row (e.g. from get_all_cases);
+    it is checked with a one-cell read before writing.
+    """
+    try:
+        service = _sheets_service()
+
+        patch, applied = _docket_row_patch(changes)
+        if not applied:
+            return {"success": True, "message": f"Nothing to update for case '{case_number}'."}
+
+        result = service.spreadsheets().values().batchUpdateByDataFilter(
+            spreadsheetId=SHEET_ID,
+            body={
+                "valueInputOption": "USER_ENTERED",
+                "data": [{"dataFilter": _case_filter(case_number), "values": [patch]}]
+            }
+        ).execute()
+        row_index_to_update = _updated_row(result)
+
+        requests = []
+        if row_index_to_update is None:
+            row_index_to_update = _locate_row(service, case_number, row_number)
+            if row_index_to_update is None:
+                return {"success": False, "message": f"Case with number '{case_number}' not found."}
+
+            cells, _ = _docket_cell_updates(row_index_to_update, changes)
+            service.spreadsheets().values().batchUpdate(
+                spreadsheetId=SHEET_ID,
+                body={
+                    "valueInputOption": "USER_ENTERED",
+                    "data": [{"range": cell, "values": [[value]]} for cell, value in cells]
+                }
+            ).execute()
+            requests.append(_tag_row_request(_sheet_id(SHEET_NAME), row_index_to_update, applied.get("case_number") or case_number))
+        elif "case_number" in applied:
+            requests.append(_retag_request(case_number, applied["case_number"]))
+
+        if requests:
+            try:
+                service.spreadsheets().batchUpdate(spreadsheetId=SHEET_ID, body={"requests": requests}).execute()
+            except Exception as e:
+                log(f"Failed to update the metadata tag of '{case_number}': {e}")
+
+        if not docket_index.update(case_number, applied):
+            docket_index.invalidate()
+
+        return {"success": True, "message": f"Case '{case_number}' successfully updated."}
+
+    except Exception as e:
+        return {"success": False, "message": f"Error updating docket: {e}"}
 
 
 
@@ -492,100 +875,28 @@ def get_case_info_from_number(case_number: str) -> dict:
       }
     Assumptions: sheet columns match add_to_docket order:
       [judge, case_status, case_name, case_number, filing_date, filing_link, ...]
+    Served from the docket index when it is fresh; otherwise only the case's tagged row is read.
     """
-    def _extract_url(cell: str) -> str | None:
-        if not cell:
-            return None
-        # Strip leading/trailing whitespace and formulas
-        cell = str(cell).strip()
-        if not cell:
-            return None
-        # handle =HYPERLINK("url","Label") or =HYPERLINK('url','Label')
-        # Try double quotes first
-        m = re.search(r'HYPERLINK\s*\(\s*"([^"]+)"', cell, re.IGNORECASE)
-        if m:
-            url = m.group(1).strip()
-            if url.startswith('http://') or url.startswith('https://'):
-                return url
-        # Try single quotes
-        m = re.search(r"HYPERLINK\s*\(\s*'([^']+)'", cell, re.IGNORECASE)
-        if m:
-            url = m.group(1).strip()
-            if url.startswith('http://') or url.startswith('https://'):
-                return url
-        # Find a plain URL if present
-        m = re.search(r'(https?://[^\s"\']+)', cell)
-        if m:
-            url = m.group(1).rstrip('"\')')
-            if url.startswith('http://') or url.startswith('https://'):
-                return url
-        return None
-
-    def _normalize(s: str) -> str:
-        if s is None:
-            return ""
-        # Replace NBSP and other common invisible chars, collapse whitespace, lower-case
-        s = s.replace('\u00A0', ' ').replace('\u200b', '').strip()
-        s = re.sub(r'\s+', ' ', s)
-
-        return s.lower()
-    
-
     try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build('sheets', 'v4', credentials=creds)
-
-        # Read with valueRenderOption="FORMULA" to get formulas, then extract URLs from HYPERLINK
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=DATA_SHEET_RANGE,
-            valueRenderOption="FORMULA"
-        ).execute()
-
-        rows = result.get('values', [])
-        if not rows:
-            return {"success": False, "message": "Sheet is empty or no values returned."}
-
-        target = _normalize(case_number)
-        # columns per add_to_docket: 0=judge,1=case_status,2=case_name,3=case_number,4=filing_date,5=link
-        case_number_col = 3
-
-        # iterate rows and compute the actual sheet row number using DATA_START_ROW
-        for offset, row in enumerate(rows):
-            sheet_row = DATA_START_ROW + offset
-            # protect against short rows
-            if len(row) <= case_number_col:
-                continue
-
-            cell_raw = row[case_number_col] or ""
-            visible_text = cell_raw
-            m_label = re.search(r'HYPERLINK\(\s*"[^"]+"\s*,\s*"([^"]+)"', cell_raw, re.IGNORECASE)
-            if m_label:
-                visible_text = m_label.group(1)
-            normalized_cell = _normalize(visible_text)
-
-            if normalized_cell == target:
-                case_name = row[2] if len(row) > 2 else None
-                case_status = row[1] if len(row) > 1 else None
-                filing_date = row[4] if len(row) > 4 else None
-                link_cell = row[5] if len(row) > 5 else None
-                # Extract URL from HYPERLINK formula; if no formula, try to extract plain URL
-                link = _extract_url(link_cell) if link_cell else None
-                judge = row[0] if len(row) > 0 else "NA"
-
-                return {
-                    "success": True,
-                    "row_number": sheet_row,
-                    "case_name": case_name,
-                    "case_status": case_status,
-                    "filing_date": filing_date,
-                    "link": link,
-                    "judge": judge
+        service = _sheets_service()
+        if not docket_index.is_fresh():
+            result = service.spreadsheets().values().batchGetByDataFilter(
+                spreadsheetId=SHEET_ID,
+                body={
+                    "dataFilters": [_case_filter(case_number)],
+                    "valueRenderOption": "FORMULA",
+                    "dateTimeRenderOption": "FORMATTED_STRING"
                 }
+            ).execute()
+            matched = _matched_case_row(result.get("valueRanges", []))
+            if matched:
+                return _case_info_result(parse_docket_row(matched[1], matched[0]))
+
+        case = _find_case(service, case_number)
+        if case is None:
+            return {"success": False, "message": f"Case number '{case_number}' not found."}
 
-        return {"success": False, "message": f"Case number '{case_number}' not found."}
+        return _case_info_result(case)
 
     except Exception as e:
         return {"success": False, "message": f"Error reading sheet: {e}"}
@@ -594,56 +905,23 @@ def get_case_info_from_number(case_number: str) -> dict:
 
 
 
-def get_all_cases() -> dict:
+def get_all_cases(refresh: bool = True) -> dict:
     """
     Retrieves all cases from the docket sheet.
     Returns a dictionary with success status, list of cases, and error message if any.
     Each case is represented as a dictionary with keys:
       judge, case_status, case_name, case_number, filing_date, filing_link
+    The read also rebuilds the docket index. Pass refresh=False to serve from the index when it is fresh.
     """
     try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        # Read with valueRenderOption="FORMULA" to get formulas for HYPERLINK extraction
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range=DATA_SHEET_RANGE,
-            valueRenderOption="FORMULA"
-        ).execute()
+        if refresh or not docket_index.is_fresh():
+            service = _sheets_service()
+            docket_index.rebuild(_read_docket_rows(service))
 
-        values = result.get('values', [])
-        if not values:
+        cases = docket_index.all_cases()
+        if not cases:
             return {"success": True, "cases": [], "message": "No data found in the sheet."}
 
-        cases = []
-        for offset, row in enumerate(values):
-            # compute actual sheet row number
-            sheet_row = DATA_START_ROW + offset
-            case = {
-                "judge": row[0] if len(row) > 0 else "",
-                "case_status": row[1] if len(row) > 1 else "",
-                "case_name": row[2] if len(row) > 2 else "",
-                "case_number": row[3] if len(row) > 3 else "",
-                "filing_date": row[4] if len(row) > 4 else "",
-                "filing_link": None,
-                "row_number": sheet_row
-            }
-            if len(row) > 5:
-                link_cell = row[5]
-                # Extract URL from HYPERLINK formula
-                m = re.search(r'HYPERLINK\(\s*"([^\"]+)"', link_cell, re.IGNORECASE)
-                if m:
-                    case["filing_link"] = m.group(1)
-                else:
-                    # Try plain URL if present
-                    m_plain = re.search(r'(https?://\S+)', link_cell)
-                    if m_plain:
-                        case["filing_link"] = m_plain.group(1).rstrip('\")')
-            cases.append(case)
-
         return {"success": True, "cases": cases}
 
     except Exception as e:
@@ -657,46 +935,36 @@ def delete_case_row(case_name: str, case_number: str) -> dict:
     """
     Deletes a case from the docket completely by removing the entire row from the sheet.
     Takes in the case name and case number, finds the matching row, and deletes it.
+    The row is found through its developer metadata tag, otherwise through the docket index.
+    Either way the row itself is read first and must hold both the name and the number.
     """
     try:
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        # Column mapping
-        column_indices = {
-            "judge": 0,
-            "case_status": 1,
-            "case_name": 2,
-            "case_number": 3,
-            "filing_date": 4,
-            "filing_link": 5,
-        }
+        service = _sheets_service()
 
-        # Read data from configured data range (skips headers)
-        result = service.spreadsheets().values().get(
+        row_index_to_delete = -1
+        result = service.spreadsheets().values().batchGetByDataFilter(
             spreadsheetId=SHEET_ID,
-            range=DATA_SHEET_RANGE
+            body={"dataFilters": [_case_filter(case_number)], "valueRenderOption": "FORMULA"}
         ).execute()
+        matched = _matched_case_row(result.get("valueRanges", []))
+        if matched and _row_is_case(matched[1], matched[0], case_name, case_number):
+            row_index_to_delete = matched[0] - 1
 
-        values = result.get("values", [])
-        if not values:
-            return {"success": False, "message": "No data found in the sheet."}
-
-        row_index_to_delete = -1
-        # find matching row and compute 0-based sheet index for deletion
-        for offset, row in enumerate(values):
-            sheet_row = DATA_START_ROW + offset
-            if len(row) <= column_indices["case_number"]:
-                continue
-            if (
-                (row[column_indices["case_name"]] or "").strip().lower() == case_name.strip().lower()
-                and (row[column_indices["case_number"]] or "").strip().lower() == case_number.strip().lower()
-            ):
+        for attempt in range(0 if row_index_to_delete != -1 else 2):
+            case = _find_case(service, case_number)
+            if case is None or normalize_key(case["case_name"]) != normalize_key(case_name):
+                break
+            row = service.spreadsheets().values().get(
+                spreadsheetId=SHEET_ID,
+                range=_docket_row_range(case["row_number"]),
+                valueRenderOption="FORMULA"
+            ).execute().get("values", [[]])
+            if _row_is_case(row[0] if row else [], case["row_number"], case_name, case_number):
                 # batchUpdate expects 0-based row index
-                row_index_to_delete = sheet_row - 1
+                row_index_to_delete = case["row_number"] - 1
                 break
+            log(f"Docket row {case['row_number']} no longer holds '{case_number}', re-reading docket")
+            docket_index.invalidate()
 
         if row_index_to_delete == -1:
             return {
@@ -706,13 +974,7 @@ def delete_case_row(case_name: str, case_number: str) -> dict:
 
 
         # Get sheetId for "Pending Cases"
-        sheet_metadata = service.spreadsheets().get(spreadsheetId=SHEET_ID).execute()
-        sheets = sheet_metadata.get("sheets", [])
-        pending_cases_id = None
-        for s in sheets:
-            if s["properties"]["title"] == SHEET_NAME:
-                pending_cases_id = s["properties"]["sheetId"]
-                break
+        pending_cases_id = _sheet_id(SHEET_NAME)
 
         if pending_cases_id is None:
             return {"success": False, "message": f"Sheet '{SHEET_NAME}' not found."}
@@ -720,22 +982,12 @@ def delete_case_row(case_name: str, case_number: str) -> dict:
         # Delete the entire row
         service.spreadsheets().batchUpdate(
             spreadsheetId=SHEET_ID,
-            body={
-                "requests": [
-                    {
-                        "deleteDimension": {
-                            "range": {
-                                "sheetId": pending_cases_id,
-                                "dimension": "ROWS",
-                                "startIndex": row_index_to_delete,
-                                "endIndex": row_index_to_delete + 1,
-                            }
-                        }
-                    }
-                ]
-            },
+            body={"requests": [delete_row_request(pending_cases_id, row_index_to_delete + 1)]},
         ).execute()
 
+        if not docket_index.remove(case_number):
+            docket_index.invalidate()
+
         return {"success": True, "message": f"Deleted case with name '{case_name}' and number '{case_number}'."}
 
     except Exception as e:
@@ -769,6 +1021,10 @@ def finish_case(case_info: dict) -> dict:
     it will then put it in the empty data range as so: Case name, case number, filing date, filing link, Verdict date (todays date in MM/DD/YY), case ending type with the type of ending and hyperlinked within it the ending link.
 
     it will return dict like otehrs to show status of operation
+
+    The case-log append and the docket row delete go out in one spreadsheets.batchUpdate,
+    so a case is never logged without being removed from Pending Cases (or the other way round).
+    One batchGetByDataFilter reads the case's tagged docket row and confirms the cached case-log row.
     """
 
     try:
@@ -777,114 +1033,74 @@ def finish_case(case_info: dict) -> dict:
         if not case_number:
             return {"success": False, "message": "Missing case_number in case_info."}
 
-        ending_type = case_info.get("ending_type") or case_info.get("case_ending_type") or "Other"
-        ending_link = case_info.get("ending_link") or case_info.get("ending_url") or ""
-
-        # Lookup authoritative case info
-        lookup = get_case_info_from_number(case_number)
-        if lookup.get("success"):
-            case_name = lookup.get("case_name") or case_info.get("case_name") or ""
-            filing_date = lookup.get("filing_date") or case_info.get("filing_date") or ""
-            filing_link = lookup.get("link") or case_info.get("filing_link") or ""
-        else:
-            case_name = case_info.get("case_name") or ""
-            filing_date = case_info.get("filing_date") or ""
-            filing_link = case_info.get("filing_link") or ""
-
-        # Debug: log what we found
-        print(f"[finish_case DEBUG] case_number={case_number}, filing_link='{filing_link}', lookup_success={lookup.get('success')}")
-
-        # Determine whether criminal or civil from case_number
-        # Match "Crim" or "CRIMINAL" (case-insensitive), but not "Civ"
-        is_criminal = bool(re.search(r"\bcrim(inal)?\b", case_number, re.IGNORECASE))
+        target = _case_log_target(case_number)
+        if not target.get("success"):
+            return target
+        sheet_name, start_col, start_row = target["sheet_name"], target["start_col"], target["start_row"]
 
-        # Choose the proper case-log range from config
-        target_range_config = CASE_LOG_RANGE_CRIMINAL if is_criminal else CASE_LOG_RANGE_CIVIL
-        if not target_range_config:
-            return {"success": False, "message": "Case log range for the case type is not configured in config.yaml."}
+        service = _sheets_service()
 
-        # Normalize to an appendable range: 'Sheet!A:F'
+        # One read finds the tagged docket row and the next empty case-log row
+        log_range, cached_log_row = _case_log_range(target)
         try:
-            sheet_name = target_range_config.split('!', 1)[0]
-        except Exception:
-            return {"success": False, "message": "Malformed case log range in config.yaml."}
-
-        log_append_range = f"{sheet_name}!A:F"
-
-        # Verdict date in MM/DD/YY
-        verdict_date = datetime.datetime.utcnow().strftime("%m/%d/%y")
+            result = service.spreadsheets().values().batchGetByDataFilter(
+                spreadsheetId=SHEET_ID,
+                body={
+                    "dataFilters": [_case_filter(case_number), {"a1Range": log_range}],
+                    "valueRenderOption": "FORMULA",
+                    "dateTimeRenderOption": "FORMATTED_STRING"
+                }
+            ).execute()
+        except Exception as e:
+            return {"success": False, "message": f"Failed to read docket and case log tab: {e}"}
+        value_ranges = result.get("valueRanges", [])
+        matched = _matched_case_row(value_ranges)
+        log_row = _case_log_next_row(target, cached_log_row, _matched_a1_values(value_ranges, log_range))
 
-        # Ending cell: hyperlink if link provided
-        if ending_link:
-            ending_cell = f'=HYPERLINK("{ending_link}", "{ending_type}")'
+        # Lookup authoritative case info
+        if matched:
+            docket_row = matched[0]
+            lookup = _case_info_result(parse_docket_row(matched[1], docket_row))
         else:
-            ending_cell = ending_type
+            # Untagged row: find it through the docket index
+            docket_row = _locate_row(service, case_number)
+            case = docket_index.get(case_number)
+            lookup = _case_info_result(case) if case else {"success": False}
+        if docket_row is None:
+            return {"success": False, "message": f"Failed to delete case from Pending Cases: Case number '{case_number}' not found."}
+
+        if log_row is None:
+            values = service.spreadsheets().values().get(
+                spreadsheetId=SHEET_ID,
+                range=f"{sheet_name}!{start_col}{start_row}:{start_col}"
+            ).execute().get('values', [])
+            log_row = start_row + len(values)
 
-        # Prepare filing cell as HYPERLINK formula if URL present, else empty
-        if filing_link:
-            filing_cell = f'=HYPERLINK("{filing_link}", "Link")'
-        else:
-            filing_cell = ""
-
-        print(f"[finish_case DEBUG] filing_cell before write='{filing_cell}'")
-
-        new_row = [
-            case_name,
-            case_number,
-            filing_date,
-            filing_cell,
-            verdict_date,
-            ending_cell,
-        ]
-
-        # Append to the case log
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
-
-        # Parse the target range to get the starting column and sheet name
-        # e.g., "Case Log!J5:O5" -> sheet="Case Log", start_col="J", start_row=5
-        try:
-            sheet_name, range_part = target_range_config.split('!', 1)
-            m = re.match(r'([A-Za-z]+)(\d+)', range_part)
-            if not m:
-                return {"success": False, "message": "Invalid case log range format."}
-            start_col = m.group(1)
-            start_row = int(m.group(2))
-        except Exception as e:
-            return {"success": False, "message": f"Failed to parse case log range: {e}"}
+        new_row = _build_case_log_row(case_info, lookup)
 
-        # Read the sheet to find the next empty row in the target column range
+        pending_cases_id = _sheet_id(SHEET_NAME)
+        case_log = _sheet_props(sheet_name)
+        if pending_cases_id is None or case_log is None:
+            return {"success": False, "message": f"Sheet '{SHEET_NAME if pending_cases_id is None else sheet_name}' not found."}
+
+        _, _, start_col_index = _a1_to_grid(f"{sheet_name}!{start_col}{log_row}")
         try:
-            # Read from start_row downward to find the first empty row in the start column
-            read_range = f"{sheet_name}!{start_col}{start_row}:{start_col}"
-            result = service.spreadsheets().values().get(
+            service.spreadsheets().batchUpdate(
                 spreadsheetId=SHEET_ID,
-                range=read_range
+                body={"requests": _grid_growth(sheet_name, case_log, log_row) + [
+                    update_cells_request(case_log["sheet_id"], log_row - 1, start_col_index, [new_row]),
+                    delete_row_request(pending_cases_id, docket_row),
+                ]}
             ).execute()
-            values = result.get('values', [])
-            
-            # Find the first empty row
-            next_row = start_row + len(values)
-        except Exception as e:
-            # If read fails, default to start_row
-            return {"success": False, "message": f"Failed to find first column in case log tab: {e}"}
+        except Exception:
+            docket_index.invalidate()
+            sheet_metadata.invalidate()
+            _remember_case_log_row(target, None)
+            raise
 
-        write_range = f"{sheet_name}!{start_col}{next_row}"
-        body = {"values": [new_row]}
-        service.spreadsheets().values().update(
-            spreadsheetId=SHEET_ID,
-            range=write_range,
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
-
-        # if success, delete the message from pending cases with delete case
-        try:
-            delete_case_row(case_name, case_number)
-        except Exception as e:
-            return {"success": False, "message": f"Failed to delete case from Pending Cases: {e}"}
+        if not docket_index.remove(case_number):
+            docket_index.invalidate()
+        _remember_case_log_row(target, log_row + 1)
 
         return {"success": True, "message": "Case finished and appended to case log.", "appended_row": new_row}
 
@@ -892,6 +1108,28 @@ def finish_case(case_info: dict) -> dict:
         return {"success": False, "message": f"Error finishing case: {e}"}
 
 
+JUDGES_RANGE = "Data!A3:K"
+
+
+def _judges_from_rows(values: list) -> list:
+    """Judges marked "Valid" in the Data tab rows (name A, status B, availability C, discord id K)."""
+    judges = []
+    for row in values:
+        judge_name = row[0] if len(row) > 0 else ""
+        judge_status = row[1] if len(row) > 1 else ""
+        case_availability = row[2] if len(row) > 2 else ""
+        discord_id = row[10] if len(row) > 10 else ""
+
+        if judge_status.strip().lower() == "valid":
+            judges.append({
+                "judge_name": judge_name,
+                "judge_status": judge_status,
+                "case_availability": case_availability,
+                "discord_id": discord_id
+            })
+    return judges
+
+
 def get_judges(refresh: bool = True) -> dict:
     """
     function to pull all judges from the docket sheet.
@@ -908,35 +1146,16 @@ def get_judges(refresh: bool = True) -> dict:
     """
     try:
 
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
+        service = _sheets_service()
         result = service.spreadsheets().values().get(
             spreadsheetId=SHEET_ID,
-            range="Data!A3:K"
+            range=JUDGES_RANGE
         ).execute()
         values = result.get("values", [])
         if not values:
             return {"success": True, "judges": [], "message": "No judge data found in the sheet."}
-        
-
-
-
-        judges = []
-        for row in values:
-            judge_name = row[0] if len(row) > 0 else ""
-            judge_status = row[1] if len(row) > 1 else ""
-            case_availability = row[2] if len(row) > 2 else ""
-            discord_id = row[10] if len(row) > 10 else ""
 
-            if judge_status.strip().lower() == "valid":
-                judges.append({
-                    "judge_name": judge_name,
-                    "judge_status": judge_status,
-                    "case_availability": case_availability,
-                    "discord_id": discord_id
-                })
+        judges = _judges_from_rows(values)
 
         if not refresh:
             pass
@@ -978,10 +1197,7 @@ def toggle_judge_activity_status(judge, activity_status) -> dict:
         if activity_status.strip().lower() not in ["active", "unavailable"]:
             return {"success": False, "message": "Invalid activity status. Must be 'Active' or 'Unavailable'."}
         
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES_SHEETS
-        )
-        service = build("sheets", "v4", credentials=creds)
+        service = _sheets_service()
 
         # Read data from configured data range (skips headers)
         result = service.spreadsheets().values().get(
@@ -0,0 +1,159 @@
+"""
+Judge assignment: picks the least-loaded eligible judge for a new case.
+
+The roster comes from the Data tab (judges marked Valid; only Active ones take cases) and each
+judge's load is the number of docket cases carrying their name, plus assignment requests they
+haven't answered yet. Judges sit in a heap keyed by (load, last assigned), so a pick is a heap
+pop instead of a sheet scan, and judges with equal load take turns. Entries go stale when a
+load changes; stale ones are dropped when they reach the top of the heap.
+
+Judges who denied the case and judges named as a party in the case name are skipped.
+"""
+
+import heapq
+import re
+import time
+
+from services.docket_index import normalize_key
+
+
+_PARTY_SPLIT = re.compile(r'\s+v(?:s)?\.?\s+', re.IGNORECASE)
+
+
+def case_parties(case_name: str) -> set[str]:
+    """Normalized party names of a case name like "SD v. Ed"."""
+    return {normalize_key(p) for p in _PARTY_SPLIT.split(case_name or "") if normalize_key(p)}
+
+
+class JudgeScheduler:
+    """
+    pick(excluded, case_name) -> discord id of the judge to ask, or None.
+
+    Used from the event loop only, so no locking. rebuild() replaces the roster and docket loads;
+    open assignment requests survive it.
+    """
+
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._judges = {}        # discord id -> {"judge_name", "active"}
+        self._by_name = {}       # normalized judge name -> discord id
+        self._docket_load = {}   # discord id -> docket cases carrying the judge's name
+        self._offers = {}        # discord id -> assignment requests not yet answered
+        self._last_assigned = {} # discord id -> time.monotonic() of the last request sent
+        self._heap = []          # (load, last assigned, discord id)
+        self._built_at = None
+        self._stats = {"rebuilds": 0, "picks": 0, "none_available": 0}
+
+    # ---- building / freshness ----
+    def rebuild(self, judges: list, cases: list):
+        """
+        judges: get_judges() entries (already Valid only); cases: docket rows as parsed by the
+        docket index, whose "judge" column holds a judge name (or id).
+        """
+        self._judges = {}
+        self._by_name = {}
+        for judge in judges:
+            discord_id = str(judge.get("discord_id") or "").strip()
+            if not discord_id:
+                continue
+            self._judges[discord_id] = {
+                "judge_name": judge.get("judge_name") or discord_id,
+                "active": (judge.get("case_availability") or "").strip().lower() == "active",
+            }
+            self._by_name[normalize_key(judge.get("judge_name"))] = discord_id
+
+        self._docket_load = {discord_id: 0 for discord_id in self._judges}
+        for case in cases:
+            discord_id = self.judge_id(case.get("judge"))
+            if discord_id is not None:
+                self._docket_load[discord_id] += 1
+
+        self._heap = [(self._load(j), self._last_assigned.get(j, 0.0), j) for j in self._judges]
+        heapq.heapify(self._heap)
+        self._built_at = time.monotonic()
+        self._stats["rebuilds"] += 1
+
+    def is_fresh(self) -> bool:
+        return self._built_at is not None and time.monotonic() - self._built_at < self.ttl_seconds
+
+    def invalidate(self):
+        self._built_at = None
+
+    # ---- lookups ----
+    def judge_id(self, judge) -> str | None:
+        """Discord id for a judge name or id as written in the docket, or None if not on the roster."""
+        judge = str(judge or "").strip()
+        if judge in self._judges:
+            return judge
+        return self._by_name.get(normalize_key(judge))
+
+    def judge_name(self, discord_id: str) -> str | None:
+        judge = self._judges.get(str(discord_id))
+        return judge["judge_name"] if judge else None
+
+    def _load(self, discord_id: str) -> int:
+        return self._docket_load.get(discord_id, 0) + self._offers.get(discord_id, 0)
+
+    def _push(self, discord_id: str):
+        heapq.heappush(self._heap, (self._load(discord_id), self._last_assigned.get(discord_id, 0.0), discord_id))
+        if len(self._heap) > 4 * len(self._judges) + 16:
+            # Mostly stale entries: rebuild from the current loads
+            self._heap = [(self._load(j), self._last_assigned.get(j, 0.0), j) for j in self._judges]
+            heapq.heapify(self._heap)
+
+    # ---- assignment ----
+    def pick(self, excluded=(), case_name: str = None) -> str | None:
+        """
+        Least-loaded active judge not in excluded and not a party to case_name; ties go to the
+        judge asked longest ago. Counts the pick as an open request until accept() or decline().
+        """
+        excluded = {str(j) for j in excluded or ()}
+        parties = case_parties(case_name)
+        skipped = []
+        chosen = None
+        while self._heap:
+            load, last, discord_id = heapq.heappop(self._heap)
+            judge = self._judges.get(discord_id)
+            if judge is None or (load, last) != (self._load(discord_id), self._last_assigned.get(discord_id, 0.0)):
+                continue  # left the roster, or a newer entry for this judge is in the heap
+            if not judge["active"] or discord_id in excluded or normalize_key(judge["judge_name"]) in parties:
+                skipped.append((load, last, discord_id))
+                continue
+            chosen = discord_id
+            break
+
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+        if chosen is None:
+            self._stats["none_available"] += 1
+            return None
+        self._offers[chosen] = self._offers.get(chosen, 0) + 1
+        self._last_assigned[chosen] = time.monotonic()
+        self._push(chosen)
+        self._stats["picks"] += 1
+        return chosen
+
+    def accept(self, discord_id: str):
+        """The judge took the case: the open request becomes a docket case."""
+        discord_id = str(discord_id)
+        self._offers[discord_id] = max(0, self._offers.get(discord_id, 0) - 1)
+        self._docket_load[discord_id] = self._docket_load.get(discord_id, 0) + 1
+        if discord_id in self._judges:
+            self._push(discord_id)
+
+    def decline(self, discord_id: str):
+        """The judge denied the case: drop the open request."""
+        discord_id = str(discord_id)
+        self._offers[discord_id] = max(0, self._offers.get(discord_id, 0) - 1)
+        if discord_id in self._judges:
+            self._push(discord_id)
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            judges=len(self._judges),
+            active=sum(1 for j in self._judges.values() if j["active"]),
+            open_requests=sum(self._offers.values()),
+            fresh=self.is_fresh(),
+        )
@@ -0,0 +1,229 @@
+"""
+Quota-aware rate limiting and retries for Google API calls.
+
+Sheets counts reads and writes against separate per-minute quotas (per project and per user),
+and Docs has its own read quota, so each gets a token bucket. A call takes a token first,
+waiting briefly if the bucket is empty, so a burst of submissions queues instead of failing
+with 429. Calls that still fail with 429/5xx or a dropped connection are retried with
+jittered exponential backoff, honouring Retry-After when the server sends it.
+
+A 429 means the request was refused, so anything is retried after one. A 5xx, a timeout or a
+dropped connection may come after the request was applied, so only idempotent requests are
+retried then: sending values.append or an appendCells batchUpdate again would add a second row.
+
+Used by both the googleapiclient path (RateLimitedHttpRequest, passed to build() as
+requestBuilder) and the aiohttp path (AsyncGoogleClient.request).
+"""
+
+import asyncio
+import email.utils
+import json
+import random
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from utils.logger import log
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# batchUpdate requests that leave the sheet the same when applied twice
+_IDEMPOTENT_SHEET_REQUESTS = {
+    "updateCells", "repeatCell", "updateSheetProperties", "updateDimensionProperties",
+    "updateDeveloperMetadata", "deleteDeveloperMetadata",
+}
+
+
+class TokenBucket:
+    """
+    per_minute tokens a minute, up to capacity at once. Thread-safe.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, per_minute / 2)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Takes a token if one is available and returns 0, else returns the seconds to wait for one."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._refill()
+            return int(self._tokens)
+
+
+def retry_after_seconds(value) -> float | None:
+    """Parses a Retry-After header (delay in seconds or an HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def request_kind(method: str, uri: str) -> str:
+    """Which budget a Google API request counts against: "docs" (Docs and Drive), "read" or "write"."""
+    path = uri.split("?", 1)[0]
+    # Matched on the path too, so the budgets still apply when api_base_url points elsewhere
+    if "docs.googleapis.com" in uri or "/drive/v3/" in path or "/v1/documents/" in path:
+        return "docs"
+    if method.upper() == "GET" or path.endswith((":batchGetByDataFilter", "developerMetadata:search")):
+        return "read"
+    return "write"
+
+
+def is_idempotent(method: str, uri: str, body=None) -> bool:
+    """
+    Whether sending a request twice has the same effect as sending it once: reads, value
+    overwrites, and batchUpdates made only of _IDEMPOTENT_SHEET_REQUESTS. body is the JSON
+    body, as a dict or a string.
+    """
+    method = method.upper()
+    path = uri.split("?", 1)[0]
+    if method in ("GET", "PUT"):
+        return True
+    if path.endswith((":batchGetByDataFilter", "developerMetadata:search", "/values:batchUpdate",
+                      ":batchUpdateByDataFilter", ":clear", ":batchClear")):
+        return True
+    if path.endswith(":batchUpdate"):
+        if isinstance(body, (str, bytes)):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return False
+        requests = (body or {}).get("requests") or []
+        return bool(requests) and all(set(r) <= _IDEMPOTENT_SHEET_REQUESTS for r in requests)
+    return False
+
+
+def should_retry(status: int, idempotent: bool) -> bool:
+    """429 for any request; other retryable statuses only for idempotent ones."""
+    return status == 429 or (idempotent and status in RETRYABLE_STATUSES)
+
+
+class GoogleRateLimiter:
+    """
+    Token buckets for Sheets reads, Sheets writes and Docs/Drive reads, plus the retry policy.
+
+    quota() reports the tokens left in each bucket and how many calls were throttled or retried.
+    """
+
+    def __init__(self, read_per_minute: float = 60, write_per_minute: float = 60, docs_per_minute: float = 300,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0):
+        self.buckets = {
+            "read": TokenBucket(read_per_minute),
+            "write": TokenBucket(write_per_minute),
+            "docs": TokenBucket(docs_per_minute),
+        }
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._stats = {"throttled": 0, "retries": 0, "gave_up": 0}
+
+    def count_event(self, key: str):
+        """Bumps one of the throttled/retries/gave_up counters."""
+        with self._lock:
+            self._stats[key] += 1
+
+    def backoff(self, attempt: int, retry_after=None) -> float:
+        """Delay before retry number attempt (0-based): Retry-After if given, else full-jitter exponential."""
+        delay = retry_after_seconds(retry_after)
+        if delay is not None:
+            return min(delay, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # ---- blocking (executor threads) ----
+    def acquire(self, kind: str):
+        """Takes a token from kind's bucket, sleeping until one is available."""
+        wait = self.buckets[kind].try_acquire()
+        if wait:
+            self.count_event("throttled")
+        while wait:
+            time.sleep(wait)
+            wait = self.buckets[kind].try_acquire()
+
+    def call(self, kind: str, fn, idempotent: bool = True):
+        """
+        Runs fn() under kind's budget, retrying retryable failures. With idempotent=False only
+        429s are retried (see is_idempotent).
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(kind)
+            try:
+                return fn()
+            except HttpError as e:
+                status = int(getattr(e.resp, "status", 0) or 0)
+                if not should_retry(status, idempotent) or attempt == self.max_retries:
+                    if should_retry(status, idempotent):
+                        self.count_event("gave_up")
+                    raise
+                delay = self.backoff(attempt, e.resp.get("retry-after"))
+                log(f"Google API {kind} request failed with HTTP {status}; retrying in {delay:.1f}s")
+            except (ConnectionError, TimeoutError) as e:
+                if not idempotent:
+                    raise
+                if attempt == self.max_retries:
+                    self.count_event("gave_up")
+                    raise
+                delay = self.backoff(attempt)
+                log(f"Google API {kind} request failed ({e}); retrying in {delay:.1f}s")
+            self.count_event("retries")
+            time.sleep(delay)
+
+    # ---- asyncio ----
+    async def acquire_async(self, kind: str):
+        """Async acquire: waits on the event loop instead of blocking it."""
+        wait = self.buckets[kind].try_acquire()
+        if wait:
+            self.count_event("throttled")
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self.buckets[kind].try_acquire()
+
+    def quota(self) -> dict:
+        """Tokens left per budget, their per-minute rates, and throttle/retry counters."""
+        with self._lock:
+            stats = dict(self._stats)
+        return dict(
+            stats,
+            **{kind: {"remaining": bucket.remaining(), "per_minute": bucket.per_minute}
+               for kind, bucket in self.buckets.items()}
+        )
+
+
+def rate_limited_request(limiter: GoogleRateLimiter):
+    """
+    An HttpRequest class for build(requestBuilder=...) whose execute() goes through limiter.
+    """
+
+    class RateLimitedHttpRequest(HttpRequest):
+        def execute(self, http=None, num_retries=0):
+            kind = request_kind(self.method, self.uri)
+            return limiter.call(kind, lambda: HttpRequest.execute(self, http=http),
+                                idempotent=is_idempotent(self.method, self.uri, self.body))
+
+    return RateLimitedHttpRequest
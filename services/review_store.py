@@ -0,0 +1,94 @@
+"""
+Durable state of open internal review messages.
+
+The review buttons are persistent views: after a restart discord.py routes a click to a view
+registered with no state, so the state behind each review message (case info, doc link, filing
+date, original message) is written to a small SQLite file keyed by the review message id.
+A click loads it by primary key, through an in-memory LRU of recently used reviews, so nothing
+has to be fetched, classified or numbered again. Rows are deleted once a review is closed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReviewStore:
+    """
+    review message id -> state dict (anything JSON-serialisable). Thread-safe.
+    """
+
+    def __init__(self, path: str, cache_size: int = 256):
+        self.path = path
+        self.cache_size = max(1, int(cache_size))
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()     # message id -> state, most recently used last
+        self._stats = {"hits": 0, "loads": 0, "misses": 0, "stores": 0, "deletes": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reviews ("
+            " message_id INTEGER PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def put(self, message_id: int, state: dict):
+        """Stores (or replaces) the state of a review message."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO reviews (message_id, state, updated) VALUES (?, ?, ?)",
+                (message_id, json.dumps(state), time.time())
+            )
+            self._db.commit()
+            self._remember(message_id, state)
+            self._stats["stores"] += 1
+
+    def get(self, message_id: int) -> dict | None:
+        """Returns the state of a review message from memory, else from disk, else None."""
+        with self._lock:
+            state = self._cache.get(message_id)
+            if state is not None:
+                self._cache.move_to_end(message_id)
+                self._stats["hits"] += 1
+                return state
+
+            row = self._db.execute("SELECT state FROM reviews WHERE message_id = ?", (message_id,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            state = json.loads(row[0])
+            self._remember(message_id, state)
+            self._stats["loads"] += 1
+            return state
+
+    def delete(self, message_id: int):
+        """Forgets a closed review."""
+        with self._lock:
+            self._cache.pop(message_id, None)
+            self._db.execute("DELETE FROM reviews WHERE message_id = ?", (message_id,))
+            self._db.commit()
+            self._stats["deletes"] += 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, cached=len(self._cache), path=self.path)
+
+    # Called with the lock held
+    def _remember(self, message_id: int, state: dict):
+        self._cache[message_id] = state
+        self._cache.move_to_end(message_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
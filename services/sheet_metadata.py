@@ -0,0 +1,71 @@
+"""
+Cached tab properties of the spreadsheet.
+
+Tab ids and grid sizes come from one spreadsheets.get with the METADATA_FIELDS mask, fetched at
+startup and again only when a tab is missing or the cache is invalidated. The bot's own
+appendDimension requests are recorded with grow(), so grid sizes stay current without re-fetching.
+"""
+
+import threading
+
+
+# Only the tab properties; no cell data, named ranges or developer metadata
+METADATA_FIELDS = "sheets.properties(sheetId,title,gridProperties)"
+
+
+class SheetMetadataCache:
+    """
+    Tab title -> {"sheet_id", "row_count", "column_count"}.
+
+    Does no I/O itself: callers fetch with METADATA_FIELDS and pass the response to load().
+    Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tabs = {}
+        self._loaded = False
+        self._stats = {"loads": 0, "hits": 0, "misses": 0}
+
+    def load(self, metadata: dict):
+        """Replaces the cache with a spreadsheets.get response fetched with METADATA_FIELDS."""
+        tabs = {}
+        for sheet in metadata.get("sheets", []):
+            props = sheet.get("properties", {})
+            grid = props.get("gridProperties", {})
+            tabs[props["title"]] = {
+                "sheet_id": props["sheetId"],
+                "row_count": grid.get("rowCount", 0),
+                "column_count": grid.get("columnCount", 0),
+            }
+        with self._lock:
+            self._tabs = tabs
+            self._loaded = True
+            self._stats["loads"] += 1
+
+    def get(self, title: str) -> dict | None:
+        """Returns a copy of the tab's properties, or None if unknown (caller should load)."""
+        with self._lock:
+            tab = self._tabs.get(title)
+            self._stats["hits" if tab else "misses"] += 1
+            return dict(tab) if tab else None
+
+    def is_loaded(self) -> bool:
+        with self._lock:
+            return self._loaded
+
+    def grow(self, title: str, rows: int):
+        """Records rows the bot appended to a tab's grid."""
+        with self._lock:
+            if title in self._tabs:
+                self._tabs[title]["row_count"] += rows
+
+    def invalidate(self):
+        """Forgets everything; the next lookup re-fetches (e.g. after a tab was renamed)."""
+        with self._lock:
+            self._tabs = {}
+            self._loaded = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, tabs=len(self._tabs))
@@ -0,0 +1,312 @@
+"""
+Write-coalescing queue for Sheets mutations.
+
+Callers submit appends, cell updates, counter bumps or raw batchUpdate requests.
+Everything submitted within a short window (google.write_coalesce_ms) goes out as one
+spreadsheets.batchUpdate. Each submit() call gets its own result: if the server rejects the
+combined batch (a 4xx other than 429; batchUpdate is atomic, so nothing was applied), each
+submission is re-sent on its own so that only the failing one reports an error. After a 5xx or
+a dropped connection the batch may have been applied, so it is not re-sent and every submission
+in it reports the error.
+
+Mutations passed to one submit() call are a group. They always travel in the same
+batchUpdate, so they are applied together or not at all.
+
+Batches are sent one at a time, in submission order: many writes address rows by position
+(deleteDimension, updateCells at a known row), so a later batch must never overtake an earlier one.
+A row position is only right against the rows its caller read, so callers hold the tab's
+row_lock() from locating a row until the write to it is answered; another caller's delete can't
+shift the row in between or share its batch.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import re
+
+from utils.logger import log
+
+
+_A1_CELL = re.compile(r"^(?:'?(.*?)'?!)?([A-Za-z]+)(\d+)")
+_NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+_US_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})$')
+_SHEETS_EPOCH = datetime.date(1899, 12, 30)
+
+
+def a1_to_grid(range_a1: str) -> tuple[str, int, int]:
+    """
+    Splits an A1 reference like "'Pending Cases'!B7" or "Data!O3:O3" into
+    (sheet title, 0-based row index, 0-based column index) of its top-left cell.
+    """
+    m = _A1_CELL.match(range_a1.strip())
+    if not m or not m.group(1):
+        raise ValueError(f"Expected a sheet-qualified A1 reference, got '{range_a1}'")
+    title, col, row = m.group(1), m.group(2).upper(), int(m.group(3))
+    col_index = 0
+    for ch in col:
+        col_index = col_index * 26 + (ord(ch) - ord('A') + 1)
+    return title, row - 1, col_index - 1
+
+
+def _date_cell(m) -> dict | None:
+    month, day, year = int(m.group(1)), int(m.group(2)), m.group(3)
+    full_year = int(year) if len(year) == 4 else (2000 + int(year) if int(year) < 30 else 1900 + int(year))
+    try:
+        serial = (datetime.date(full_year, month, day) - _SHEETS_EPOCH).days
+    except ValueError:
+        return None
+    pattern = "mm/dd/yyyy" if len(year) == 4 else "mm/dd/yy"
+    return {
+        "userEnteredValue": {"numberValue": serial},
+        "userEnteredFormat": {"numberFormat": {"type": "DATE", "pattern": pattern}},
+    }
+
+
+def cell_data(value) -> dict:
+    """
+    Converts a value the bot would send with valueInputOption=USER_ENTERED into CellData.
+    Formulas, numbers and MM/DD/YY(YY) dates keep their meaning; everything else is written as text.
+    """
+    if value is None:
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    s = str(value)
+    if s.startswith("="):
+        return {"userEnteredValue": {"formulaValue": s}}
+    if _NUMBER.match(s):
+        return {"userEnteredValue": {"numberValue": float(s)}}
+    m = _US_DATE.match(s)
+    if m:
+        date = _date_cell(m)
+        if date:
+            return date
+    return {"userEnteredValue": {"stringValue": s}}
+
+
+def _rows_data(values: list) -> tuple[list, str]:
+    """RowData for a 2D list of values, plus the field mask that writes exactly those values."""
+    rows = [{"values": [cell_data(v) for v in row]} for row in values]
+    has_format = any("userEnteredFormat" in cell for row in rows for cell in row["values"])
+    return rows, "userEnteredValue,userEnteredFormat.numberFormat" if has_format else "userEnteredValue"
+
+
+def update_cells_request(sheet_id: int, row_index: int, col_index: int, values: list) -> dict:
+    """updateCells request writing a 2D list of values with its top-left cell at (row_index, col_index), 0-based."""
+    rows, fields = _rows_data(values)
+    return {
+        "updateCells": {
+            "start": {"sheetId": sheet_id, "rowIndex": row_index, "columnIndex": col_index},
+            "rows": rows,
+            "fields": fields,
+        }
+    }
+
+
+def delete_row_request(sheet_id: int, row_number: int) -> dict:
+    """deleteDimension request removing one 1-based sheet row."""
+    return {
+        "deleteDimension": {
+            "range": {
+                "sheetId": sheet_id,
+                "dimension": "ROWS",
+                "startIndex": row_number - 1,
+                "endIndex": row_number,
+            }
+        }
+    }
+
+
+def append_rows_request(sheet_id: int, rows: int) -> dict:
+    """appendDimension request adding rows empty rows to the bottom of a tab's grid."""
+    return {"appendDimension": {"sheetId": sheet_id, "dimension": "ROWS", "length": rows}}
+
+
+def _rejected(error: Exception) -> bool:
+    """True if the server refused the whole batch as invalid (a 4xx other than 429), so none of it was applied."""
+    status = getattr(error, "status", None)
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+
+class SheetsMutationQueue:
+    """
+    Collects Sheets writes for window_seconds and sends them as one batchUpdate.
+
+    api must provide `async batch_update(requests)`; sheet_id_for(title) is an async callable
+    returning the numeric sheetId of a tab.
+    """
+
+    def __init__(self, api, sheet_id_for, window_seconds: float = 0.025):
+        self.api = api
+        self.sheet_id_for = sheet_id_for
+        self.window_seconds = window_seconds
+        self._pending = []          # list of (mutations, future)
+        self._unsent = set()        # futures of every submission not yet answered, queued or in flight
+        self._send_lock = asyncio.Lock()
+        self._row_locks = {}        # sheet title -> asyncio.Lock held across locating rows and writing them
+        self._flush_task = None
+        self._stats = {"submissions": 0, "batches": 0, "requests": 0, "coalesced": 0, "isolated_retries": 0}
+
+    # ---- mutation builders ----
+    @staticmethod
+    def update_cells(range_a1: str, values: list) -> dict:
+        """Overwrite the cells starting at range_a1 with a 2D list of values."""
+        return {"kind": "update", "range": range_a1, "values": values}
+
+    @staticmethod
+    def set_counter(cell_a1: str, value) -> dict:
+        """
+        Write a counter cell. When several bumps of the same cell land in one batch,
+        only the last value is sent.
+        """
+        return {"kind": "update", "range": cell_a1, "values": [[value]], "coalesce": True}
+
+    @staticmethod
+    def append_row(sheet_title: str, values: list) -> dict:
+        """Append one row to a tab (appendCells: the sheet places it after its last row with data)."""
+        return {"kind": "append", "sheet": sheet_title, "values": values}
+
+    @staticmethod
+    def request(batch_request: dict) -> dict:
+        """A raw spreadsheets.batchUpdate request (deleteDimension, createDeveloperMetadata, ...)."""
+        return {"kind": "raw", "request": batch_request}
+
+    # ---- row positions ----
+    @contextlib.asynccontextmanager
+    async def row_lock(self, *sheet_titles: str):
+        """
+        Holds the row locks of the given tabs. Locate rows and submit the writes addressing them
+        inside it, so no other caller's row-shifting write lands in between.
+        """
+        locks = [self._row_locks.setdefault(title, asyncio.Lock()) for title in sorted(set(sheet_titles))]
+        async with contextlib.AsyncExitStack() as stack:
+            # A fixed order, so callers locking two tabs can't deadlock
+            for lock in locks:
+                await stack.enter_async_context(lock)
+            yield
+
+    # ---- submitting ----
+    async def submit(self, *mutations: dict) -> list:
+        """
+        Queues the mutations as one group and waits for the batch they go out in.
+        Returns the batchUpdate replies for the group's requests; raises if the group failed.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(mutations), future))
+        self._unsent.add(future)
+        future.add_done_callback(self._unsent.discard)
+        self._stats["submissions"] += 1
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+        return await future
+
+    async def wait_idle(self):
+        """
+        Waits until every write submitted so far has been sent (successfully or not).
+        Reads call this first so they see the bot's own queued writes.
+        """
+        if self._unsent:
+            await asyncio.wait(list(self._unsent))
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window_seconds)
+        # Submissions arriving while this batch is in flight start the next window
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Sends everything queued so far, after any batch still in flight."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # asyncio.Lock wakes waiters in FIFO order, so batches go out in the order they were taken
+        async with self._send_lock:
+            await self._send(pending)
+
+    async def _send(self, pending: list):
+        try:
+            requests, spans = await self._build(pending, coalesce=True)
+            result = await self.api.batch_update(requests)
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(requests)
+            replies = result.get("replies", [])
+            for (_, future), (start, end) in zip(pending, spans):
+                if not future.done():
+                    future.set_result(replies[start:end])
+            return
+        except Exception as e:
+            if len(pending) == 1 or not _rejected(e):
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            log(f"Batched Sheets write of {len(pending)} submissions failed ({e}); retrying them one by one")
+
+        # Isolate the failure: each group on its own, so only the bad one reports an error
+        for mutations, future in pending:
+            self._stats["isolated_retries"] += 1
+            try:
+                requests, _ = await self._build([(mutations, future)], coalesce=False)
+                result = await self.api.batch_update(requests)
+                self._stats["batches"] += 1
+                self._stats["requests"] += len(requests)
+                if not future.done():
+                    future.set_result(result.get("replies", []))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _build(self, pending: list, coalesce: bool) -> tuple[list, list]:
+        """
+        Turns queued groups into batchUpdate requests.
+        Returns (requests, [(start, end) slice of replies for each group]).
+        """
+        # Later counter writes to the same cell supersede earlier ones in this batch
+        last_write = {}
+        if coalesce:
+            for g, (mutations, _) in enumerate(pending):
+                for m, mutation in enumerate(mutations):
+                    if mutation.get("coalesce"):
+                        last_write[mutation["range"]] = (g, m)
+
+        requests, spans = [], []
+        for g, (mutations, _) in enumerate(pending):
+            start = len(requests)
+            for m, mutation in enumerate(mutations):
+                if mutation.get("coalesce") and coalesce and last_write.get(mutation["range"]) != (g, m):
+                    self._stats["coalesced"] += 1
+                    continue
+                requests.extend(await self._requests_for(mutation))
+            spans.append((start, len(requests)))
+        return requests, spans
+
+    async def _requests_for(self, mutation: dict) -> list:
+        kind = mutation["kind"]
+        if kind == "raw":
+            return [mutation["request"]]
+
+        if kind == "update":
+            title, row_index, col_index = a1_to_grid(mutation["range"])
+            return [update_cells_request(await self.sheet_id_for(title), row_index, col_index, mutation["values"])]
+
+        if kind == "append":
+            sheet_id = await self.sheet_id_for(mutation["sheet"])
+            rows, fields = _rows_data([mutation["values"]])
+            return [{
+                "appendCells": {
+                    "sheetId": sheet_id,
+                    "rows": rows,
+                    "fields": fields,
+                }
+            }]
+
+        raise ValueError(f"Unknown mutation kind '{kind}'")
+
+    def stats(self) -> dict:
+        return dict(self._stats, pending=len(self._pending))
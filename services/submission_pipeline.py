@@ -0,0 +1,142 @@
+"""
+Bounded, staged processing of submissions.
+
+Jobs go into an asyncio queue of at most max_queue jobs and are taken by a fixed number of
+workers, each running a job through the stages in order (for filings: fetch, classify, number,
+post). The number of workers, not the size of a burst, decides how many docs are fetched and
+classified at once, so a deadline rush is worked through at a steady rate.
+
+When the queue is full, further jobs are deferred: held in order and moved into the queue as
+room frees up. Past max_deferred, jobs are rejected and the caller decides what to tell the user.
+"""
+
+import asyncio
+import collections
+import time
+
+from utils.logger import log
+
+
+QUEUED = "queued"
+DEFERRED = "deferred"
+REJECTED = "rejected"
+
+
+class SubmissionPipeline:
+    """
+    submit(job) -> QUEUED / DEFERRED / REJECTED.
+
+    stages is a list of (name, async fn(job)); a stage returning False ends the job early
+    (e.g. nothing more to do). on_error(job, stage_name, exception) is awaited when a stage raises.
+    """
+
+    def __init__(self, stages: list, workers: int = 4, max_queue: int = 20, max_deferred: int = 100,
+                 on_error=None):
+        self.stages = stages
+        self.workers = max(1, int(workers))
+        self.max_deferred = max_deferred
+        self.on_error = on_error
+        self._queue = asyncio.Queue(maxsize=max(1, int(max_queue)))
+        self._deferred = collections.deque()
+        self._tasks = []
+        self._active = 0
+        self._stats = {"submitted": 0, "deferred": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._stage_stats = {
+            name: {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0} for name, _ in stages
+        }
+
+    def start(self):
+        """Starts the workers on the running loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        """Cancels the workers; queued and deferred jobs are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: dict) -> str:
+        """Queues job if there is room, else defers it, else rejects it. Never waits."""
+        self._stats["submitted"] += 1
+        job.setdefault("submitted_at", time.perf_counter())
+        self._refill()
+        if not self._deferred:
+            try:
+                self._queue.put_nowait(job)
+                return QUEUED
+            except asyncio.QueueFull:
+                pass
+        if len(self._deferred) < self.max_deferred:
+            self._deferred.append(job)
+            self._stats["deferred"] += 1
+            return DEFERRED
+        self._stats["rejected"] += 1
+        return REJECTED
+
+    def _refill(self):
+        """Moves deferred jobs into the queue while it has room, oldest first."""
+        while self._deferred and not self._queue.full():
+            self._queue.put_nowait(self._deferred.popleft())
+
+    async def _worker(self, number: int):
+        while True:
+            job = await self._queue.get()
+            self._refill()
+            self._active += 1
+            try:
+                await self._run(job)
+            finally:
+                self._active -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: dict):
+        job["queued_ms"] = round((time.perf_counter() - job["submitted_at"]) * 1000)
+        for name, stage in self.stages:
+            start = time.perf_counter()
+            try:
+                proceed = await stage(job)
+            except Exception as e:
+                self._stats["failed"] += 1
+                log(f"Submission pipeline stage '{name}' failed: {e}")
+                if self.on_error is not None:
+                    try:
+                        await self.on_error(job, name, e)
+                    except Exception as handler_error:
+                        log(f"Submission pipeline error handler failed: {handler_error}")
+                return
+            finally:
+                self._record(name, (time.perf_counter() - start) * 1000)
+            if proceed is False:
+                break
+        self._stats["completed"] += 1
+
+    def _record(self, name: str, elapsed_ms: float):
+        stage = self._stage_stats[name]
+        stage["count"] += 1
+        stage["total_ms"] += elapsed_ms
+        stage["max_ms"] = max(stage["max_ms"], elapsed_ms)
+        stage["last_ms"] = elapsed_ms
+
+    def is_saturated(self) -> bool:
+        return self._queue.full()
+
+    def stats(self) -> dict:
+        """Queue depth, deferred jobs, busy workers, job counters and per-stage latency (avg/max/last ms)."""
+        return dict(
+            self._stats,
+            queue_depth=self._queue.qsize(),
+            deferred_now=len(self._deferred),
+            active_workers=self._active,
+            workers=self.workers,
+            stages={
+                name: {
+                    "count": s["count"],
+                    "avg_ms": round(s["total_ms"] / s["count"]) if s["count"] else 0,
+                    "max_ms": round(s["max_ms"]),
+                    "last_ms": round(s["last_ms"]),
+                }
+                for name, s in self._stage_stats.items()
+            },
+        )
@@ -0,0 +1,63 @@
+"""
+Recently submitted documents, keyed by document id.
+
+A doc posted again (or edited and re-posted) within window_seconds of its first submission is a
+duplicate: the caller points at the review already posted for it instead of fetching,
+classifying and numbering it a second time. A denied submission is released, so a corrected
+doc can be submitted again straight away.
+"""
+
+import time
+from collections import OrderedDict
+
+
+class SubmissionRegistry:
+    """
+    doc id -> {"message_url", "review_url", "submitted_at"}, oldest first.
+
+    Used from the event loop only, so no locking.
+    """
+
+    def __init__(self, window_seconds: float = 86400, max_entries: int = 2000):
+        self.window_seconds = window_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._stats = {"claims": 0, "duplicates": 0, "releases": 0}
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self._entries:
+            doc_id, entry = next(iter(self._entries.items()))
+            if entry["submitted_at"] >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[doc_id]
+
+    def claim(self, doc_id: str, message_url: str) -> dict | None:
+        """
+        Records doc_id as submitted by message_url and returns None, or returns a copy of the
+        earlier submission's entry if the doc was already submitted within the window.
+        """
+        self._expire()
+        entry = self._entries.get(doc_id)
+        if entry is not None:
+            self._stats["duplicates"] += 1
+            return dict(entry)
+        self._entries[doc_id] = {"message_url": message_url, "review_url": None, "submitted_at": time.monotonic()}
+        self._stats["claims"] += 1
+        self._expire()
+        return None
+
+    def attach_review(self, doc_id: str, review_url: str):
+        """Remembers the review message posted for doc_id, for duplicates to link to."""
+        entry = self._entries.get(doc_id)
+        if entry is not None:
+            entry["review_url"] = review_url
+
+    def release(self, doc_id: str):
+        """Forgets doc_id (denied, rejected or already docketed), so it can be submitted again."""
+        if self._entries.pop(doc_id, None) is not None:
+            self._stats["releases"] += 1
+
+    def stats(self) -> dict:
+        self._expire()
+        return dict(self._stats, tracked=len(self._entries))
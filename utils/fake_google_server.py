@@ -0,0 +1,603 @@
+"""
+Local stand-in for the Google APIs the bot calls, for offline load testing.
+
+Serves the subset of Sheets v4 (values get/update/append/batchUpdate/...ByDataFilter, developer
+metadata search, spreadsheets get/batchUpdate), Docs v1 documents.get, Drive v3 files.get and
+Gemini generateContent/streamGenerateContent (SSE) that services/ uses, from an in-memory
+backend. Every request can be delayed (latency_ms +- jitter_ms) and a share of them failed
+(error_rate, error_status), so the rate limiter, retries and batching can be measured without
+network access.
+
+Run:
+    python -m utils.fake_google_server --port 8085 --seed seed.json --latency-ms 80 --error-rate 0.02
+
+then set google.api_base_url and AI.api_base_url in config.yaml to http://127.0.0.1:8085.
+Any GOOGLE_API_KEY value works; no service account is needed.
+
+The backend is pluggable: FakeGoogleServer takes any object with InMemoryBackend's methods,
+e.g. a subclass with a different generate() to test classification edge cases.
+GET /_fake/stats returns request counts; POST /_fake/config changes latency/error injection.
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import re
+import time
+from collections import Counter
+
+from aiohttp import web
+
+
+# ---- A1 helpers ----
+_A1_CELLS = re.compile(r"^\$?([A-Za-z]*)\$?(\d*)(?::\$?([A-Za-z]*)\$?(\d*))?$")
+
+
+def _col_index(letters: str) -> int:
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def _col_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def parse_a1(range_a1: str, default_title: str = None) -> tuple[str, int, int, int | None, int | None]:
+    """
+    "'Case Log'!B5:G5" -> ("Case Log", 4, 1, 4, 6): title, then 0-based start row/col and
+    inclusive end row/col (None when open-ended, e.g. "A2:F" or "A:F").
+    """
+    if "!" in range_a1:
+        title, cells = range_a1.rsplit("!", 1)
+    elif _A1_CELLS.match(range_a1) and range_a1:
+        title, cells = default_title, range_a1
+    else:
+        title, cells = range_a1, ""
+    if title and len(title) > 1 and title[0] == title[-1] == "'":
+        title = title[1:-1].replace("''", "'")
+
+    m = _A1_CELLS.match(cells)
+    if not m or not cells:
+        return title, 0, 0, None, None
+    c0, r0, c1, r1 = m.groups()
+    start_row = int(r0) - 1 if r0 else 0
+    start_col = _col_index(c0) if c0 else 0
+    if c1 is None and r1 is None:
+        # Single cell
+        return title, start_row, start_col, start_row, start_col
+    end_row = int(r1) - 1 if r1 else None
+    end_col = _col_index(c1) if c1 else None
+    return title, start_row, start_col, end_row, end_col
+
+
+def format_a1(title: str, start_row: int, start_col: int, end_row: int, end_col: int) -> str:
+    quoted = "'" + title.replace("'", "''") + "'"
+    return f"{quoted}!{_col_letters(start_col)}{start_row + 1}:{_col_letters(end_col)}{end_row + 1}"
+
+
+# ---- CellData helpers ----
+_HYPERLINK = re.compile(r'^=HYPERLINK\(\s*"[^"]*"\s*[,;]\s*"([^"]*)"\s*\)$', re.IGNORECASE)
+_SHEETS_EPOCH = 25569  # 1970-01-01 as a Sheets date serial
+
+
+def _user_entered(cell: dict):
+    """CellData (as sent by updateCells/appendCells) -> the value stored in the fake grid."""
+    value = cell.get("userEnteredValue")
+    if value is None:
+        return None
+    if "formulaValue" in value:
+        return value["formulaValue"]
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "boolValue" in value:
+        return value["boolValue"]
+    number = value.get("numberValue")
+    number_format = cell.get("userEnteredFormat", {}).get("numberFormat", {})
+    if number_format.get("type") == "DATE":
+        return time.strftime("%m/%d/%Y", time.gmtime((number - _SHEETS_EPOCH) * 86400))
+    return int(number) if float(number).is_integer() else number
+
+
+def _rendered(value, render: str):
+    if render == "FORMATTED_VALUE" and isinstance(value, str):
+        m = _HYPERLINK.match(value)
+        if m:
+            return m.group(1)
+    if render != "UNFORMATTED_VALUE" and not isinstance(value, str):
+        return str(value).upper() if isinstance(value, bool) else str(value)
+    return value
+
+
+def _trim(rows: list) -> list:
+    """Drops trailing empty cells and rows, like the values API does."""
+    out = []
+    for row in rows:
+        row = list(row)
+        while row and row[-1] in (None, ""):
+            row.pop()
+        out.append(row)
+    while out and not out[-1]:
+        out.pop()
+    return out
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ---- Backend ----
+def default_seed() -> dict:
+    """A tiny spreadsheet laid out like config_format.yaml's examples."""
+    return {
+        "sheets": {
+            "Pending Cases": [["Case Number", "Case Name", "Status", "Filing Date", "Link", "Judge"]],
+            "Data": [[], [], ["", "", "", "", "", "", "", "", "", "", "", "", "", "", "001"],
+                     ["", "", "", "", "", "", "", "", "", "", "", "", "", "", "001"]],
+            "Case Log": [],
+        },
+        "docs": {},
+    }
+
+
+class InMemoryBackend:
+    """
+    One spreadsheet, a set of docs and a rule-of-thumb classifier, all in memory.
+
+    seed: {"sheets": {title: [[cell, ...], ...]}, "docs": {document_id: text}}.
+    """
+
+    GRID_ROWS = 1000
+    GRID_COLUMNS = 26
+
+    def __init__(self, seed: dict = None):
+        seed = copy.deepcopy(seed or default_seed())
+        self.sheets = {}
+        for sheet_id, (title, rows) in enumerate(seed.get("sheets", {}).items()):
+            self.sheets[title] = {
+                "sheet_id": sheet_id,
+                "rows": [list(r) for r in rows],
+                "row_count": max(self.GRID_ROWS, len(rows)),
+                "column_count": self.GRID_COLUMNS,
+            }
+        self.docs = {doc_id: {"text": text, "revision": 1} for doc_id, text in seed.get("docs", {}).items()}
+        self.metadata = []
+        self._next_metadata_id = 1
+
+    # ---- grid ----
+    def _sheet(self, title: str) -> dict:
+        if title is None:
+            title = next(iter(self.sheets))
+        sheet = self.sheets.get(title)
+        if sheet is None:
+            raise FakeAPIError(400, f"Unable to parse range: {title}")
+        return sheet
+
+    def _sheet_by_id(self, sheet_id: int) -> tuple[str, dict]:
+        for title, sheet in self.sheets.items():
+            if sheet["sheet_id"] == sheet_id:
+                return title, sheet
+        raise FakeAPIError(400, f"No grid with id: {sheet_id}")
+
+    @staticmethod
+    def _write(sheet: dict, row: int, col: int, values: list, check_grid: bool = False):
+        for r, row_values in enumerate(values):
+            for c, value in enumerate(row_values):
+                if value is None:
+                    continue
+                if check_grid and (row + r >= sheet["row_count"] or col + c >= sheet["column_count"]):
+                    raise FakeAPIError(400, f"Range ({row + r + 1}, {col + c + 1}) exceeds grid limits.")
+                rows = sheet["rows"]
+                while len(rows) <= row + r:
+                    rows.append([])
+                cells = rows[row + r]
+                while len(cells) <= col + c:
+                    cells.append("")
+                cells[col + c] = value
+        sheet["row_count"] = max(sheet["row_count"], len(sheet["rows"]))
+
+    def _read(self, range_a1: str, render: str = "FORMATTED_VALUE") -> tuple[str, list]:
+        title, r0, c0, r1, c1 = parse_a1(range_a1)
+        sheet = self._sheet(title)
+        title = title or next(iter(self.sheets))
+        rows = sheet["rows"]
+        last_row = len(rows) - 1 if r1 is None else r1
+        last_col = max([len(r) for r in rows] + [1]) - 1 if c1 is None else c1
+        values = [
+            [_rendered(v, render) for v in (rows[r] if r < len(rows) else [])[c0:last_col + 1]]
+            for r in range(r0, last_row + 1)
+        ]
+        return format_a1(title, r0, c0, max(r0, last_row), max(c0, last_col)), _trim(values)
+
+    # ---- Sheets: spreadsheets ----
+    def spreadsheet(self) -> dict:
+        return {"sheets": [
+            {"properties": {
+                "sheetId": sheet["sheet_id"],
+                "title": title,
+                "gridProperties": {"rowCount": sheet["row_count"], "columnCount": sheet["column_count"]},
+            }}
+            for title, sheet in self.sheets.items()
+        ]}
+
+    def batch_update(self, requests: list) -> dict:
+        # Applied to a copy, so a failing request leaves the spreadsheet untouched like the real API
+        before = copy.deepcopy((self.sheets, self.metadata, self._next_metadata_id))
+        try:
+            return {"replies": [self._apply(request) for request in requests]}
+        except Exception:
+            self.sheets, self.metadata, self._next_metadata_id = before
+            raise
+
+    def _apply(self, request: dict) -> dict:
+        (kind, body), = request.items()
+        if kind == "updateCells":
+            _, sheet = self._sheet_by_id(body["start"]["sheetId"])
+            values = [[_user_entered(c) for c in row.get("values", [])] for row in body.get("rows", [])]
+            self._write(sheet, body["start"].get("rowIndex", 0), body["start"].get("columnIndex", 0), values, check_grid=True)
+            return {}
+        if kind == "appendCells":
+            _, sheet = self._sheet_by_id(body["sheetId"])
+            values = [[_user_entered(c) for c in row.get("values", [])] for row in body.get("rows", [])]
+            self._write(sheet, len(_trim(sheet["rows"])), 0, values)
+            return {}
+        if kind == "appendDimension":
+            _, sheet = self._sheet_by_id(body["sheetId"])
+            sheet["row_count" if body.get("dimension", "ROWS") == "ROWS" else "column_count"] += body["length"]
+            return {}
+        if kind == "deleteDimension":
+            dimension_range = body["range"]
+            _, sheet = self._sheet_by_id(dimension_range["sheetId"])
+            start, end = dimension_range["startIndex"], dimension_range["endIndex"]
+            del sheet["rows"][start:end]
+            sheet["row_count"] -= end - start
+            self._shift_metadata(dimension_range["sheetId"], start, end)
+            return {}
+        if kind == "createDeveloperMetadata":
+            metadata = copy.deepcopy(body["developerMetadata"])
+            metadata["metadataId"] = self._next_metadata_id
+            metadata["location"]["locationType"] = "ROW"
+            self._next_metadata_id += 1
+            self.metadata.append(metadata)
+            return {"createDeveloperMetadata": {"developerMetadata": metadata}}
+        if kind == "updateDeveloperMetadata":
+            matched = [m for f in body.get("dataFilters", []) for m in self._lookup(f)]
+            for metadata in matched:
+                for field in body.get("fields", "").split(","):
+                    if field.strip() in body["developerMetadata"]:
+                        metadata[field.strip()] = body["developerMetadata"][field.strip()]
+            return {"updateDeveloperMetadata": {"developerMetadata": matched}}
+        raise FakeAPIError(400, f"Unsupported request: {kind}")
+
+    # ---- Sheets: developer metadata ----
+    def _shift_metadata(self, sheet_id: int, start: int, end: int):
+        kept = []
+        for metadata in self.metadata:
+            dimension_range = metadata["location"]["dimensionRange"]
+            if dimension_range["sheetId"] != sheet_id:
+                kept.append(metadata)
+            elif dimension_range["startIndex"] >= end:
+                dimension_range["startIndex"] -= end - start
+                dimension_range["endIndex"] -= end - start
+                kept.append(metadata)
+            elif dimension_range["endIndex"] <= start:
+                kept.append(metadata)
+        self.metadata = kept
+
+    def _lookup(self, data_filter: dict) -> list:
+        lookup = data_filter.get("developerMetadataLookup")
+        if lookup is None:
+            return []
+        return [
+            m for m in self.metadata
+            if ("metadataKey" not in lookup or m.get("metadataKey") == lookup["metadataKey"])
+            and ("metadataValue" not in lookup or m.get("metadataValue") == lookup["metadataValue"])
+            and ("metadataId" not in lookup or m.get("metadataId") == lookup["metadataId"])
+        ]
+
+    def _filter_ranges(self, data_filter: dict) -> list:
+        """A1 ranges a DataFilter selects: the tagged rows, or its a1Range."""
+        if "a1Range" in data_filter:
+            return [data_filter["a1Range"]]
+        ranges = []
+        for metadata in self._lookup(data_filter):
+            dimension_range = metadata["location"]["dimensionRange"]
+            title, sheet = self._sheet_by_id(dimension_range["sheetId"])
+            ranges.append(format_a1(title, dimension_range["startIndex"], 0,
+                                    dimension_range["endIndex"] - 1, sheet["column_count"] - 1))
+        return ranges
+
+    def search_metadata(self, data_filters: list) -> dict:
+        matched = [
+            {"developerMetadata": m, "dataFilters": [f]}
+            for f in data_filters for m in self._lookup(f)
+        ]
+        return {"matchedDeveloperMetadata": matched} if matched else {}
+
+    # ---- Sheets: values ----
+    def get_values(self, range_a1: str, render: str = "FORMATTED_VALUE") -> dict:
+        normalized, values = self._read(range_a1, render)
+        result = {"range": normalized, "majorDimension": "ROWS"}
+        if values:
+            result["values"] = values
+        return result
+
+    def update_values(self, range_a1: str, values: list) -> dict:
+        title, r0, c0, _, _ = parse_a1(range_a1)
+        sheet = self._sheet(title)
+        self._write(sheet, r0, c0, values)
+        width = max([len(v) for v in values] + [1])
+        return {
+            "updatedRange": format_a1(title or next(iter(self.sheets)), r0, c0, r0 + len(values) - 1, c0 + width - 1),
+            "updatedRows": len(values),
+            "updatedCells": sum(len(v) for v in values),
+        }
+
+    def append_values(self, range_a1: str, values: list) -> dict:
+        title, r0, c0, _, _ = parse_a1(range_a1)
+        sheet = self._sheet(title)
+        row = max(r0, len(_trim(sheet["rows"])))
+        return {"updates": self.update_values(format_a1(title or next(iter(self.sheets)), row, c0, row, c0), values)}
+
+    def batch_update_values(self, data: list) -> dict:
+        return {"responses": [self.update_values(d["range"], d.get("values", [])) for d in data]}
+
+    def batch_get_by_data_filter(self, data_filters: list, render: str = "FORMATTED_VALUE") -> dict:
+        value_ranges = []
+        for data_filter in data_filters:
+            for range_a1 in self._filter_ranges(data_filter):
+                value_range = self.get_values(range_a1, render)
+                value_ranges.append({"valueRange": value_range, "dataFilters": [data_filter]})
+        return {"valueRanges": value_ranges}
+
+    def batch_update_by_data_filter(self, data: list) -> dict:
+        responses = []
+        for entry in data:
+            ranges = self._filter_ranges(entry["dataFilter"])
+            if not ranges:
+                responses.append({"dataFilter": entry["dataFilter"]})
+                continue
+            for range_a1 in ranges:
+                response = self.update_values(range_a1, entry.get("values", []))
+                responses.append(dict(response, dataFilter=entry["dataFilter"]))
+        return {"responses": responses}
+
+    # ---- Docs / Drive ----
+    def document(self, document_id: str) -> dict:
+        doc = self.docs.get(document_id)
+        if doc is None:
+            raise FakeAPIError(404, f"Requested entity was not found: {document_id}")
+        paragraphs = [
+            {"paragraph": {"elements": [{"textRun": {"content": line + "\n"}}]}}
+            for line in doc["text"].split("\n")
+        ]
+        return {"documentId": document_id, "revisionId": f"rev{doc['revision']}", "body": {"content": paragraphs}}
+
+    def drive_file(self, file_id: str) -> dict:
+        doc = self.docs.get(file_id)
+        if doc is None:
+            raise FakeAPIError(404, f"File not found: {file_id}")
+        return {"id": file_id, "version": str(doc["revision"]), "modifiedTime": f"2024-01-01T00:00:{doc['revision'] % 60:02d}Z"}
+
+    def put_document(self, document_id: str, text: str):
+        """Creates or edits a doc; edits bump its revision."""
+        doc = self.docs.setdefault(document_id, {"text": text, "revision": 0})
+        doc["text"] = text
+        doc["revision"] += 1
+
+    # ---- Gemini ----
+    def generate(self, model: str, prompt: str, generation_config: dict = None) -> str:
+        """Answers classification prompts (single or batched) with the bot's JSON shape."""
+        documents = re.findall(r"\[DOCUMENT (\d+)\]\n(.*?)\n\[DOCUMENT \1 END\]", prompt, re.DOTALL)
+        if documents:
+            return json.dumps([self._classify(text) for _, text in documents])
+        text = prompt.rsplit("[DOCUMENT TEXT END]", 1)[0]
+        return json.dumps(self._classify(text[-600:]))
+
+    @staticmethod
+    def _classify(text: str) -> dict:
+        if re.search(r"\bwrit\s+of\s+certiorari\b|\bsupreme\s+court\b", text, re.IGNORECASE):
+            case_type = "SC"
+        elif re.search(r"\bcriminal\b|\bprosecution\b", text, re.IGNORECASE):
+            case_type = "Criminal"
+        else:
+            case_type = "Civil"
+        m = re.search(r"([^\n,]+?)\s*,?\s*\n(?:\s*\w+,?\s*\n)?\s*vs?\.\s*\n\s*([^\n(]+)", text)
+        case_name = f"{m.group(1).strip()} v. {m.group(2).strip()}" if m else "Unknown v. Unknown"
+        return {"case_type": case_type, "case_name": case_name}
+
+
+# ---- HTTP server ----
+class FakeGoogleServer:
+    """aiohttp app serving backend with latency and error injection."""
+
+    def __init__(self, backend=None, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0.0, error_status: int = 503, stream_chunk_ms: float = 20):
+        self.backend = backend or InMemoryBackend()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # Delay between streamed Gemini chunks
+        self.stream_chunk_ms = stream_chunk_ms
+        self.stats = Counter()
+        self._lock = asyncio.Lock()
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._inject])
+        app.router.add_get("/_fake/stats", self._stats)
+        app.router.add_post("/_fake/config", self._config)
+        app.router.add_get("/v4/spreadsheets/{spreadsheet_id}", self._spreadsheet_get)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}:batchUpdate", self._spreadsheet_batch_update)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}/values:batchUpdate", self._values_batch_update)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}/values:batchGetByDataFilter", self._values_batch_get_by_data_filter)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}/values:batchUpdateByDataFilter", self._values_batch_update_by_data_filter)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}/developerMetadata:search", self._metadata_search)
+        app.router.add_get("/v4/spreadsheets/{spreadsheet_id}/values/{range}", self._values_get)
+        app.router.add_put("/v4/spreadsheets/{spreadsheet_id}/values/{range}", self._values_update)
+        app.router.add_post("/v4/spreadsheets/{spreadsheet_id}/values/{range}", self._values_append)
+        app.router.add_get("/v1/documents/{document_id}", self._document_get)
+        app.router.add_get("/drive/v3/files/{file_id}", self._drive_file_get)
+        app.router.add_post("/v1beta/models/{model}", self._generate)
+        return app
+
+    @web.middleware
+    async def _inject(self, request: web.Request, handler):
+        if request.path.startswith("/_fake/"):
+            return await handler(request)
+        self.stats[f"{request.method} {request.match_info.route.resource.canonical if request.match_info.route.resource else request.path}"] += 1
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            return self._error(self.error_status, "Injected error", retry_after="1")
+        try:
+            if request.path.startswith("/v1beta/"):
+                # Gemini handlers don't touch shared state, and streams shouldn't block other requests
+                return await handler(request)
+            # Handlers touch shared state; one at a time keeps the fake consistent
+            async with self._lock:
+                return await handler(request)
+        except FakeAPIError as e:
+            return self._error(e.status, e.message)
+        except (KeyError, ValueError, TypeError) as e:
+            return self._error(400, f"Invalid request: {e}")
+
+    @staticmethod
+    def _error(status: int, message: str, retry_after: str = None) -> web.Response:
+        headers = {"Retry-After": retry_after} if retry_after else None
+        return web.json_response({"error": {"code": status, "message": message}}, status=status, headers=headers)
+
+    # ---- control ----
+    async def _stats(self, request):
+        return web.json_response(dict(self.stats))
+
+    async def _config(self, request):
+        body = await request.json()
+        keys = ("latency_ms", "jitter_ms", "error_rate", "error_status", "stream_chunk_ms")
+        for key in keys:
+            if key in body:
+                setattr(self, key, body[key])
+        return web.json_response({k: getattr(self, k) for k in keys})
+
+    # ---- Sheets ----
+    async def _spreadsheet_get(self, request):
+        return web.json_response(self.backend.spreadsheet())
+
+    async def _spreadsheet_batch_update(self, request):
+        body = await request.json()
+        return web.json_response(self.backend.batch_update(body.get("requests", [])))
+
+    async def _values_get(self, request):
+        render = request.query.get("valueRenderOption", "FORMATTED_VALUE")
+        return web.json_response(self.backend.get_values(request.match_info["range"], render))
+
+    async def _values_update(self, request):
+        body = await request.json()
+        return web.json_response(self.backend.update_values(request.match_info["range"], body.get("values", [])))
+
+    async def _values_append(self, request):
+        range_a1 = request.match_info["range"]
+        if not range_a1.endswith(":append"):
+            raise FakeAPIError(404, f"Unknown method: {range_a1}")
+        body = await request.json()
+        return web.json_response(self.backend.append_values(range_a1[:-len(":append")], body.get("values", [])))
+
+    async def _values_batch_update(self, request):
+        body = await request.json()
+        return web.json_response(self.backend.batch_update_values(body.get("data", [])))
+
+    async def _values_batch_get_by_data_filter(self, request):
+        body = await request.json()
+        render = body.get("valueRenderOption", "FORMATTED_VALUE")
+        return web.json_response(self.backend.batch_get_by_data_filter(body.get("dataFilters", []), render))
+
+    async def _values_batch_update_by_data_filter(self, request):
+        body = await request.json()
+        return web.json_response(self.backend.batch_update_by_data_filter(body.get("data", [])))
+
+    async def _metadata_search(self, request):
+        body = await request.json()
+        return web.json_response(self.backend.search_metadata(body.get("dataFilters", [])))
+
+    # ---- Docs / Drive ----
+    async def _document_get(self, request):
+        return web.json_response(self.backend.document(request.match_info["document_id"]))
+
+    async def _drive_file_get(self, request):
+        return web.json_response(self.backend.drive_file(request.match_info["file_id"]))
+
+    # ---- Gemini ----
+    async def _generate(self, request):
+        model, _, method = request.match_info["model"].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            raise FakeAPIError(404, f"Unknown method: {method}")
+        body = await request.json()
+        prompt = "".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        text = self.backend.generate(model, prompt, body.get("generationConfig"))
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        usage = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens,
+        }
+        if method == "generateContent":
+            return web.json_response({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+                "usageMetadata": usage,
+            })
+
+        # Server-sent events, a few tokens per chunk; usage comes with the last one like Gemini's
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        pieces = [text[i:i + 16] for i in range(0, len(text), 16)] or [""]
+        for i, piece in enumerate(pieces):
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            if i == len(pieces) - 1:
+                chunk["candidates"][0]["finishReason"] = "STOP"
+                chunk["usageMetadata"] = usage
+            self.stats["stream_chunks"] += 1
+            await response.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            await asyncio.sleep(self.stream_chunk_ms / 1000)
+        await response.write_eof()
+        return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Google Sheets/Docs/Drive/Gemini server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--seed", help="JSON file: {\"sheets\": {title: rows}, \"docs\": {id: text}}")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failed, 0-1")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--stream-chunk-ms", type=float, default=20, help="Delay between streamed Gemini chunks")
+    args = parser.parse_args()
+
+    seed = None
+    if args.seed:
+        with open(args.seed, "r", encoding="utf-8") as f:
+            seed = json.load(f)
+
+    server = FakeGoogleServer(InMemoryBackend(seed), args.latency_ms, args.jitter_ms, args.error_rate,
+                              args.error_status, args.stream_chunk_ms)
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,722 @@
+"""
+Offline unit tests: no Discord connection, Google account or network access is needed.
+
+Run from the repository root, with requirements.txt installed:
+    python -m unittest utils.unit_tests
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+import weakref
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.classification_batcher import ClassificationBatcher
+from services.case_numbers import CaseNumberAllocator, counter_width, format_counter
+from services.docket_index import DocketIndex, document_id
+from services.judge_scheduler import JudgeScheduler, case_parties
+from services.rate_limiter import GoogleRateLimiter, is_idempotent, should_retry
+from services.sheets_mutation_queue import SheetsMutationQueue, delete_row_request
+
+
+def _import_ai_requests():
+    """
+    services.ai_requests, loaded against a throwaway config.yaml (CONFIG_PATH) with no
+    AI.api_base_url, so model calls go through the SDK path the tests replace get_model() for.
+    """
+    if "services.ai_requests" not in sys.modules:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "config.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("AI:\n")
+            f.write("  google_model: test-model\n")
+            f.write(f"  classification_cache_path: {os.path.join(directory, 'cache.sqlite3')!r}\n")
+        os.environ["CONFIG_PATH"] = path
+    from services import ai_requests
+    return ai_requests
+
+
+def _docket_row(case_name, case_number, doc_id=None, judge=""):
+    link = f'=HYPERLINK("https://docs.google.com/document/d/{doc_id}/edit", "Link")' if doc_id else ""
+    return [judge, "Pending", case_name, case_number, "01/01/2025", link]
+
+
+# ---- Sheets mutation queue ----
+class _APIError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class _RecordingSheetsAPI:
+    """batch_update stand-in recording when each batch starts and ends; the first one is slow."""
+
+    def __init__(self, fail_when=None, fail_status=400):
+        self.events = []
+        self.batches = []
+        self.fail_when = fail_when
+        self.fail_status = fail_status
+
+    async def batch_update(self, requests):
+        n = len(self.batches) + 1
+        self.batches.append(requests)
+        self.events.append(f"start{n}")
+        await asyncio.sleep(0.05 if n == 1 else 0.001)
+        self.events.append(f"end{n}")
+        if self.fail_when and any(self.fail_when(r) for r in requests):
+            raise _APIError(self.fail_status)
+        return {"replies": [{} for _ in requests]}
+
+
+async def _sheet_id(title):
+    return 7
+
+
+class SheetsMutationQueueTests(unittest.TestCase):
+    def test_batches_do_not_overlap(self):
+        async def run():
+            api = _RecordingSheetsAPI()
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.001)
+            first = asyncio.create_task(queue.submit(queue.request({"deleteDimension": {}})))
+            await asyncio.sleep(0.01)  # the first batch is now in flight
+            second = asyncio.create_task(queue.submit(queue.request({"updateCells": {}})))
+            await asyncio.gather(first, second)
+            return api
+
+        api = asyncio.run(run())
+        self.assertEqual(api.events, ["start1", "end1", "start2", "end2"])
+        self.assertEqual(api.batches, [[{"deleteDimension": {}}], [{"updateCells": {}}]])
+
+    def test_wait_idle_covers_batches_in_flight(self):
+        async def run():
+            api = _RecordingSheetsAPI()
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.001)
+            first = asyncio.create_task(queue.submit(queue.request({"a": 1})))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(queue.submit(queue.request({"b": 1})))
+            await asyncio.sleep(0.005)
+            await queue.wait_idle()
+            return first.done(), second.done()
+
+        self.assertEqual(asyncio.run(run()), (True, True))
+
+    def test_submissions_in_one_window_share_a_batch(self):
+        async def run():
+            api = _RecordingSheetsAPI()
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.01)
+            replies = await asyncio.gather(
+                queue.submit(queue.request({"a": 1}), queue.request({"b": 1})),
+                queue.submit(queue.request({"c": 1})),
+            )
+            return api, replies
+
+        api, replies = asyncio.run(run())
+        self.assertEqual(len(api.batches), 1)
+        self.assertEqual([len(r) for r in replies], [2, 1])
+
+    def test_failed_batch_is_isolated(self):
+        async def run():
+            api = _RecordingSheetsAPI(fail_when=lambda r: "bad" in r)
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.01)
+            return await asyncio.gather(
+                queue.submit(queue.request({"good": 1})),
+                queue.submit(queue.request({"bad": 1})),
+                return_exceptions=True,
+            )
+
+        good, bad = asyncio.run(run())
+        self.assertEqual(good, [{}])
+        self.assertIsInstance(bad, _APIError)
+
+    def test_batch_that_may_have_been_applied_is_not_resent(self):
+        async def run():
+            api = _RecordingSheetsAPI(fail_when=lambda r: "bad" in r, fail_status=503)
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.01)
+            results = await asyncio.gather(
+                queue.submit(queue.append_row("Pending Cases", ["SD v. Ed"])),
+                queue.submit(queue.request({"bad": 1})),
+                return_exceptions=True,
+            )
+            return api, results
+
+        api, results = asyncio.run(run())
+        self.assertEqual(len(api.batches), 1)
+        self.assertTrue(all(isinstance(r, _APIError) for r in results))
+
+    def test_append_row_is_placed_by_the_sheet(self):
+        async def run():
+            api = _RecordingSheetsAPI()
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.001)
+            await queue.submit(queue.append_row("Pending Cases", ["", "Pending", "SD v. Ed"]))
+            return api.batches[0]
+
+        (request,) = asyncio.run(run())
+        self.assertIn("appendCells", request)
+        self.assertEqual(request["appendCells"]["sheetId"], 7)
+        self.assertNotIn("updateCells", request)
+
+    def test_counter_writes_to_one_cell_coalesce(self):
+        async def run():
+            api = _RecordingSheetsAPI()
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.01)
+            await asyncio.gather(
+                queue.submit(queue.set_counter("Data!O3", "41")),
+                queue.submit(queue.set_counter("Data!O3", "42")),
+            )
+            return api.batches[0]
+
+        (request,) = asyncio.run(run())
+        value = request["updateCells"]["rows"][0]["values"][0]["userEnteredValue"]
+        self.assertEqual(value, {"numberValue": 42.0})
+
+
+class _GridSheetsAPI:
+    """batch_update stand-in holding one tab's rows and applying deleteDimension to them."""
+
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+
+    async def read(self):
+        await asyncio.sleep(0.005)
+        return [list(r) for r in self.rows]
+
+    async def batch_update(self, requests):
+        await asyncio.sleep(0.005)
+        for request in requests:
+            span = request["deleteDimension"]["range"]
+            del self.rows[span["startIndex"]:span["endIndex"]]
+        return {"replies": [{} for _ in requests]}
+
+
+class RowPositionTests(unittest.TestCase):
+    def test_concurrent_deletes_remove_the_right_rows(self):
+        async def delete(queue, api, case_number):
+            async with queue.row_lock("Pending Cases"):
+                await queue.wait_idle()
+                rows = await api.read()
+                row_number = next(i for i, row in enumerate(rows, start=1) if row[0] == case_number)
+                await queue.submit(queue.request(delete_row_request(7, row_number)))
+
+        async def run():
+            api = _GridSheetsAPI([["Crim 001"], ["Crim 002"], ["Crim 003"], ["Crim 004"]])
+            queue = SheetsMutationQueue(api, _sheet_id, window_seconds=0.01)
+            await asyncio.gather(delete(queue, api, "Crim 002"), delete(queue, api, "Crim 003"))
+            return api.rows
+
+        self.assertEqual(asyncio.run(run()), [["Crim 001"], ["Crim 004"]])
+
+    def test_row_lock_on_two_tabs(self):
+        async def hold(queue, titles, events, name):
+            async with queue.row_lock(*titles):
+                events.append(f"{name} in")
+                await asyncio.sleep(0.01)
+                events.append(f"{name} out")
+
+        async def run():
+            queue = SheetsMutationQueue(_RecordingSheetsAPI(), _sheet_id)
+            events = []
+            await asyncio.gather(
+                hold(queue, ("Pending Cases", "Case Log"), events, "a"),
+                hold(queue, ("Case Log", "Pending Cases"), events, "b"),
+                hold(queue, ("Data",), events, "c"),
+            )
+            return events
+
+        events = asyncio.run(run())
+        self.assertLess(events.index("a out"), events.index("b in"))
+        self.assertLess(events.index("c in"), events.index("a out"))
+
+
+
+# ---- Docket index ----
+class DocketIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = DocketIndex(data_start_row=2)
+        self.index.rebuild([
+            _docket_row("SD v. Ed", "Crim 001", doc_id="docA"),
+            _docket_row("Alice v. Bob", "Civ 002"),
+        ])
+
+    def test_lookups(self):
+        self.assertEqual(self.index.get(" crim  001 ")["row_number"], 2)
+        self.assertEqual(self.index.find_by_name("alice v. bob")[0]["case_number"], "Civ 002")
+        self.assertEqual(self.index.find_by_document("docA")["case_name"], "SD v. Ed")
+        self.assertIsNone(self.index.get("Crim 999"))
+
+    def test_document_id(self):
+        self.assertEqual(document_id("https://docs.google.com/document/d/abc-123_X/edit?usp=sharing"), "abc-123_X")
+        self.assertIsNone(document_id("https://example.com/no-id"))
+        self.assertIsNone(document_id(None))
+
+    def test_append_lands_below_manual_rows(self):
+        # A row typed into the sheet by hand is part of the read, so the next append goes below it
+        self.index.rebuild([
+            _docket_row("SD v. Ed", "Crim 001"),
+            _docket_row("Alice v. Bob", "Civ 002"),
+            _docket_row("Manual v. Entry", "Civ 003"),
+        ])
+        self.assertEqual(self.index.next_row_number(), 5)
+        self.index.add({"case_name": "SD v. New", "case_number": "Crim 004"}, self.index.next_row_number())
+        self.assertEqual(self.index.get("Civ 003")["row_number"], 4)
+        self.assertEqual(self.index.get("Crim 004")["row_number"], 5)
+        self.assertEqual(self.index.next_row_number(), 6)
+
+    def test_add_inside_the_docket_shifts_rows_down(self):
+        self.index.add({"case_name": "SD v. New", "case_number": "Crim 003"}, 2)
+        self.assertEqual(self.index.get("Crim 003")["row_number"], 2)
+        self.assertEqual(self.index.get("Crim 001")["row_number"], 3)
+        self.assertEqual(self.index.get("Civ 002")["row_number"], 4)
+
+    def test_remove_shifts_rows_up(self):
+        self.assertTrue(self.index.remove("Crim 001"))
+        self.assertEqual(self.index.get("Civ 002")["row_number"], 2)
+        self.assertIsNone(self.index.find_by_document("docA"))
+        self.assertFalse(self.index.remove("Crim 001"))
+
+    def test_update_and_invalidate(self):
+        self.assertTrue(self.index.update("Civ 002", {"judge": "Judge Judy", "not_a_column": 1}))
+        self.assertEqual(self.index.get("Civ 002")["judge"], "Judge Judy")
+        self.assertTrue(self.index.is_fresh())
+        self.index.invalidate()
+        self.assertFalse(self.index.is_fresh())
+
+
+# ---- Case numbers ----
+class CaseNumberAllocatorTests(unittest.TestCase):
+    def _allocator(self, value):
+        cells = {"Data!O3": value}
+
+        async def read(cell):
+            return cells[cell]
+
+        async def write(cell, new_value):
+            cells[cell] = new_value
+
+        return CaseNumberAllocator(read, write), cells
+
+    def test_numbers_keep_the_cell_format(self):
+        self.assertEqual(counter_width("40"), 1)
+        self.assertEqual(counter_width("040"), 3)
+        self.assertEqual(format_counter(40), "40")
+        self.assertEqual(format_counter(40, 3), "040")
+
+    def test_peek_does_not_take_the_number(self):
+        async def run():
+            allocator, cells = self._allocator("040")
+            peeked = await allocator.peek("Data!O3")
+            number = await allocator.allocate("Data!O3")
+            await allocator.flush()
+            return peeked, allocator.format("Data!O3", number), cells["Data!O3"]
+
+        self.assertEqual(asyncio.run(run()), (40, "040", "041"))
+
+    def test_release_gives_back_the_last_number(self):
+        async def run():
+            allocator, cells = self._allocator("40")
+            number = await allocator.allocate("Data!O3")
+            released = await allocator.release("Data!O3", number)
+            again = await allocator.allocate("Data!O3")
+            await allocator.flush()
+            return released, number, again, cells["Data!O3"]
+
+        self.assertEqual(asyncio.run(run()), (True, 40, 40, "41"))
+
+    def test_claim_moves_the_counter_past_a_typed_number(self):
+        async def run():
+            allocator, cells = self._allocator("40")
+            moved = await allocator.claim("Data!O3", 45)
+            behind = await allocator.claim("Data!O3", 42)
+            number = await allocator.allocate("Data!O3")
+            await allocator.flush()
+            return moved, behind, number, cells["Data!O3"]
+
+        self.assertEqual(asyncio.run(run()), (True, False, 46, "47"))
+
+    def test_claim_past_a_reserved_block(self):
+        async def run():
+            cells = {"Data!O3": "040"}
+
+            async def read(cell):
+                return cells[cell]
+
+            async def write(cell, value):
+                cells[cell] = value
+
+            allocator = CaseNumberAllocator(read, write, block_size=10)
+            first = await allocator.allocate("Data!O3")      # reserves 40-49
+            await allocator.claim("Data!O3", 45)             # inside the block: sheet unchanged
+            inside = cells["Data!O3"]
+            await allocator.claim("Data!O3", 60)             # past it: counter moves to 61
+            past = cells["Data!O3"]
+            after = await allocator.allocate("Data!O3")      # next block starts at 61
+            return first, inside, past, after, cells["Data!O3"]
+
+        self.assertEqual(asyncio.run(run()), (40, "050", "061", 61, "071"))
+
+
+
+# ---- Rate limiter ----
+class RetryPolicyTests(unittest.TestCase):
+    def test_idempotent_requests(self):
+        base = "https://sheets.googleapis.com/v4/spreadsheets/abc"
+        self.assertTrue(is_idempotent("GET", f"{base}/values/Data%21O3"))
+        self.assertTrue(is_idempotent("PUT", f"{base}/values/Data%21O3?valueInputOption=USER_ENTERED"))
+        self.assertTrue(is_idempotent("POST", f"{base}/values:batchGetByDataFilter"))
+        self.assertTrue(is_idempotent("POST", f"{base}/values:batchUpdateByDataFilter"))
+        self.assertFalse(is_idempotent("POST", f"{base}/values/Pending%20Cases%21A%3AF:append"))
+        self.assertTrue(is_idempotent("POST", f"{base}:batchUpdate", {"requests": [{"updateCells": {}}]}))
+        self.assertTrue(is_idempotent("POST", f"{base}:batchUpdate", '{"requests": [{"updateCells": {}}]}'))
+        for request in ("appendCells", "deleteDimension", "createDeveloperMetadata", "appendDimension"):
+            self.assertFalse(is_idempotent("POST", f"{base}:batchUpdate", {"requests": [{"updateCells": {}}, {request: {}}]}))
+
+    def test_should_retry(self):
+        self.assertTrue(should_retry(429, idempotent=False))
+        self.assertTrue(should_retry(503, idempotent=True))
+        self.assertFalse(should_retry(503, idempotent=False))
+        self.assertFalse(should_retry(400, idempotent=True))
+
+    def _calls(self, error, idempotent):
+        limiter = GoogleRateLimiter(base_delay=0, max_delay=0, max_retries=2)
+        attempts = []
+
+        def fn():
+            attempts.append(1)
+            raise error
+
+        with self.assertRaises(type(error)):
+            limiter.call("write", fn, idempotent=idempotent)
+        return len(attempts)
+
+    def test_appends_are_only_retried_on_429(self):
+        def http_error(status):
+            return HttpError(httplib2.Response({"status": status}), b"{}")
+
+        self.assertEqual(self._calls(http_error(503), idempotent=False), 1)
+        self.assertEqual(self._calls(TimeoutError("timed out"), idempotent=False), 1)
+        self.assertEqual(self._calls(http_error(429), idempotent=False), 3)
+        self.assertEqual(self._calls(http_error(503), idempotent=True), 3)
+        self.assertEqual(self._calls(ConnectionError("reset"), idempotent=True), 3)
+
+
+
+# ---- AI request concurrency ----
+class AIConcurrencyTests(unittest.TestCase):
+    def setUp(self):
+        self.ai = _import_ai_requests()
+        self.addCleanup(setattr, self.ai, "_ai_loop", self.ai._ai_loop)
+        self.addCleanup(setattr, self.ai, "_ai_semaphore", self.ai._ai_semaphore)
+        self.ai._ai_loop = self.ai._ai_semaphore = None
+
+    def test_finished_loops_are_not_kept(self):
+        # Blocking get_case_type() calls without the bot's loop each run on an asyncio.run() loop
+        loops = []
+
+        async def generate_content_async(prompt, generation_config=None):
+            return types.SimpleNamespace(text="ok", usage_metadata=None)
+
+        async def run():
+            loops.append(weakref.ref(asyncio.get_running_loop()))
+            return await self.ai.ai_function({"prompt": "classify"})
+
+        model = types.SimpleNamespace(generate_content_async=generate_content_async)
+        with mock.patch.object(self.ai, "get_model", return_value=model):
+            for _ in range(3):
+                self.assertTrue(asyncio.run(run())["success"])
+        gc.collect()
+
+        self.assertEqual([ref() is None for ref in loops], [True, True, False])
+
+    def test_requests_on_the_bot_loop_share_one_semaphore(self):
+        async def run():
+            self.ai._ai_loop = asyncio.get_running_loop()
+            return self.ai._semaphore(), self.ai._semaphore()
+
+        first, second = asyncio.run(run())
+        self.assertIs(first, second)
+
+
+# ---- Preclassification ----
+CRIMINAL_FILING = """CRIMINAL COMPLAINT
+
+State of SimDemocracy,
+Prosecution,
+v.
+boho43 (123456789012345678)
+Defendant
+"""
+
+CIVIL_FILING = """CIVIL COMPLAINT
+
+Alice,
+Plaintiff,
+v.
+Bob
+"""
+
+PETITION_FILING = """PETITION FOR A WRIT OF CERTIORARI
+
+Alice,
+Petitioner,
+v.
+State of SimDemocracy
+"""
+
+
+class PreclassifyTests(unittest.TestCase):
+    def setUp(self):
+        self.ai = _import_ai_requests()
+
+    def test_criminal_template(self):
+        self.assertEqual(
+            self.ai.preclassify(CRIMINAL_FILING),
+            {"case_type": "Criminal", "case_name": "SD v. boho43", "confidence": 1.0},
+        )
+
+    def test_civil_template(self):
+        self.assertEqual(
+            self.ai.preclassify(CIVIL_FILING),
+            {"case_type": "Civil", "case_name": "Alice v. Bob", "confidence": 1.0},
+        )
+
+    def test_petitions_go_to_the_model(self):
+        result = self.ai.preclassify(PETITION_FILING)
+        self.assertEqual(result["confidence"], 0.0)
+        self.assertLess(result["confidence"], self.ai.PRECLASSIFY_THRESHOLD)
+
+    def test_untitled_filing_is_not_trusted(self):
+        self.assertLess(self.ai.preclassify("Some letter to the court")["confidence"], self.ai.PRECLASSIFY_THRESHOLD)
+
+
+# ---- Classification batching ----
+class _FakeClassifier:
+    """classify_one/classify_batch stand-ins recording what was sent together."""
+
+    def __init__(self, delay=0.02, batch_answers=None):
+        self.delay = delay
+        self.calls = []
+        self.batch_answers = batch_answers
+
+    async def one(self, text):
+        self.calls.append([text])
+        await asyncio.sleep(self.delay)
+        return {"success": True, "case_type": "Civil", "case_name": text, "error": None}
+
+    async def batch(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.batch_answers is not None:
+            return self.batch_answers(texts)
+        return [{"success": True, "case_type": "Civil", "case_name": t, "error": None} for t in texts]
+
+
+class ClassificationBatcherTests(unittest.TestCase):
+    def test_lone_filing_is_sent_without_waiting(self):
+        async def run():
+            classifier = _FakeClassifier()
+            batcher = ClassificationBatcher(classifier.batch, classifier.one, window_seconds=5)
+            started = time.monotonic()
+            result = await batcher.classify("A v. B")
+            return result, time.monotonic() - started, classifier.calls
+
+        result, elapsed, calls = asyncio.run(run())
+        self.assertEqual(result["case_name"], "A v. B")
+        self.assertLess(elapsed, 1)
+        self.assertEqual(calls, [["A v. B"]])
+
+    def test_filings_arriving_while_one_is_in_flight_share_a_request(self):
+        async def run():
+            classifier = _FakeClassifier(delay=0.05)
+            batcher = ClassificationBatcher(classifier.batch, classifier.one, window_seconds=0.02)
+            first = asyncio.create_task(batcher.classify("first"))
+            await asyncio.sleep(0.01)
+            rest = [asyncio.create_task(batcher.classify(t)) for t in ("second", "third", "fourth")]
+            results = await asyncio.gather(first, *rest)
+            return [r["case_name"] for r in results], classifier.calls
+
+        names, calls = asyncio.run(run())
+        self.assertEqual(names, ["first", "second", "third", "fourth"])
+        self.assertEqual(calls, [["first"], ["second", "third", "fourth"]])
+
+    def test_unanswered_entries_are_classified_one_by_one(self):
+        async def run():
+            classifier = _FakeClassifier(
+                delay=0.01,
+                batch_answers=lambda texts: [None if t == "odd" else
+                                             {"success": True, "case_type": "Civil", "case_name": t, "error": None}
+                                             for t in texts],
+            )
+            batcher = ClassificationBatcher(classifier.batch, classifier.one, window_seconds=0.01)
+            results = await asyncio.gather(batcher.classify("even"), batcher.classify("odd"))
+            return [r["case_name"] for r in results], classifier.calls
+
+        names, calls = asyncio.run(run())
+        self.assertEqual(names, ["even", "odd"])
+        self.assertEqual(calls, [["even", "odd"], ["odd"]])
+
+
+
+# ---- Fake Google server backend ----
+class FakeSheetsBackendTests(unittest.TestCase):
+    def test_values_append_goes_below_the_last_row(self):
+        from utils.fake_google_server import InMemoryBackend
+
+        backend = InMemoryBackend({"sheets": {"Pending Cases": [
+            ["Judge", "Status", "Case", "Number", "Filed", "Link"],
+            _docket_row("SD v. Ed", "Crim 001"),
+            _docket_row("Manual v. Entry", "Civ 002"),
+        ]}})
+        reply = backend.append_values("Pending Cases!A:F", [_docket_row("SD v. New", "Crim 003")])
+        self.assertIn("!A4:", reply["updates"]["updatedRange"])
+
+
+# ---- Classification schema ----
+class ClassificationSchemaTests(unittest.TestCase):
+    def setUp(self):
+        self.ai = _import_ai_requests()
+
+    def test_schema_allows_every_case_type(self):
+        self.assertEqual(set(self.ai.CASE_TYPES), {"Criminal", "Civil", "SC"})
+        enum = self.ai.CLASSIFICATION_SCHEMA["properties"]["case_type"]["enum"]
+        self.assertEqual(enum, self.ai.CASE_TYPES)
+
+    def test_supreme_court_answer_is_accepted(self):
+        result = self.ai._parse_case_type('{"case_type": "SC", "case_name": "Alice v. SD"}')
+        self.assertTrue(result["success"])
+        self.assertEqual(result["case_type"], "SC")
+
+    def test_answers_outside_the_schema_are_rejected(self):
+        self.assertIsNone(self.ai._classification({"case_type": "Appeal", "case_name": "Alice v. SD"}))
+        self.assertIsNone(self.ai._classification({"case_type": "Civil", "case_name": ""}))
+        self.assertFalse(self.ai._parse_case_type("not json")["success"])
+
+
+# ---- Streaming classification ----
+class _FakeStreamResponse:
+    """Stand-in for the SDK's streamed response: yields one chunk per piece and records being closed."""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.read = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        try:
+            for piece in self.pieces:
+                self.read += 1
+                yield types.SimpleNamespace(text=piece, usage_metadata=None)
+        finally:
+            self.closed = True
+
+
+class StreamingTests(unittest.TestCase):
+    def setUp(self):
+        self.ai = _import_ai_requests()
+
+    def test_stream_is_closed_when_the_answer_is_complete(self):
+        response = _FakeStreamResponse(['{"case_type": "Civil", ', '"case_name": "A v. B"}', "\n", "never read"])
+
+        async def generate_content_async(prompt, generation_config=None, stream=False):
+            return response
+
+        async def run():
+            result = await self.ai.ai_function({
+                "prompt": "classify",
+                "stream": True,
+                "until": lambda text: self.ai._json_value_end(text) is not None,
+            })
+            # Checked before asyncio.run() closes leftover generators on shutdown
+            return result, response.closed
+
+        model = types.SimpleNamespace(generate_content_async=generate_content_async)
+        with mock.patch.object(self.ai, "get_model", return_value=model):
+            result, closed = asyncio.run(run())
+
+        self.assertTrue(result["success"])
+        self.assertTrue(result["stopped_early"])
+        self.assertEqual(result["AIoutput"], '{"case_type": "Civil", "case_name": "A v. B"}')
+        self.assertTrue(closed)
+        self.assertEqual(response.read, 2)
+
+    def test_closing_the_sdk_stream_closes_the_response(self):
+        response = _FakeStreamResponse(["a", "b", "c"])
+
+        async def generate_content_async(prompt, generation_config=None, stream=False):
+            return response
+
+        async def run():
+            stream = self.ai._sdk_stream("test-model", "classify", {})
+            await anext(stream)
+            await stream.aclose()
+            return response.closed
+
+        model = types.SimpleNamespace(generate_content_async=generate_content_async)
+        with mock.patch.object(self.ai, "get_model", return_value=model):
+            self.assertTrue(asyncio.run(run()))
+
+    def test_answer_is_parsed_at_the_end_of_the_object(self):
+        result = self.ai._parse_case_type('{"case_type": "Criminal", "case_name": "SD v. Ed"}\n{"tr')
+        self.assertEqual(result["case_name"], "SD v. Ed")
+
+
+# ---- Judge scheduler ----
+def _judge(discord_id, name, availability="Active"):
+    return {"discord_id": discord_id, "judge_name": name, "case_availability": availability}
+
+
+class JudgeSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = JudgeScheduler()
+        self.scheduler.rebuild(
+            [_judge("1", "Ed"), _judge("2", "Judy"), _judge("3", "Dredd"), _judge("4", "Away", "Inactive")],
+            [{"judge": "Ed"}, {"judge": "Ed"}, {"judge": "2"}, {"judge": "Someone Else"}],
+        )
+
+    def test_least_loaded_active_judge_first(self):
+        self.assertEqual(self.scheduler.pick(), "3")
+
+    def test_open_requests_count_and_ties_rotate(self):
+        # Dredd 0 -> 1 open request; then Judy and Dredd are tied at 1, Judy was asked longer ago
+        self.assertEqual(self.scheduler.pick(), "3")
+        self.assertEqual(self.scheduler.pick(), "2")
+        self.assertEqual(self.scheduler.pick(), "3")
+        self.assertEqual(self.scheduler.stats()["open_requests"], 3)
+
+    def test_excluded_and_parties_are_skipped(self):
+        self.assertEqual(self.scheduler.pick(excluded={"3"}), "2")
+        self.scheduler.decline("2")
+        self.assertEqual(self.scheduler.pick(case_name="SD v. Dredd"), "2")
+
+    def test_inactive_judges_are_never_picked(self):
+        self.assertIsNone(self.scheduler.pick(excluded={"1", "2", "3"}))
+        self.assertEqual(self.scheduler.stats()["none_available"], 1)
+
+    def test_decline_releases_the_request(self):
+        picked = self.scheduler.pick()
+        self.scheduler.decline(picked)
+        self.assertEqual(self.scheduler.stats()["open_requests"], 0)
+        self.assertEqual(self.scheduler.pick(excluded={picked}), "2")
+
+    def test_accept_turns_the_request_into_a_case(self):
+        self.scheduler.accept(self.scheduler.pick())   # Dredd: 1 case
+        self.scheduler.accept(self.scheduler.pick())   # Judy was asked longer ago: 2 cases
+        self.assertEqual(self.scheduler.stats()["open_requests"], 0)
+        self.assertEqual(self.scheduler.pick(), "3")
+
+    def test_case_parties(self):
+        self.assertEqual(case_parties("SD v. Ed"), {"sd", "ed"})
+        self.assertEqual(case_parties("Alice vs Bob"), {"alice", "bob"})
+        self.assertEqual(case_parties(None), set())
+
+
+if __name__ == "__main__":
+    unittest.main()